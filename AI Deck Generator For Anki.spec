@@ -1,11 +1,12 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_data_files
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('settings.py', '.'), ('icons', 'icons'), ('anki_style.txt', '.'), ('prompt.txt', '.'), ('services', 'services'), ('README.md', '.'), ('keys.py', '.'), ('TERMS_AND_CONDITIONS.txt', '.'), ('version.py', '.')],
+    datas=[('settings.py', '.'), ('icons', 'icons'), ('anki_style.txt', '.'), ('prompt.txt', '.'), ('prompt_compact.txt', '.'), ('prompt_words.txt', '.'), ('prompt_compact_words.txt', '.'), ('kanji_index.bin', '.'), ('services', 'services'), ('README.md', '.'), ('keys.py', '.'), ('TERMS_AND_CONDITIONS.txt', '.'), ('version.py', '.')] + collect_data_files('pykakasi'),
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
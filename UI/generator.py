@@ -2,35 +2,33 @@ from pathlib import Path
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QPixmap, QIcon, QFont
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QGridLayout, QLabel,
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel,
     QLineEdit, QTextEdit, QPushButton, QFrame,
-    QSizePolicy
+    QSizePolicy, QFileDialog
 )
-from services.text_manipulation_service import TextManipulationService
-from services.translation_service import TranslationService
-from services.tts_service import TextToSpeechService
-from services.anki_service import AnkiService
+from services.pipeline_service import PipelineService
 from services.cleanup_service import CleanupService
-import json
 from services.popup_service import PopupService
 
 
 class GeneratorPage(QWidget):
-    def __init__(self, base_dir: Path, settings, open_settings_callback, get_output_folder_callback):
+    def __init__(self, base_dir: Path, settings, tts_service, credentials, open_settings_callback, get_output_folder_callback):
         super().__init__()
         self.BASE_DIR = base_dir
         self.settings = settings
         self.open_settings_callback = open_settings_callback
         self.get_output_folder_callback = get_output_folder_callback
 
-        # Initialize services
-        self.anki_generator = AnkiService(self.BASE_DIR)
-        self.cleanup_service = CleanupService(self.BASE_DIR)
-        self.text_processor = TextManipulationService(base_dir=self.BASE_DIR)
-        self.translation_service = TranslationService(base_dir=self.BASE_DIR)
-
-        # Initialize TextToSpeechService instance
-        self.voicevox_service = TextToSpeechService(base_dir=self.BASE_DIR)
+        # Initialize services; the TextToSpeechService is owned by MainWindow
+        self.voicevox_service = tts_service
+        self.credentials = credentials
+        # Batch mode would block the window until the batch ends (up to 24 h); it is for cli.py only
+        self.pipeline = PipelineService(
+            self.BASE_DIR, self.settings, tts_service=self.voicevox_service, credentials=self.credentials, batch=False
+        )
+        self.cleanup_service = CleanupService(self.BASE_DIR, self.settings)
+        self.text_processor = self.pipeline.text_processor
+        self.import_paths = []  # files to stream instead of the text box; several make one package
 
         font = QFont()
         font.setPointSize(self.settings.FONT_SIZE)
@@ -83,8 +81,15 @@ class GeneratorPage(QWidget):
         self.pin_input.setFont(font)
         self.pin_input.setEchoMode(QLineEdit.Password)  # ← Hide text input
 
+        # Lock button forgets the unlocked API key before the idle timeout
+        self.lock_btn = QPushButton("Lock")
+        self.lock_btn.setFont(font)
+        self.lock_btn.setToolTip("Require the PIN again for the next deck")
+        self.lock_btn.clicked.connect(self.lock_credentials)
+
         pin_layout.addWidget(pin_label, 0, 0)
         pin_layout.addWidget(self.pin_input, 0, 1, 1, 2)
+        pin_layout.addWidget(self.lock_btn, 0, 3)
         pin_layout.setColumnStretch(1, 1)
 
         main_layout.addLayout(pin_layout)
@@ -122,12 +127,27 @@ class GeneratorPage(QWidget):
         input_label = QLabel("Paste Text to Translate")
         input_label.setFont(font)
         input_label.setAlignment(Qt.AlignLeft)
-        main_layout.addWidget(input_label)
+
+        # Large files are streamed from disk instead of loaded into the text box
+        self.import_btn = QPushButton("Import Files…")
+        self.import_btn.setFont(font)
+        self.import_btn.setToolTip(
+            "Subtitles (.srt, .ass), EPUB books or large text files.\n"
+            "Several files make one package with a deck per file, under the deck title."
+        )
+        self.import_btn.clicked.connect(self.choose_import_file)
+
+        input_header = QHBoxLayout()
+        input_header.addWidget(input_label)
+        input_header.addStretch(1)
+        input_header.addWidget(self.import_btn)
+        main_layout.addLayout(input_header)
 
         self.input = QTextEdit()
         self.input.setFont(font)
         self.input.setPlainText(default_input)
         self.input.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.input.textChanged.connect(self.clear_import_file)
         main_layout.addWidget(self.input, 1)
 
         # === Generate Button ===
@@ -141,17 +161,40 @@ class GeneratorPage(QWidget):
         self.setLayout(main_layout)
 
     def process_input(self):
-        raw_text = self.input.toPlainText()
-        preprocessed = self.text_processor.split_lines(raw_text)
-        preprocessed = self.text_processor.remove_non_source_language(preprocessed)
-        lines = self.text_processor.extract_unique_lines(preprocessed)
-
         pin = self.pin_input.text().strip()
+        output_dir = self.get_output_folder_callback()
+        if len(self.import_paths) > 1:
+            self.process_files(pin, output_dir)
+            return
 
         try:
-            api_output = self.translation_service.request_translation_api(lines, pin=pin)
-            data = json.loads(api_output)
-            data = self.text_processor.add_indices_to_data(data)
+            if self.import_paths:
+                lines = self.pipeline.preprocess_file(self.import_paths[0])
+            else:
+                lines = self.pipeline.preprocess(self.input.toPlainText())
+        except Exception as e:
+            print(f"Failed to read the input: {e}")
+            PopupService.show_error_popup(
+                self,
+                title="Import Failed",
+                message=f"The input could not be read.\n{e}"
+            )
+            return
+
+        # Same text, title and settings as an earlier deck: nothing to generate
+        fingerprint = self.pipeline.fingerprint(lines, self.deck_title.text())
+        cached = self.pipeline.cached_package(fingerprint, output_dir=output_dir)
+        if cached:
+            PopupService.show_info_popup(
+                self,
+                title="Deck Saved",
+                message=f"This deck was already generated with the same text and settings:\n{cached.resolve()}"
+            )
+            return
+
+        try:
+            cards = self.pipeline.translate(lines, pin)
+            self.show_unlocked_state()
         except Exception as e:
             print(f"Failed to parse translation API output: {e}")
             PopupService.show_error_popup(
@@ -161,10 +204,71 @@ class GeneratorPage(QWidget):
             )
             return
 
-        output_dir = self.get_output_folder_callback()
-
-        # Generate MP3 files
-        self.voicevox_service.generate_mp3s(data)
+        # Generate audio files
+        self.pipeline.synthesize(cards)
 
         # Generate Anki deck
-        self.anki_generator.generate_anki_deck(data, self.deck_title.text(), output_dir=output_dir)
+        apkg_path = self.pipeline.package(cards, self.deck_title.text(), output_dir=output_dir, fingerprint=fingerprint)
+        message = f"Deck saved to:\n{apkg_path.resolve()}"
+        untranslated = self.pipeline.metrics.get("untranslated")
+        if untranslated:
+            message += f"\n\n{untranslated} lines could not be translated and were left out."
+        PopupService.show_info_popup(self, title="Deck Saved", message=message)
+
+    def process_files(self, pin: str, output_dir: str):
+        """One package for all imported files, a deck per file named after it, under the deck title."""
+        inputs = [(path.stem, self.pipeline.import_service.iter_chunks(path)) for path in self.import_paths]
+        try:
+            apkg_path = self.pipeline.run_many(inputs, self.deck_title.text(), pin, output_dir=output_dir)
+            self.show_unlocked_state()
+        except Exception as e:
+            print(f"Failed to generate the combined package: {e}")
+            PopupService.show_error_popup(
+                self,
+                title="Translation Failed",
+                message="Translation failed.\nPlease check your API key or network connection."
+            )
+            return
+
+        message = f"Package saved to:\n{apkg_path.resolve()}"
+        failed = [deck["title"] for deck in self.pipeline.metrics.get("decks", []) if "error" in deck]
+        if failed:
+            message += f"\n\nThese files could not be converted and were left out: {', '.join(failed)}"
+        PopupService.show_info_popup(self, title="Deck Saved", message=message)
+
+    def choose_import_file(self):
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Import Files", "", self.pipeline.import_service.file_filter()
+        )
+        if not paths:
+            return
+        paths = [Path(path) for path in paths]
+        size_mb = sum(path.stat().st_size for path in paths) / (1024 * 1024)
+
+        self.input.blockSignals(True)
+        self.input.clear()
+        self.input.blockSignals(False)
+        if len(paths) == 1:
+            self.input.setPlaceholderText(f"Importing {paths[0].name} ({size_mb:.1f} MB). Type here to paste text instead.")
+        else:
+            self.input.setPlaceholderText(
+                f"Importing {len(paths)} files ({size_mb:.1f} MB) into one package, a deck per file. "
+                "Type here to paste text instead."
+            )
+        self.import_paths = paths
+        if not self.deck_title.text().strip():
+            self.deck_title.setText(paths[0].stem if len(paths) == 1 else paths[0].parent.name)
+
+    def clear_import_file(self):
+        if self.import_paths:
+            self.import_paths = []
+            self.input.setPlaceholderText("")
+
+    def show_unlocked_state(self):
+        if self.credentials.is_unlocked():
+            self.pin_input.clear()
+            self.pin_input.setPlaceholderText("Unlocked")
+
+    def lock_credentials(self):
+        self.credentials.lock()
+        self.pin_input.setPlaceholderText("")
@@ -3,10 +3,9 @@ from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QPixmap, QIcon, QFont
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout, QLabel,
-    QLineEdit, QPushButton, QSizePolicy, QFileDialog, QFrame
+    QLineEdit, QPushButton, QSizePolicy, QFileDialog, QFrame, QSpinBox, QComboBox
 )
 from services.encryption_service import EncryptionService
-from services.popup_service import PopupService
 
 class SettingsPage(QWidget):
     def __init__(
@@ -83,6 +82,54 @@ class SettingsPage(QWidget):
         voicevox_layout.setColumnStretch(1, 1)
         main_layout.addLayout(voicevox_layout)
 
+        # VOICEVOX Speaker
+        speaker_layout = QGridLayout()
+        speaker_layout.addWidget(self._label("VOICEVOX Speaker", font), 0, 0)
+        self.voicevox_speaker = QSpinBox()
+        self.voicevox_speaker.setFont(font)
+        self.voicevox_speaker.setRange(0, 999)
+        speaker_layout.addWidget(self.voicevox_speaker, 0, 1)
+        speaker_layout.setColumnStretch(1, 1)
+        main_layout.addLayout(speaker_layout)
+
+        # Audio format
+        encoder_layout = QGridLayout()
+        encoder_layout.addWidget(self._label("Audio Format", font), 0, 0)
+        self.audio_encoder = QComboBox()
+        self.audio_encoder.setFont(font)
+        self.audio_encoder.addItem("MP3", "mp3")
+        self.audio_encoder.addItem("Opus (smaller .ogg files)", "opus")
+        encoder_layout.addWidget(self.audio_encoder, 0, 1)
+        encoder_layout.setColumnStretch(1, 1)
+        main_layout.addLayout(encoder_layout)
+
+        # Translation backend
+        backend_layout = QGridLayout()
+        backend_layout.addWidget(self._label("Translation", font), 0, 0)
+        self.translation_backend = QComboBox()
+        self.translation_backend.setFont(font)
+        self.translation_backend.addItem(f"OpenAI ({self.settings.AI_MODEL})", "openai")
+        self.translation_backend.addItem("Local model (offline)", "local")
+        backend_layout.addWidget(self.translation_backend, 0, 1)
+        backend_layout.setColumnStretch(1, 1)
+        main_layout.addLayout(backend_layout)
+
+        # Local Model Folder
+        model_layout = QGridLayout()
+        model_layout.addWidget(self._label("Local Model", font), 0, 0)
+        self.local_model_dir = QLineEdit()
+        self.local_model_dir.setFont(font)
+        self.local_model_dir.setReadOnly(True)
+        self.local_model_dir.setPlaceholderText("Folder with a MarianMT model (optional)")
+        model_layout.addWidget(self.local_model_dir, 0, 1)
+
+        browse_model_btn = QPushButton("Browse…")
+        browse_model_btn.setFont(font)
+        browse_model_btn.clicked.connect(self.browse_local_model_dir)
+        model_layout.addWidget(browse_model_btn, 0, 2)
+        model_layout.setColumnStretch(1, 1)
+        main_layout.addLayout(model_layout)
+
         # API Key
         api_key_layout = QGridLayout()
         api_key_layout.addWidget(self._label("Update API Key", font), 0, 0)
@@ -123,6 +170,10 @@ class SettingsPage(QWidget):
         # Initialize values from settings service
         self.folder_path.setText(self.settings_service.get_output_folder())
         self.voicevox_path.setText(self.settings_service.get_voicevox_path())
+        self.voicevox_speaker.setValue(self.settings_service.get_voicevox_speaker())
+        self.set_audio_encoder(self.settings_service.get_audio_encoder())
+        self.set_translation_backend(self.settings_service.get_translation_backend())
+        self.local_model_dir.setText(self.settings_service.get_local_model_dir())
 
         # Connect signals for validation
         self.api_key_field.textChanged.connect(self.update_save_button_state)
@@ -147,25 +198,31 @@ class SettingsPage(QWidget):
         if path:
             self.voicevox_path.setText(path)
 
+    def browse_local_model_dir(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Local Translation Model", str(Path.cwd()))
+        if folder:
+            self.local_model_dir.setText(folder)
+
     def on_save_clicked(self):
         folder_text = self.folder_path.text().strip()
         voicevox_text = self.voicevox_path.text().strip()
         api_key_text = self.api_key_field.text().strip()
         pin_text = self.pin_field.text().strip()
 
-        self.settings_service.set_output_folder(folder_text)
-        self.settings_service.set_voicevox_path(voicevox_text)
-        self.settings_service.save_settings()
-
-        if api_key_text and pin_text:
-            self.settings_service.encrypt_and_store_api_key(api_key_text, pin_text)
-
-        # Always show restart required popup
-        PopupService.show_error_popup(
-            self, "Restart Required",
-            "Please restart the application for the changes to take effect."
+        # Changes apply immediately; VOICEVOX restarts only if its path changed
+        self.settings_service.save_all(
+            api_key=api_key_text,
+            pin=pin_text,
+            OUTPUT_DIR=folder_text,
+            VOICEVOX_PATH=voicevox_text,
+            VOICEVOX_SPEAKER=self.voicevox_speaker.value(),
+            AUDIO_ENCODER=self.audio_encoder.currentData(),
+            TRANSLATION_BACKEND=self.translation_backend.currentData(),
+            LOCAL_MT_MODEL_DIR=self.local_model_dir.text().strip(),
         )
 
+        self.api_key_field.clear()
+        self.pin_field.clear()
         self.back_to_generator_callback()
 
     def update_save_button_state(self):
@@ -187,3 +244,29 @@ class SettingsPage(QWidget):
 
     def set_voicevox_path(self, path):
         self.voicevox_path.setText(path)
+
+    def get_voicevox_speaker(self):
+        return self.voicevox_speaker.value()
+
+    def set_voicevox_speaker(self, speaker):
+        self.voicevox_speaker.setValue(speaker)
+
+    def get_audio_encoder(self):
+        return self.audio_encoder.currentData()
+
+    def set_audio_encoder(self, encoder):
+        index = self.audio_encoder.findData(encoder)
+        self.audio_encoder.setCurrentIndex(max(index, 0))
+
+    def get_translation_backend(self):
+        return self.translation_backend.currentData()
+
+    def set_translation_backend(self, backend):
+        index = self.translation_backend.findData(backend)
+        self.translation_backend.setCurrentIndex(max(index, 0))
+
+    def get_local_model_dir(self):
+        return self.local_model_dir.text()
+
+    def set_local_model_dir(self, path):
+        self.local_model_dir.setText(path)
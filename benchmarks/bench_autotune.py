@@ -0,0 +1,116 @@
+"""
+Concurrency autotuning benchmark.
+
+Synthesizes a set of lines against a stub VOICEVOX engine that only takes
+--capacity requests at once, with fixed limits and with AIMD autotuning
+(AUTOTUNE_ENABLED), and reports time, clips produced, 429s and the limit
+the engine limiter settled on. With --overload reject extra requests get a
+429 (like a rate limit), with --overload slow they share the capacity and
+take longer (like a CPU-bound engine).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_autotune
+    python -m benchmarks.bench_autotune --capacity 2 --overload slow
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, _make_base_dir, git_commit
+from benchmarks.stubs import StubVoicevoxServer
+
+# name -> (AUTOTUNE_ENABLED, engine [min, start, max])
+CONFIGS = {
+    "fixed_1": (False, [1, 1, 1]),
+    "fixed_4": (False, [1, 4, 16]),
+    "fixed_16": (False, [1, 16, 16]),
+    "auto_4": (True, [1, 4, 16]),
+    "auto_16": (True, [1, 16, 16]),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200, help="Lines to synthesize")
+    parser.add_argument("--capacity", type=int, default=3, help="Engine requests served at once")
+    parser.add_argument("--overload", choices=["reject", "slow"], default="reject")
+    parser.add_argument("--overhead", type=float, default=0.05, help="Engine seconds per request")
+    parser.add_argument("--per-char", type=float, default=0.002, help="Engine seconds per character or mora")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    from services.card_store_service import CardStore
+    from services.settings_service import AppSettings
+    from services.tts_service import TextToSpeechService
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp_name, \
+            StubVoicevoxServer(args.overhead, args.per_char, capacity=args.capacity, overload=args.overload) as engine:
+        tmp = Path(tmp_name)
+        base_dir = _make_base_dir(tmp)
+        for name in args.configs:
+            enabled, engine_limits = CONFIGS[name]
+            settings = AppSettings(
+                API_PORT=str(engine.port),
+                AUTOTUNE_ENABLED=enabled,
+                AUTOTUNE_LIMITS={"engine": engine_limits},
+                MULTI_SYNTHESIS_MAX_BATCH=4,
+            )
+            tts = TextToSpeechService(base_dir, settings)
+            cards = CardStore(["L"])
+            for i in range(args.lines):
+                cards.add("L", f"これは{i}番目の例文です。", f"sentence {i}")
+            cards.media_dir = tmp / name
+            cards.media_dir.mkdir()
+
+            engine.request_count = engine.rejected_count = engine.peak_in_flight = 0
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                tts.generate_wavs(cards)
+            seconds = time.perf_counter() - start
+
+            snapshot = tts.engine_limit.snapshot()
+            stages[name] = {
+                "seconds": round(seconds, 6),
+                "clips": len(list(cards.media_dir.glob("*.wav"))),
+                "engine_requests": engine.request_count,
+                "rejected": engine.rejected_count,
+                "peak_in_flight": engine.peak_in_flight,
+                "final_limit": snapshot["limit"],
+                "backoffs": snapshot["backoffs"],
+            }
+            print(f"{name:<9} {seconds:7.2f}s  {stages[name]['clips']:5d}/{args.lines} clips  "
+                  f"{engine.rejected_count:4d} x 429  limit {snapshot['limit']:5.2f}")
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "autotune",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "lines": args.lines, "capacity": args.capacity, "overload": args.overload,
+            "overhead": args.overhead, "per_char": args.per_char,
+        },
+        "results": {"generate_wavs": {"stages": stages}},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"autotune_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Audio encoder benchmark.
+
+Encodes a set of synthetic speech-like clips (voiced harmonics with a moving
+pitch, a syllable envelope and consonant noise, 24 kHz mono like VOICEVOX)
+with each encoder setting, then packages them into an .apkg, and reports
+encode time, total audio size and package size. The old default, constant
+128 kbps MP3, is the baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_encode
+    python -m benchmarks.bench_encode --clips 500 --seconds 3
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, _make_base_dir, git_commit
+from benchmarks.stubs import SAMPLE_RATE, SECONDS_PER_MORA
+
+CONFIGS = {
+    "mp3_cbr128": {"AUDIO_ENCODER": "mp3", "MP3_VBR_QUALITY": -1, "MP3_BITRATE": 128},
+    "mp3_v2": {"AUDIO_ENCODER": "mp3", "MP3_VBR_QUALITY": 2},
+    "mp3_v6": {"AUDIO_ENCODER": "mp3", "MP3_VBR_QUALITY": 6},
+    "mp3_v9": {"AUDIO_ENCODER": "mp3", "MP3_VBR_QUALITY": 9},
+    "opus_32": {"AUDIO_ENCODER": "opus", "OPUS_BITRATE": 32},
+    "opus_24": {"AUDIO_ENCODER": "opus", "OPUS_BITRATE": 24},
+    "opus_16": {"AUDIO_ENCODER": "opus", "OPUS_BITRATE": 16},
+}
+
+
+def make_speech_like(seconds: float, rng) -> bytes:
+    """16-bit mono PCM that compresses roughly like speech (not like a pure tone)."""
+    import numpy as np
+
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    f0 = 120 + 60 * np.sin(2 * np.pi * rng.uniform(0.3, 0.8) * t) + rng.uniform(0, 40)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+
+    mora = int(SECONDS_PER_MORA * SAMPLE_RATE)
+    envelope = np.abs(np.sin(np.pi * (np.arange(n) % mora) / mora))
+    noise = rng.normal(0, 0.4, n) * (np.arange(n) % mora < mora // 5)
+    signal = (voiced * envelope + noise) * 0.25
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=200, help="Clips to encode")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Mean clip length in seconds")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    import wave
+    import numpy as np
+    from services.anki_service import AnkiService
+    from services.card_store_service import CardStore
+    from services.settings_service import AppSettings
+    from services.tts_service import TextToSpeechService
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp_name:
+        tmp = Path(tmp_name)
+        base_dir = _make_base_dir(tmp)
+        source_dir = tmp / "wav"
+        source_dir.mkdir()
+        rng = np.random.default_rng(0)
+        total_seconds = 0.0
+        for i in range(1, args.clips + 1):
+            seconds = max(0.3, rng.normal(args.seconds, args.seconds / 3))
+            total_seconds += seconds
+            with wave.open(str(source_dir / f"{i}.wav"), "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(make_speech_like(seconds, rng))
+
+        for name in args.configs:
+            settings = AppSettings(**CONFIGS[name])
+            tts = TextToSpeechService(base_dir, settings)
+            extension = tts.encoder.extension
+            media_dir = tmp / name
+            shutil.copytree(source_dir, media_dir)
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                tts.encode_audio(media_dir)
+            seconds = time.perf_counter() - start
+            for wav_file in media_dir.glob("*.wav"):
+                wav_file.unlink()
+
+            cards = CardStore(["L"])
+            for i in range(1, args.clips + 1):
+                cards.add("L", f"行{i}", f"line {i}").audio = f"{i}.{extension}"
+            cards.media_dir = media_dir
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                apkg_path = AnkiService(base_dir, settings).generate_anki_deck(cards, name, output_dir=str(tmp / "out"))
+
+            audio_bytes = sum(path.stat().st_size for path in media_dir.glob(f"*.{extension}"))
+            stages[name] = {
+                "seconds": round(seconds, 6),
+                "realtime_factor": round(total_seconds / seconds, 1),
+                "audio_bytes": audio_bytes,
+                "kbps": round(audio_bytes * 8 / total_seconds / 1000, 1),
+                "apkg_bytes": apkg_path.stat().st_size,
+            }
+            print(f"{name:<12} {seconds:7.2f}s  {stages[name]['realtime_factor']:7.1f}x realtime  "
+                  f"{stages[name]['kbps']:6.1f} kbps  apkg {stages[name]['apkg_bytes'] / 1024:9.0f} KiB")
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "encode",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"clips": args.clips, "seconds": args.seconds, "audio_seconds": round(total_seconds, 1)},
+        "results": {"encode": {"stages": stages}},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"encode_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+API key unlock benchmark: the security/latency trade-off of each KDF setting.
+
+For each KDF spec, measures the time to unlock the stored key with the PIN
+(what every "Generate Deck" paid before the credential session) and the
+memory the KDF needs, plus the cost of a request once the session is unlocked.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_kdf
+    python -m benchmarks.bench_kdf --kdf "scrypt:n=65536,r=8,p=1" --repeat 10
+"""
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+
+DEFAULT_SPECS = (
+    "pbkdf2:iterations=100000",
+    "pbkdf2:iterations=600000",
+    "scrypt:n=16384,r=8,p=1",
+    "scrypt:n=32768,r=8,p=1",
+    "scrypt:n=65536,r=8,p=1",
+    "scrypt:n=131072,r=8,p=1",
+)
+PIN = "0000"
+
+
+def kdf_memory_kb(spec: str) -> int:
+    from services.encryption_service import EncryptionService
+    name, params = EncryptionService.parse_kdf(spec)
+    if name == "scrypt":
+        return params.get("n", 2 ** 15) * params.get("r", 8) * 128 // 1024
+    return 0
+
+
+def bench_spec(spec: str, repeat: int) -> dict:
+    from services.credential_session_service import CredentialSessionService
+    from services.settings_service import AppSettings
+
+    with tempfile.TemporaryDirectory() as tmp_name:
+        base_dir = Path(tmp_name)
+        (base_dir / "keys.py").write_text('ENCRYPTED_API_KEY = ""\nSALT = ""\nIV = ""\n', encoding="utf-8")
+        settings = AppSettings(KEY_KDF=spec, CREDENTIAL_IDLE_TTL=3600)
+        session = CredentialSessionService(base_dir, settings)
+        session.store_api_key("sk-benchmark", PIN)
+
+        unlock = []
+        for _ in range(repeat):
+            session.lock()
+            start = time.perf_counter()
+            session.get_api_key(PIN)
+            unlock.append(time.perf_counter() - start)
+
+        cached = []
+        for _ in range(1000):
+            start = time.perf_counter()
+            session.get_api_key(PIN)
+            cached.append(time.perf_counter() - start)
+
+    return {
+        "seconds": round(statistics.median(unlock), 6),
+        "cached_seconds": round(statistics.median(cached), 9),
+        "kdf_memory_kb": kdf_memory_kb(spec),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kdf", nargs="+", default=list(DEFAULT_SPECS), help="KDF specs to measure")
+    parser.add_argument("--repeat", type=int, default=5, help="Unlocks per spec; the median is kept")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    stages = {}
+    for spec in args.kdf:
+        stages[spec] = bench_spec(spec, args.repeat)
+        r = stages[spec]
+        print(f"{spec:<28} unlock={r['seconds'] * 1000:8.1f} ms  "
+              f"unlocked={r['cached_seconds'] * 1e6:6.1f} us  memory={r['kdf_memory_kb'] // 1024} MiB")
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "kdf",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"repeat": args.repeat},
+        "results": {"kdf": {"stages": stages}},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"kdf_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
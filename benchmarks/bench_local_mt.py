@@ -0,0 +1,103 @@
+"""
+Local translation backend benchmark.
+
+Translates the synthetic corpus with LocalTranslationService and reports
+lines/s and load time for each combination of int8 quantization, CPU thread
+count and batch size. Without --model-dir a tiny random Marian model is built
+(see stubs.make_tiny_marian), which measures the plumbing and batching only;
+point --model-dir at a saved opus-mt-ja-en for real numbers.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_local_mt
+    python -m benchmarks.bench_local_mt --model-dir models/opus-mt-ja-en --lines 500 --threads 1 4
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+from benchmarks.corpus import make_corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", type=Path, default=None, help="Saved MarianMT model (default: tiny random model)")
+    parser.add_argument("--lines", type=int, default=200, help="Corpus lines to translate")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    from services.settings_service import AppSettings
+    from services.local_translation_service import LocalTranslationService
+    from services.text_manipulation_service import TextManipulationService
+
+    settings = AppSettings()
+    text_processor = TextManipulationService(None, settings)
+    lines = list(text_processor.iter_source_lines((make_corpus(args.lines, seed=0),)))
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp_name:
+        model_dir = args.model_dir
+        if model_dir is None:
+            from benchmarks.stubs import make_tiny_marian
+            model_dir = make_tiny_marian(Path(tmp_name) / "tiny_marian", lines)
+
+        for quantize in (False, True):
+            for threads in args.threads:
+                for batch_size in args.batch_sizes:
+                    settings = AppSettings(
+                        LOCAL_MT_MODEL_DIR=str(model_dir.resolve()),
+                        LOCAL_MT_QUANTIZE=quantize,
+                        LOCAL_MT_THREADS=threads,
+                        LOCAL_MT_BATCH_SIZE=batch_size,
+                        LOCAL_MT_MAX_LENGTH=64,
+                    )
+                    service = LocalTranslationService(Path(tmp_name), settings)
+                    start = time.perf_counter()
+                    service._load()
+                    load_seconds = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    service.translate(lines)
+                    seconds = time.perf_counter() - start
+
+                    name = f"{'int8' if quantize else 'fp32'}_t{threads}_b{batch_size}"
+                    stages[name] = {
+                        "seconds": round(seconds, 6),
+                        "load_seconds": round(load_seconds, 6),
+                        "lines_per_s": round(len(lines) / seconds, 2),
+                    }
+                    print(f"{name:<16} {stages[name]['lines_per_s']:8.1f} lines/s  load={load_seconds:.2f}s")
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "local_mt",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "model_dir": str(args.model_dir) if args.model_dir else "tiny-random",
+            "lines": len(lines),
+            "threads": args.threads,
+            "batch_sizes": args.batch_sizes,
+        },
+        "results": {"local_mt": {"stages": stages}},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"local_mt_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
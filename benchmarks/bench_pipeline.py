@@ -0,0 +1,242 @@
+"""
+End-to-end pipeline benchmark against local stub servers.
+
+Times each stage (split_lines, translation, generate_wavs, encode_audio,
+generate_anki_deck) and the whole pipeline for each corpus size, and records
+peak memory. Every corpus size runs in a fresh process so memory numbers do
+not bleed between sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 10 100 --repeat 3
+    python -m benchmarks.compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STAGES = ("split_lines", "translation", "generate_wavs", "encode_audio", "generate_anki_deck")
+BENCH_PIN = "0000"
+# Files the services read from BASE_DIR.
+BASE_FILES = ("settings.py", "prompt.txt", "version.py", "anki_style.txt", "kanji_index.bin", "prompt_compact.txt",
+              "prompt_words.txt", "prompt_compact_words.txt")
+
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+
+def peak_rss_kb():
+    """Process peak resident set size in KiB, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize // 1024
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class StageTimer:
+    """Collects wall time, Python heap peak and process peak RSS per stage."""
+
+    def __init__(self):
+        self.results = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            _, py_peak = tracemalloc.get_traced_memory()
+            self.results[name] = {
+                "seconds": round(seconds, 6),
+                "py_peak_kb": py_peak // 1024,
+                "peak_rss_kb": peak_rss_kb(),
+            }
+
+
+def _make_base_dir(tmp: Path) -> Path:
+    """Copy the files the services need into a throwaway BASE_DIR."""
+    base_dir = tmp / "base"
+    base_dir.mkdir()
+    for name in BASE_FILES:
+        shutil.copy2(REPO_DIR / name, base_dir / name)
+    # keys.py is written below with a benchmark-only key.
+    (base_dir / "keys.py").write_text('ENCRYPTED_API_KEY = ""\nSALT = ""\nIV = ""\n', encoding="utf-8")
+    return base_dir
+
+
+def run_size(n_lines: int, options: dict) -> dict:
+    """Run the whole pipeline once for one corpus size and return stage metrics."""
+    from benchmarks.corpus import make_corpus
+    from benchmarks.stubs import StubChatServer, StubVoicevoxServer
+
+    with tempfile.TemporaryDirectory() as tmp_name, \
+            StubVoicevoxServer(options["engine_overhead"], options["engine_per_char"]) as engine, \
+            StubChatServer(options["chat_overhead"], options["chat_per_char"]) as chat:
+        tmp = Path(tmp_name)
+        base_dir = _make_base_dir(tmp)
+        output_dir = tmp / "out"
+        os.environ["OPENAI_BASE_URL"] = chat.base_url
+
+        from services.settings_service import SettingsService
+        settings_service = SettingsService(base_dir)
+        settings = settings_service.load_settings()
+        settings.API_URL = "127.0.0.1"
+        settings.API_PORT = str(engine.port)
+        settings_service.encrypt_and_store_api_key("sk-benchmark", BENCH_PIN)
+
+        from services.pipeline_service import PipelineService
+        pipeline = PipelineService(base_dir, settings)
+
+        raw_text = make_corpus(n_lines, seed=options["seed"])
+        timer = StageTimer()
+        log = sys.stdout if options["verbose"] else open(os.devnull, "w", encoding="utf-8")
+
+        tracemalloc.start()
+        with contextlib.redirect_stdout(log), timer.stage("pipeline"):
+            with timer.stage("split_lines"):
+                lines = pipeline.preprocess(raw_text)
+            with timer.stage("translation"):
+                cards = pipeline.translate(lines, BENCH_PIN)
+            cards.media_dir = pipeline.workspaces.create("bench")
+            with timer.stage("generate_wavs"):
+                pipeline.tts_service.generate_wavs(cards)
+            with timer.stage("encode_audio"):
+                pipeline.tts_service.encode_audio(cards.media_dir, cards)
+            with timer.stage("generate_anki_deck"):
+                apkg_path = pipeline.package(cards, f"Benchmark {n_lines}", output_dir=str(output_dir))
+        tracemalloc.stop()
+
+        return {
+            "lines_in": n_lines,
+            "lines_unique": len(lines),
+            "items": {key: len(cards.by_kind(key)) for key in cards.keys},
+            "engine_requests": engine.request_count,
+            "chat_requests": chat.request_count,
+            "apkg_bytes": apkg_path.stat().st_size,
+            "stages": timer.results,
+        }
+
+
+def _best_of(runs: list[dict]) -> dict:
+    """Keep the fastest run per stage; memory is taken from the same run."""
+    best = dict(runs[0])
+    best["stages"] = {
+        name: min((run["stages"][name] for run in runs), key=lambda r: r["seconds"])
+        for name in runs[0]["stages"]
+    }
+    best["repeat"] = len(runs)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="Corpus sizes in lines")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine-overhead", type=float, default=0.0, help="Stub engine seconds per request")
+    parser.add_argument("--engine-per-char", type=float, default=0.0, help="Stub engine seconds per character")
+    parser.add_argument("--chat-overhead", type=float, default=0.0, help="Stub chat seconds per request")
+    parser.add_argument("--chat-per-char", type=float, default=0.0, help="Stub chat seconds per output character")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    parser.add_argument("--verbose", action="store_true", help="Show service logging")
+    args = parser.parse_args(argv)
+
+    from benchmarks.corpus import SIZES
+    sizes = args.sizes or list(SIZES)
+    options = {
+        "seed": args.seed,
+        "engine_overhead": args.engine_overhead,
+        "engine_per_char": args.engine_per_char,
+        "chat_overhead": args.chat_overhead,
+        "chat_per_char": args.chat_per_char,
+        "verbose": args.verbose,
+    }
+
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    for size in sizes:
+        runs = []
+        for _ in range(args.repeat):
+            with ctx.Pool(1, maxtasksperchild=1) as pool:
+                runs.append(pool.apply(run_size, (size, options)))
+        results[str(size)] = _best_of(runs)
+        stages = results[str(size)]["stages"]
+        print(f"{size:>6} lines  " + "  ".join(
+            f"{name}={stages[name]['seconds']:.3f}s" for name in (*STAGES, "pipeline")
+        ))
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "pipeline",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {k: v for k, v in options.items() if k != "verbose"},
+        "results": results,
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"pipeline_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
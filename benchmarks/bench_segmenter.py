@@ -0,0 +1,122 @@
+"""
+Sentence segmentation throughput benchmark.
+
+Compares the original whole-text approach (re.split, join, set, sorted)
+with the streaming segmenter reading a UTF-8 file in chunks, and reports
+MB/s of input and peak Python heap for each.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_segmenter
+    python -m benchmarks.bench_segmenter --megabytes 1 10 50
+"""
+import argparse
+import json
+import platform
+import re
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+from benchmarks.corpus import make_corpus
+
+
+def whole_text_baseline(text: str) -> list[str]:
+    """The pre-streaming split_lines -> remove_non_source_language -> extract_unique_lines."""
+    parts = re.split(r'[\.。！？!?]\s*|\r?\n+', text)
+    joined = "\n".join(p.strip() for p in parts if p.strip())
+    joined = re.sub(r"[^　-〿぀-ゟ゠-ヿ一-鿿\n]+", "", joined)
+    return sorted(set(filter(None, joined.splitlines())))
+
+
+def make_file(directory: Path, megabytes: float) -> Path:
+    """Write a corpus of roughly the requested size (UTF-8) and return its path."""
+    target = int(megabytes * 1024 * 1024)
+    path = directory / f"corpus_{megabytes}mb.txt"
+    written, seed = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            block = make_corpus(2000, seed=seed) + "\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+            seed += 1
+    return path
+
+
+def measure(fn) -> tuple[float, int, int]:
+    """
+    Return (seconds, peak heap KiB, lines produced) for fn(). Time and
+    memory come from separate runs so tracemalloc does not skew the timing.
+    """
+    start = time.perf_counter()
+    n_lines = fn()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak // 1024, n_lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    from services.settings_service import AppSettings
+    from services.text_manipulation_service import TextManipulationService
+    text_processor = TextManipulationService(None, AppSettings())
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_name:
+        for megabytes in args.megabytes:
+            path = make_file(Path(tmp_name), megabytes)
+            size_mb = path.stat().st_size / (1024 * 1024)
+
+            def baseline():
+                with open(path, encoding="utf-8") as f:
+                    return len(whole_text_baseline(f.read()))
+
+            def streaming():
+                with open(path, encoding="utf-8") as f:
+                    return sum(1 for _ in text_processor.iter_source_lines(text_processor.iter_chunks(f)))
+
+            stages = {}
+            for name, fn in (("whole_text", baseline), ("streaming", streaming)):
+                seconds, peak_kb, n_lines = measure(fn)
+                stages[name] = {
+                    "seconds": round(seconds, 6),
+                    "mb_per_s": round(size_mb / seconds, 2),
+                    "py_peak_kb": peak_kb,
+                    "lines": n_lines,
+                }
+                print(f"{size_mb:7.1f} MB  {name:<11} {stages[name]['mb_per_s']:8.2f} MB/s  "
+                      f"peak {peak_kb / 1024:8.1f} MiB  {n_lines} lines")
+            results[f"{megabytes}MB"] = {"stages": stages}
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "segmenter",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"megabytes": args.megabytes},
+        "results": results,
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"segmenter_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
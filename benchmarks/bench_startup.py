@@ -0,0 +1,148 @@
+"""
+Startup-time benchmark.
+
+Measures, in fresh interpreter processes, the wall time from launch to:
+- cli_ready:    the CLI has loaded settings and built its pipeline
+- window_paint: the main window has received its first paint event
+                (Qt "offscreen" platform, so no display is needed)
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 20
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import REPO_DIR, RESULTS_DIR, git_commit
+
+# Files MainWindow and the services read from BASE_DIR.
+BASE_FILES = (
+    "settings.py", "keys.py", "prompt.txt", "prompt_compact.txt", "version.py", "anki_style.txt",
+    "TERMS_AND_CONDITIONS.txt", "kanji_index.bin", "icons",
+)
+
+CLI_CHILD = """
+import sys
+from pathlib import Path
+sys.path.insert(0, {repo!r})
+import cli
+cli.load(Path({base!r}))
+print("READY", flush=True)
+"""
+
+WINDOW_CHILD = """
+import sys
+from pathlib import Path
+sys.path.insert(0, {repo!r})
+from PySide6.QtCore import QObject, QEvent
+from PySide6.QtWidgets import QApplication
+import main
+main.BASE_DIR = Path({base!r})
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print("READY", flush=True)
+            QApplication.instance().exit(0)
+        return False
+
+app = QApplication(sys.argv)
+first_paint = FirstPaint()
+app.installEventFilter(first_paint)
+window = main.MainWindow()
+window.resize(window.settings_data.WINDOW_LENGTH, window.settings_data.WINDOW_WIDTH)
+window.show()
+app.exec()
+window.cleanup()
+"""
+
+
+def _make_base_dir(tmp: Path) -> Path:
+    base_dir = tmp / "base"
+    base_dir.mkdir()
+    for name in BASE_FILES:
+        src = REPO_DIR / name
+        if src.is_dir():
+            shutil.copytree(src, base_dir / name)
+        else:
+            shutil.copy2(src, base_dir / name)
+    return base_dir
+
+
+def time_child(code: str, timeout: float = 60.0) -> float:
+    """Launch a fresh interpreter and return seconds until it prints READY."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env,
+    )
+    try:
+        for line in proc.stdout:
+            if line.strip() == "READY":
+                elapsed = time.perf_counter() - start
+                break
+        else:
+            raise RuntimeError("child exited before it was ready")
+    finally:
+        proc.stdout.close()
+        proc.wait(timeout=timeout)
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="Launches per target; the median is kept")
+    parser.add_argument("--skip-window", action="store_true", help="Only measure the CLI")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp_name:
+        base_dir = _make_base_dir(Path(tmp_name))
+        targets = {"cli_ready": CLI_CHILD}
+        if not args.skip_window:
+            targets["window_paint"] = WINDOW_CHILD
+
+        for name, template in targets.items():
+            code = template.format(repo=str(REPO_DIR), base=str(base_dir))
+            time_child(code)  # warm the OS file cache
+            samples = [time_child(code) for _ in range(args.repeat)]
+            stages[name] = {
+                "seconds": round(statistics.median(samples), 6),
+                "min_seconds": round(min(samples), 6),
+            }
+            print(f"{name:<14} median={stages[name]['seconds']:.3f}s  min={stages[name]['min_seconds']:.3f}s")
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "startup",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"repeat": args.repeat},
+        "results": {"startup": {"stages": stages}},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"startup_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
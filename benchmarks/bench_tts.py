@@ -0,0 +1,124 @@
+"""
+Speech synthesis benchmark against the stub VOICEVOX engine.
+
+Runs generate_wavs over short word clips and full lines from the synthetic
+corpus with one /synthesis request per clip and with batched
+/multi_synthesis requests, at several per-request engine overheads, and
+reports time, engine requests and clips/s. A second set times very long
+lines synthesized whole and split into chunks synthesized in parallel,
+and a last run adds slowed clips, synthesized from the cached audio queries.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_tts
+    python -m benchmarks.bench_tts --words 1000 --lines 100 --overheads 0 0.01
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+from benchmarks.corpus import make_corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=500, help="Short word clips")
+    parser.add_argument("--lines", type=int, default=50, help="Full line clips")
+    parser.add_argument("--overheads", type=float, nargs="+", default=[0.0, 0.005, 0.02],
+                        help="Engine seconds per request")
+    parser.add_argument("--per-char", type=float, default=0.0005, help="Engine seconds per character")
+    parser.add_argument("--long-lines", type=int, default=10, help="Very long lines for the chunking runs")
+    parser.add_argument("--long-chars", type=int, default=200, help="Characters per long line")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    from benchmarks.stubs import StubVoicevoxServer
+    from services.card_store_service import CardStore
+    from services.settings_service import AppSettings
+    from services.text_manipulation_service import TextManipulationService
+    from services.tts_service import TextToSpeechService
+
+    settings = AppSettings()
+    text_processor = TextManipulationService(None, settings)
+    lines = list(text_processor.iter_source_lines((make_corpus(args.lines * 2, seed=0),)))[:args.lines]
+    words = list(dict.fromkeys(
+        line[i:i + 2] for line in text_processor.iter_source_lines((make_corpus(args.words * 2, seed=1),))
+        for i in range(0, len(line) - 1, 3)
+    ))[:args.words]
+    data = {
+        "L": [[line, "", ""] for line in lines],
+        "W": [[word, "", word] for word in words],
+    }
+
+    long_text = "、".join(lines * (args.long_chars // 10 + 1))
+    long_data = {"L": [[long_text[i:i + args.long_chars] + str(i), "", ""] for i in range(args.long_lines)]}
+
+    stages = {}
+
+    def run(name, rows, overhead, **overrides):
+        with tempfile.TemporaryDirectory() as tmp_name, StubVoicevoxServer(overhead, args.per_char) as engine:
+            settings = AppSettings(API_PORT=str(engine.port), **overrides)
+            tts = TextToSpeechService(Path(tmp_name), settings)
+            cards = CardStore.from_data(rows, ["L", "W"])
+            cards.media_dir = Path(tmp_name)
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w", encoding="utf-8")):
+                tts.generate_wavs(cards)
+            seconds = time.perf_counter() - start
+
+            clips = sum(len(card.media()) for card in cards)
+            stages[name] = {
+                "seconds": round(seconds, 6),
+                "clips": clips,
+                "engine_requests": engine.request_count,
+                "clips_per_s": round(clips / seconds, 2),
+            }
+            print(f"{name:<16} {seconds:7.2f}s  {engine.request_count:5d} requests  "
+                  f"{stages[name]['clips_per_s']:8.1f} clips/s")
+
+    for overhead in args.overheads:
+        for multi in (False, True):
+            name = f"{'multi' if multi else 'single'}_o{overhead * 1000:g}ms"
+            run(name, data, overhead, MULTI_SYNTHESIS_ENABLED=multi)
+
+    for max_chunk in (0, 60, 30):
+        run(f"long_chunk{max_chunk}", long_data, args.overheads[-1], TTS_MAX_CHUNK_MORAS=max_chunk)
+
+    run(f"multi_slow_o{args.overheads[-1] * 1000:g}ms", data, args.overheads[-1], SLOW_AUDIO_ENABLED=True)
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "tts",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "words": len(words),
+            "lines": len(lines),
+            "overheads": args.overheads,
+            "per_char": args.per_char,
+            "long_lines": args.long_lines,
+            "long_chars": args.long_chars,
+        },
+        "results": {"tts": {"stages": stages}},
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"tts_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Translation response format benchmark: one-line JSON (prompt.txt) against
+compact tab-separated rows (prompt_compact.txt).
+
+For each corpus size the same L/W payload (with English of realistic length)
+is rendered in both formats and measured in tokens (tiktoken's o200k_base
+when its encoding can be loaded, otherwise characters and UTF-8 bytes only),
+plus parse time and how many L rows survive a reply cut off at 50% and 90%.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_wire_format
+    python -m benchmarks.bench_wire_format --sizes 100 1000
+"""
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit
+from benchmarks.corpus import make_corpus
+from benchmarks.stubs import make_translation, render_rows
+
+_ENGLISH = (
+    "the a child cat mother friend someone sky sea dream flower song letter future light promise "
+    "word cherry star saw waiting searching never forget believe sang drew protect in at town "
+    "school station night window mountain room hey look come on"
+).split()
+
+
+def _english(rng: random.Random, n_chars: int) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < n_chars:
+        words.append(rng.choice(_ENGLISH))
+    return " ".join(words).capitalize()
+
+
+def make_payload(lines: list[str]) -> dict:
+    """make_translation with English about twice the length of the Japanese."""
+    rng = random.Random(0)
+    data = make_translation(lines)
+    for rows in data.values():
+        for row in rows:
+            row[1] = _english(rng, 2 * len(row[0]) + 4)
+    return data
+
+
+def _token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception as e:
+        print(f"tiktoken unavailable ({type(e).__name__}); reporting characters and bytes only")
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    from services.settings_service import AppSettings
+    from services.response_parser_service import ResponseParserService
+    from services.text_manipulation_service import TextManipulationService
+
+    count_tokens = _token_counter()
+    text_processor = TextManipulationService(None, AppSettings())
+    results = {}
+    for size in args.sizes:
+        lines = list(text_processor.iter_source_lines((make_corpus(size, seed=0),)))
+        data = make_payload(lines)
+        rendered = {
+            "json": json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+            "tsv": render_rows(data),
+        }
+
+        stages = {}
+        for fmt, content in rendered.items():
+            response_parser = ResponseParserService(None, AppSettings(RESPONSE_FORMAT=fmt))
+            start = time.perf_counter()
+            response_parser.parse(content)
+            seconds = time.perf_counter() - start
+
+            stage = {
+                "seconds": round(seconds, 6),
+                "chars": len(content),
+                "bytes": len(content.encode("utf-8")),
+            }
+            if count_tokens:
+                stage["tokens"] = count_tokens(content)
+            for fraction in (0.5, 0.9):
+                try:
+                    recovered = len(response_parser.parse(content[:int(len(content) * fraction)], truncated=True).get("L", []))
+                except ValueError:
+                    recovered = 0
+                stage[f"rows_at_{int(fraction * 100)}pct"] = recovered
+            stages[fmt] = stage
+
+        measure = "tokens" if count_tokens else "chars"
+        saving = 1 - stages["tsv"][measure] / stages["json"][measure]
+        print(f"{size:>6} lines  json={stages['json'][measure]} {measure}  tsv={stages['tsv'][measure]} {measure}  "
+              f"saving={saving:.1%}  rows recovered at 50%: json={stages['json']['rows_at_50pct']} "
+              f"tsv={stages['tsv']['rows_at_50pct']}/{len(data['L'])}")
+        results[str(size)] = {"stages": stages}
+
+    commit = git_commit()
+    report = {
+        "schema": 1,
+        "benchmark": "wire_format",
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {"sizes": args.sizes, "tokenizer": "o200k_base" if count_tokens else None},
+        "results": results,
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"wire_format_{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
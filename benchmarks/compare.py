@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Usage:
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 0.10]
+
+Exits with status 1 if any stage got slower or used more memory than the
+threshold allows, so it can gate a commit or CI job.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Metric name -> minimum absolute change worth reporting (noise floor).
+METRICS = {
+    "seconds": 0.005,
+    "py_peak_kb": 256,
+    "peak_rss_kb": 1024,
+}
+
+
+def _rows(old: dict, new: dict):
+    for size, new_run in new["results"].items():
+        old_run = old["results"].get(size)
+        if not old_run:
+            continue
+        for stage, new_metrics in new_run["stages"].items():
+            old_metrics = old_run["stages"].get(stage)
+            if not old_metrics:
+                continue
+            for metric, floor in METRICS.items():
+                before, after = old_metrics.get(metric), new_metrics.get(metric)
+                if before is None or after is None:
+                    continue
+                yield size, stage, metric, before, after, floor
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """Print a comparison table and return the regression descriptions."""
+    regressions = []
+    print(f"{'size':>6}  {'stage':<20} {'metric':<12} {'old':>12} {'new':>12} {'change':>8}")
+    for size, stage, metric, before, after, floor in _rows(old, new):
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if after - before > floor and change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{size} lines / {stage} / {metric}: {before} -> {after} ({change:+.1%})")
+        print(f"{size:>6}  {stage:<20} {metric:<12} {before:>12} {after:>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative increase (default 0.10)")
+    args = parser.parse_args(argv)
+
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    if old.get("benchmark") != new.get("benchmark"):
+        sys.exit(f"Cannot compare '{old.get('benchmark')}' results with '{new.get('benchmark')}' results.")
+
+    print(f"old: {old.get('commit')} ({old.get('timestamp')})  new: {new.get('commit')} ({new.get('timestamp')})")
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Deterministic synthetic Japanese corpora for benchmarks.
+"""
+import random
+
+SIZES = (10, 100, 1_000, 10_000)
+
+_SUBJECTS = ["私", "僕", "君", "彼女", "先生", "友達", "猫", "子供たち", "母", "誰か"]
+_OBJECTS = ["空", "海", "夢", "花", "歌", "手紙", "未来", "光", "約束", "言葉", "桜", "星"]
+_PLACES = ["東京で", "学校で", "駅の前で", "夜の街で", "窓の外で", "山の上で", "この部屋で"]
+_VERBS = ["見た", "待っている", "探している", "忘れない", "信じてる", "歌った", "描いた", "守りたい"]
+_INTERJECTIONS = ["ああ", "ねえ", "ほら", "さあ", "ラララ", "オーイェー"]
+_ENDINGS = ["。", "！", "？", "", "よ。", "ね。"]
+
+
+def make_line(rng: random.Random) -> str:
+    parts = []
+    if rng.random() < 0.2:
+        parts.append(rng.choice(_INTERJECTIONS) + "、")
+    if rng.random() < 0.5:
+        parts.append(rng.choice(_PLACES))
+    parts.append(rng.choice(_SUBJECTS) + "は")
+    parts.append(rng.choice(_OBJECTS) + "を")
+    parts.append(rng.choice(_VERBS))
+    line = "".join(parts)
+    if rng.random() < 0.1:
+        line = f"「{line}」と言った"
+    return line + rng.choice(_ENDINGS)
+
+
+def make_corpus(n_lines: int, seed: int = 0) -> str:
+    """
+    Build n_lines of newline-separated text. About 5% of lines repeat an
+    earlier one so de-duplication has something to do.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n_lines):
+        if lines and rng.random() < 0.05:
+            lines.append(rng.choice(lines))
+        else:
+            lines.append(make_line(rng))
+    return "\n".join(lines)
@@ -0,0 +1,516 @@
+"""
+Local stand-ins for the external services used by the pipeline, so benchmarks
+run offline and produce repeatable numbers.
+
+- StubVoicevoxServer implements /audio_query, /synthesis and /multi_synthesis.
+- StubChatServer implements the OpenAI /v1/chat/completions endpoint.
+- StubBatchServer adds the /v1/files and /v1/batches endpoints of the
+  OpenAI Batch API.
+
+Both run on 127.0.0.1 in a background thread and can model a fixed
+per-request overhead plus a per-character cost. With a capacity, requests
+beyond that many in flight are answered with 429 (overload="reject", like
+a rate limit) or share the capacity and take longer (overload="slow", like
+a CPU-bound engine).
+"""
+import io
+import itertools
+import json
+import math
+import re
+import struct
+import threading
+import time
+import wave
+import zipfile
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SAMPLE_RATE = 24000
+SECONDS_PER_MORA = 0.12
+PUNCTUATION_RE = re.compile(r"[、。！？!?,]")
+
+# One second of a 220 Hz tone, sliced and repeated to build clips quickly.
+_TONE = b"".join(
+    struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)))
+    for i in range(SAMPLE_RATE)
+)
+
+
+def make_wav(seconds: float, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Build a mono 16-bit WAV of the given length."""
+    n_bytes = int(seconds * sample_rate) * 2
+    pcm = (_TONE * (n_bytes // len(_TONE) + 1))[:n_bytes]
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buf.getvalue()
+
+
+def make_audio_query(text: str) -> dict:
+    """Build a VOICEVOX-shaped audio query with one mora per character."""
+    accent_phrases = []
+    for phrase in PUNCTUATION_RE.split(text):
+        if not phrase:
+            continue
+        moras = [
+            {
+                "text": ch,
+                "consonant": None,
+                "consonant_length": None,
+                "vowel": "a",
+                "vowel_length": SECONDS_PER_MORA,
+                "pitch": 5.5,
+            }
+            for ch in phrase
+        ]
+        accent_phrases.append({
+            "moras": moras,
+            "accent": 1,
+            "pause_mora": None,
+            "is_interrogative": False,
+        })
+    return {
+        "accent_phrases": accent_phrases,
+        "speedScale": 1.0,
+        "pitchScale": 0.0,
+        "intonationScale": 1.0,
+        "volumeScale": 1.0,
+        "prePhonemeLength": 0.1,
+        "postPhonemeLength": 0.1,
+        "outputSamplingRate": SAMPLE_RATE,
+        "outputStereo": False,
+        "kana": text,
+    }
+
+
+def query_moras(audio_query: dict) -> int:
+    """Morae in a query; synthesis cost is modelled per mora (one per character of text)."""
+    return sum(len(p["moras"]) for p in audio_query.get("accent_phrases", []))
+
+
+def query_duration(audio_query: dict) -> float:
+    """Length in seconds the engine would render for this query."""
+    moras = query_moras(audio_query)
+    speed = audio_query.get("speedScale", 1.0) or 1.0
+    return (
+        moras * SECONDS_PER_MORA / speed
+        + audio_query.get("prePhonemeLength", 0.1)
+        + audio_query.get("postPhonemeLength", 0.1)
+    )
+
+
+class _StubServer:
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, request_overhead: float = 0.0, per_char_cost: float = 0.0, capacity: int = 0, overload: str = "reject"):
+        self.request_overhead = request_overhead
+        self.per_char_cost = per_char_cost
+        self.capacity = capacity
+        self.overload = overload
+        self.request_count = 0
+        self.rejected_count = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        handler = type("Handler", (self.handler_class,), {"stub": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def count_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def admit(self) -> bool:
+        """Start a request; False when it is over capacity and should get a 429."""
+        with self._lock:
+            if self.capacity and self.overload == "reject" and self.in_flight >= self.capacity:
+                self.rejected_count += 1
+                return False
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def finish(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def simulate_cost(self, n_chars: int):
+        delay = self.request_overhead + self.per_char_cost * n_chars
+        if self.capacity and self.overload == "slow":
+            delay *= max(1.0, self.in_flight / self.capacity)
+        if delay > 0:
+            time.sleep(delay)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    stub = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status: int = 200):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def do_POST(self):
+        self.stub.count_request()
+        if not self.stub.admit():
+            self._read_body()
+            self._send_json({"error": {"message": "Too many requests", "type": "rate_limit_exceeded"}}, status=429)
+            return
+        try:
+            self.handle_post()
+        finally:
+            self.stub.finish()
+
+    def handle_post(self):
+        self._send_json({"detail": "Not Found"}, status=404)
+
+
+class _VoicevoxHandler(_Handler):
+    def do_GET(self):
+        if urlparse(self.path).path == "/version":
+            self._send_json("0.0.0-stub")
+        else:
+            self._send_json({"detail": "Not Found"}, status=404)
+
+    def handle_post(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        body = self._read_body()
+
+        if url.path == "/audio_query":
+            text = params.get("text", [""])[0]
+            self.stub.simulate_cost(len(text))
+            self._send_json(make_audio_query(text))
+        elif url.path == "/synthesis":
+            audio_query = json.loads(body or b"{}")
+            self.stub.simulate_cost(query_moras(audio_query))
+            self._send(200, make_wav(query_duration(audio_query)), "audio/wav")
+        elif url.path == "/multi_synthesis" and self.stub.multi_synthesis:
+            audio_queries = json.loads(body or b"[]")
+            self.stub.simulate_cost(sum(query_moras(q) for q in audio_queries))
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as archive:
+                for i, audio_query in enumerate(audio_queries, start=1):
+                    archive.writestr(f"{i:03d}.wav", make_wav(query_duration(audio_query)))
+            self._send(200, buf.getvalue(), "application/zip")
+        else:
+            self._send_json({"detail": "Not Found"}, status=404)
+
+
+class StubVoicevoxServer(_StubServer):
+    """
+    Minimal VOICEVOX engine: /audio_query, /synthesis and /multi_synthesis.
+    A multi-synthesis request pays the per-request overhead once for all its
+    clips. multi_synthesis=False answers 404 there, like an older engine.
+    """
+    handler_class = _VoicevoxHandler
+
+    def __init__(self, request_overhead: float = 0.0, per_char_cost: float = 0.0, multi_synthesis: bool = True, **capacity):
+        super().__init__(request_overhead, per_char_cost, **capacity)
+        self.multi_synthesis = multi_synthesis
+
+
+def make_translation(lines: list[str], words: list[str] = None) -> dict:
+    """
+    Build an L/W/K payload in the shape prompt.txt asks for. Given words (the
+    #WORDS section of a words prompt), W glosses exactly those.
+    """
+    data = {"L": [], "W": []}
+    seen_words = set()
+    if words is not None:
+        data["W"] = [[word, f"word {n + 1}"] for n, word in enumerate(words)]
+    for n, line in enumerate(lines):
+        data["L"].append([line, f"translation {n}"])
+        if words is not None:
+            continue
+        for word in PUNCTUATION_RE.split(line):
+            word = word[:4]
+            if word and word not in seen_words:
+                seen_words.add(word)
+                data["W"].append([word, f"word {len(seen_words)}"])
+    return data
+
+
+def render_rows(data: dict) -> str:
+    """The compact tab-separated form of an L/W payload (prompt_compact.txt)."""
+    out = []
+    for key, rows in data.items():
+        out.append(f"#{key}")
+        out.extend("\t".join(row) for row in rows)
+    return "\n".join(out)
+
+
+def make_chat_completion(request: dict, max_completion_chars: int = None, completion_id: str = "chatcmpl-stub") -> dict:
+    """Answer a chat completions request body with make_translation of its lines."""
+    user_messages = [m["content"] for m in request.get("messages", []) if m.get("role") == "user"]
+    system = "".join(m["content"] for m in request.get("messages", []) if m.get("role") == "system")
+    lines = [l for l in "\n".join(user_messages).splitlines() if l]
+    words = None
+    if "#WORDS" in lines:
+        marker = lines.index("#WORDS")
+        lines, words = lines[:marker], lines[marker + 1:]
+    data = make_translation(lines, words)
+    if "#L" in system:
+        content = render_rows(data)
+    else:
+        content = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    finish_reason = "stop"
+    if max_completion_chars is not None and len(content) > max_completion_chars:
+        content, finish_reason = content[:max_completion_chars], "length"
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": finish_reason,
+        }],
+        "usage": {
+            "prompt_tokens": sum(len(m) for m in user_messages),
+            "completion_tokens": len(content),
+            "total_tokens": sum(len(m) for m in user_messages) + len(content),
+        },
+    }
+
+
+class _ChatHandler(_Handler):
+    def handle_post(self):
+        url = urlparse(self.path)
+        if not url.path.endswith("/chat/completions"):
+            self._send_json({"error": {"message": "Not Found"}}, status=404)
+            return
+
+        request = json.loads(self._read_body() or b"{}")
+        completion = make_chat_completion(
+            request, self.stub.max_completion_chars, completion_id=f"chatcmpl-stub-{self.stub.request_count}"
+        )
+        self.stub.simulate_cost(len(completion["choices"][0]["message"]["content"]))
+        self._send_json(completion)
+
+
+class StubChatServer(_StubServer):
+    """
+    Minimal OpenAI-compatible chat completions backend. Answers in the
+    compact row format when the system prompt uses #L markers, else JSON.
+    With max_completion_chars set, longer replies are cut off there and
+    reported with finish_reason "length", like a model hitting max_tokens.
+    """
+    handler_class = _ChatHandler
+
+    def __init__(self, request_overhead: float = 0.0, per_char_cost: float = 0.0, max_completion_chars: int = None, **capacity):
+        super().__init__(request_overhead, per_char_cost, **capacity)
+        self.max_completion_chars = max_completion_chars
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+
+class _BatchHandler(_ChatHandler):
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path.endswith("/files"):
+            self.stub.count_request()
+            form = BytesParser(policy=policy.HTTP).parsebytes(
+                b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self._read_body()
+            )
+            upload = next(part for part in form.iter_parts() if part.get_filename())
+            self._send_json(self.stub.add_file(upload.get_payload(decode=True), upload.get_filename()))
+        elif path.endswith("/batches"):
+            self.stub.count_request()
+            request = json.loads(self._read_body() or b"{}")
+            self._send_json(self.stub.create_batch(request["input_file_id"], request["endpoint"]))
+        else:
+            super().do_POST()
+
+    def do_GET(self):
+        self.stub.count_request()
+        parts = urlparse(self.path).path.rstrip("/").split("/")
+        if parts[-2:-1] == ["batches"]:
+            batch = self.stub.retrieve_batch(parts[-1])
+            if batch is None:
+                self._send_json({"error": {"message": "Service Unavailable"}}, status=503)
+            else:
+                self._send_json(batch)
+        elif parts[-1] == "content" and parts[-3] == "files":
+            self._send(200, self.stub.files[parts[-2]], "application/octet-stream")
+        else:
+            self._send_json({"error": {"message": "Not Found"}}, status=404)
+
+
+class StubBatchServer(StubChatServer):
+    """
+    StubChatServer plus the OpenAI Batch API: file upload, batch creation,
+    status polling and output download. A batch stays "in_progress" for
+    batch_seconds after it is created, then completes with one chat
+    completion per request line. The first failing_polls status checks
+    answer 503, and requests whose custom_id is in failed_requests get an
+    error result, to exercise retries and fallbacks.
+    """
+    handler_class = _BatchHandler
+
+    def __init__(
+        self,
+        batch_seconds: float = 0.0,
+        failing_polls: int = 0,
+        failed_requests: tuple = (),
+        max_completion_chars: int = None,
+    ):
+        super().__init__(max_completion_chars=max_completion_chars)
+        self.batch_seconds = batch_seconds
+        self.failing_polls = failing_polls
+        self.failed_requests = set(failed_requests)
+        self.files = {}
+        self.batches = {}
+        self._ids = itertools.count(1)
+
+    def add_file(self, content: bytes, filename: str) -> dict:
+        file_id = f"file-stub-{next(self._ids)}"
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": "batch",
+            "status": "processed",
+        }
+
+    def create_batch(self, input_file_id: str, endpoint: str) -> dict:
+        requests = [json.loads(line) for line in self.files[input_file_id].splitlines() if line.strip()]
+        batch = {
+            "id": f"batch-stub-{next(self._ids)}",
+            "object": "batch",
+            "endpoint": endpoint,
+            "input_file_id": input_file_id,
+            "completion_window": "24h",
+            "status": "in_progress",
+            "output_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {"total": len(requests), "completed": 0, "failed": 0},
+        }
+        self.batches[batch["id"]] = (batch, requests, time.monotonic())
+        return batch
+
+    def retrieve_batch(self, batch_id: str) -> dict | None:
+        with self._lock:
+            if self.failing_polls > 0:
+                self.failing_polls -= 1
+                return None
+            batch, requests, created = self.batches[batch_id]
+            if batch["status"] == "in_progress" and time.monotonic() - created >= self.batch_seconds:
+                self._finish(batch, requests)
+            return batch
+
+    def _finish(self, batch: dict, requests: list[dict]):
+        results = []
+        for request in requests:
+            custom_id = request["custom_id"]
+            if custom_id in self.failed_requests:
+                response = {"status_code": 500, "body": {"error": {"message": "stub failure"}}}
+                batch["request_counts"]["failed"] += 1
+            else:
+                body = make_chat_completion(request["body"], self.max_completion_chars)
+                response = {"status_code": 200, "body": body}
+                batch["request_counts"]["completed"] += 1
+            results.append({"id": f"req-{custom_id}", "custom_id": custom_id, "response": response, "error": None})
+
+        output = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results).encode("utf-8")
+        batch["output_file_id"] = self.add_file(output, "output.jsonl")["id"]
+        batch["status"] = "completed"
+
+
+def make_tiny_marian(model_dir, corpus_lines: list[str], vocab_size: int = 400, seed: int = 0):
+    """
+    Save a randomly initialised, very small MarianMT model and tokenizer to
+    model_dir, for exercising LocalTranslationService without downloading a
+    real model. The output is noise; only speed and plumbing are meaningful.
+    Needs torch, transformers and sentencepiece.
+    """
+    import io as _io
+    from pathlib import Path
+
+    import sentencepiece
+    import torch
+    from transformers import MarianConfig, MarianMTModel
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    spm = _io.BytesIO()
+    sentencepiece.SentencePieceTrainer.train(
+        sentence_iterator=iter(corpus_lines + ["translation of a line"] * 10),
+        model_writer=spm,
+        vocab_size=vocab_size,
+        character_coverage=1.0,
+        hard_vocab_limit=False,
+    )
+    for name in ("source.spm", "target.spm"):
+        (model_dir / name).write_bytes(spm.getvalue())
+
+    processor = sentencepiece.SentencePieceProcessor(model_proto=spm.getvalue())
+    vocab = {processor.id_to_piece(i): i for i in range(processor.get_piece_size())}
+    vocab["<pad>"] = len(vocab)
+    (model_dir / "vocab.json").write_text(json.dumps(vocab, ensure_ascii=False), encoding="utf-8")
+    (model_dir / "tokenizer_config.json").write_text(
+        json.dumps({"source_lang": "ja", "target_lang": "en"}), encoding="utf-8"
+    )
+
+    torch.manual_seed(seed)
+    config = MarianConfig(
+        vocab_size=len(vocab),
+        d_model=64,
+        encoder_layers=2,
+        decoder_layers=2,
+        encoder_attention_heads=4,
+        decoder_attention_heads=4,
+        encoder_ffn_dim=128,
+        decoder_ffn_dim=128,
+        max_position_embeddings=512,
+        pad_token_id=vocab["<pad>"],
+        eos_token_id=vocab["</s>"],
+        decoder_start_token_id=vocab["<pad>"],
+    )
+    MarianMTModel(config).save_pretrained(model_dir)
+    return model_dir
@@ -0,0 +1,103 @@
+"""
+Command-line entry point: build a deck from a text file without the window.
+
+    python cli.py lyrics.txt --title "My Song"
+    python cli.py lyrics.txt --title "My Song" --profile
+    python cli.py episode01.srt --title "Episode 1"
+    python cli.py novel.epub --title "Novel" --batch
+    python cli.py songs/*.txt --title "Album"
+    python cli.py texts/ --watch
+"""
+import argparse
+import getpass
+import sys
+from pathlib import Path
+
+from services.settings_service import SettingsService
+from services.pipeline_service import PipelineService
+from services.watch_service import WatchService
+
+BASE_DIR = Path(getattr(sys, "_MEIPASS", Path(__file__).parent))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate an Anki deck from a Japanese text file.")
+    parser.add_argument("inputs", type=Path, nargs="+", metavar="input",
+                        help="Text (UTF-8 or Shift-JIS), .srt/.ass subtitle or .epub file to translate, or a folder with --watch."
+                             " Several files go into one package, one deck per file named after it")
+    parser.add_argument("--title", help="Deck title, or the package title for several files (required unless --watch)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep one deck per file in the input folder up to date until Ctrl+C (deck title = file name)")
+    parser.add_argument("--output", default=None, help="Output folder (default: the one set in the app)")
+    parser.add_argument("--pin", default=None, help="PIN for the stored API key (prompted if omitted)")
+    parser.add_argument("--start-engine", action="store_true",
+                        help="Launch the VOICEVOX engine from settings instead of using a running one")
+    parser.add_argument("--batch", action="store_true",
+                        help="Translate through the OpenAI Batch API (cheaper, can take hours; rerun to resume)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile/tracemalloc bundle next to the package")
+    args = parser.parse_args(argv)
+    if not args.watch and not args.title:
+        parser.error("--title is required")
+    if args.watch and len(args.inputs) > 1:
+        parser.error("--watch takes one folder")
+    args.input = args.inputs[0]
+    return args
+
+
+def load(base_dir: Path, profile: bool = None, batch: bool = None):
+    """Load settings once and build the pipeline that shares them."""
+    settings_service = SettingsService(base_dir)
+    settings = settings_service.load_settings()
+    pipeline = PipelineService(base_dir, settings, credentials=settings_service.credentials, profile=profile, batch=batch)
+    return settings_service, pipeline
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    settings_service, pipeline = load(BASE_DIR, profile=args.profile or None, batch=args.batch or None)
+    if not settings_service.is_terms_accepted():
+        print("Please open the app and accept the terms and conditions first.")
+        return 1
+
+    if args.watch and not args.input.is_dir():
+        print(f"Folder not found: {args.input}")
+        return 1
+    missing = [path for path in args.inputs if not path.is_file()]
+    if not args.watch and missing:
+        print(f"Input file not found: {missing[0]}")
+        return 1
+
+    pin = args.pin
+    if not pin and settings_service.get_translation_backend() != "local":
+        pin = getpass.getpass("PIN: ")
+    output_dir = args.output or settings_service.get_output_folder()
+
+    tts_service = pipeline.tts_service
+    if args.start_engine and not tts_service.start_voicevox_process():
+        return 1
+    try:
+        if not tts_service.wait_until_ready():
+            print("VOICEVOX engine is not reachable.")
+            return 1
+        if args.watch:
+            try:
+                WatchService(BASE_DIR, pipeline.settings, pipeline).watch(args.input, pin, output_dir=output_dir)
+            except KeyboardInterrupt:
+                print("Stopped watching.")
+            return 0
+        if len(args.inputs) > 1:
+            inputs = [(path.stem, pipeline.import_service.iter_chunks(path)) for path in args.inputs]
+            apkg_path = pipeline.run_many(inputs, args.title, pin, output_dir=output_dir)
+        else:
+            apkg_path = pipeline.run(pipeline.import_service.iter_chunks(args.input), args.title, pin, output_dir=output_dir)
+    finally:
+        tts_service.stop_voicevox_process()
+
+    print(f"Deck saved to: {apkg_path.resolve()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import sys
 from pathlib import Path
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication, QStackedWidget
 from PySide6.QtGui import QIcon
 from services.settings_service import SettingsService
@@ -13,10 +14,10 @@ class MainWindow(QStackedWidget):
     def __init__(self):
         super().__init__()
 
-        # Initialize SettingsService
+        # Initialize SettingsService; settings_data is shared by every page and service
         self.settings_service = SettingsService(BASE_DIR)
-        self.voicevox_service = TextToSpeechService(BASE_DIR)
         self.settings_data = self.settings_service.load_settings()
+        self.voicevox_service = TextToSpeechService(BASE_DIR, self.settings_data)
 
         self.setWindowTitle(self.settings_data.WINDOW_TITLE)
         icon_path = BASE_DIR / self.settings_data.ICON_FILE
@@ -26,6 +27,8 @@ class MainWindow(QStackedWidget):
         self.generator_page = generator.GeneratorPage(
             base_dir=BASE_DIR,
             settings=self.settings_data,
+            tts_service=self.voicevox_service,
+            credentials=self.settings_service.credentials,
             open_settings_callback=self.show_settings,
             get_output_folder_callback=self.settings_service.get_output_folder
         )
@@ -53,20 +56,30 @@ class MainWindow(QStackedWidget):
         else:
             self.setCurrentWidget(self.generator_page)
 
-        self.cleanup_service = CleanupService(BASE_DIR)
+        self.cleanup_service = CleanupService(BASE_DIR, self.settings_data)
 
-        # VoiceVox service and process references from generator page
-        self.voicevox_service = self.generator_page.voicevox_service
+        # Start VoiceVox once the pages exist; restart it only when its own settings change
         self.voicevox_proc = self.voicevox_service.start_voicevox_process()
+        self.settings_service.subscribe(
+            self.voicevox_service.restart_voicevox_process,
+            keys=TextToSpeechService.ENGINE_SETTINGS
+        )
+
+        # Pick up edits made to config.json while the app is running
+        self.config_timer = QTimer(self)
+        self.config_timer.timeout.connect(self.settings_service.reload_if_changed)
+        self.config_timer.start(2000)
 
     def show_settings(self):
         self.settings_page.set_folder_path(self.settings_service.get_output_folder())
         self.settings_page.set_voicevox_path(self.settings_service.get_voicevox_path())
+        self.settings_page.set_voicevox_speaker(self.settings_service.get_voicevox_speaker())
+        self.settings_page.set_translation_backend(self.settings_service.get_translation_backend())
+        self.settings_page.set_local_model_dir(self.settings_service.get_local_model_dir())
+        self.settings_page.set_audio_encoder(self.settings_service.get_audio_encoder())
         self.setCurrentWidget(self.settings_page)
 
     def show_generator(self):
-        self.settings_service.set_output_folder(self.settings_page.get_folder_path())
-        self.settings_service.set_voicevox_path(self.settings_page.get_voicevox_path())
         self.setCurrentWidget(self.generator_page)
 
     def terms_accepted(self):
@@ -74,7 +87,8 @@ class MainWindow(QStackedWidget):
         self.setCurrentWidget(self.generator_page)
 
     def cleanup(self):
-        self.cleanup_service.perform_cleanup(self.voicevox_proc, self.voicevox_service)
+        self.settings_service.credentials.lock()
+        self.cleanup_service.perform_cleanup(self.voicevox_service.proc, self.voicevox_service)
 
 
 
@@ -1,12 +1,16 @@
+import hashlib
 import importlib.util
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-import genanki
+from services.card_store_service import CardStore
+from services.settings_service import AppSettings
 
 class AnkiService:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, settings: AppSettings):
         self.BASE_DIR = base_dir
-        self.settings = self._load_settings()
+        self.settings = settings
 
         # load version module to tag decks/notes
         spec = importlib.util.spec_from_file_location(
@@ -16,51 +20,46 @@ class AnkiService:
         spec.loader.exec_module(version_mod)
         self.tool_tag = f"{version_mod.__name__}_v{version_mod.__version__}"
 
-    def _load_settings(self):
-        settings_path = self.BASE_DIR / "settings.py"
-        spec = importlib.util.spec_from_file_location("settings", str(settings_path))
-        settings = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(settings)
-        return settings
+    @staticmethod
+    def sound_tag(name: str) -> str:
+        return f"[sound:{name}]" if name else ""
+
+    def back_reading(self, card) -> str:
+        """Romaji for the back of a card, with the slowed clip when there is one."""
+        return f"{card.reading}<br>{self.sound_tag(card.audio_slow)}" if card.audio_slow else card.reading
+
+    def create_subdeck(self, cards: CardStore, song_name, subdeck_type, model):
+        import genanki
 
-    def create_subdeck(self, data, song_name, subdeck_type, model):
         subdeck_names = self.settings.SUBDECK_NAMES
         subdeck_title = f"{song_name}::{subdeck_names.get(subdeck_type, subdeck_type)}"
         subdeck_id = abs(hash(subdeck_title)) % (10 ** 10)
         subdeck = genanki.Deck(subdeck_id, subdeck_title)
 
-        if data and subdeck_type in data and isinstance(data[subdeck_type], list):
-            idx = 1
-            for item in data[subdeck_type]:
-                if item and len(item) >= 3:
-                    japanese = str(item[0]) if item[0] else ""
-                    translate = str(item[1]) if item[1] else ""
-                    romaji = str(item[2]) if item[2] else ""
-                    if japanese and (romaji or translate):
-                        mp3_filename = f"{idx}.mp3"
-                        note = genanki.Note(
-                            model=model,
-                            fields=[
-                                f"{japanese}<br>[sound:{mp3_filename}]",
-                                translate,
-                                romaji
-                            ],
-                            tags=[self.tool_tag]
-                        )
-                        subdeck.add_note(note)
-                        print(f"[create_subdeck] Added to {subdeck_title}: {japanese} -> {romaji}, {translate}, mp3: {mp3_filename}")
-                    else:
-                        print(f"[create_subdeck] Skipped line {idx}: missing fields")
-                    idx += 1
-                else:
-                    print(f"[create_subdeck] Skipped line {idx}: not enough elements")
+        for card in cards.by_kind(subdeck_type):
+            if card.reading or card.english:
+                note = genanki.Note(
+                    model=model,
+                    fields=[
+                        f"{card.japanese}<br>{self.sound_tag(card.audio)}",
+                        card.english,
+                        self.back_reading(card)
+                    ],
+                    tags=[self.tool_tag]
+                )
+                subdeck.add_note(note)
+                print(f"[create_subdeck] Added to {subdeck_title}: {card.japanese} -> {card.reading}, {card.english}, audio: {card.audio}")
+            else:
+                print(f"[create_subdeck] Skipped line {card.id}: missing fields")
         return subdeck
 
-    def create_direction_deck(self, data, song_name, direction, model):
+    def create_direction_deck(self, cards: CardStore, song_name, direction, model):
         dir_names = {
             "ja_en": "Japanese to English",
             "en_ja": "English to Japanese"
         }
+        import genanki
+
         deck_title = f"{song_name}::{dir_names[direction]}"
         deck_id = abs(hash(deck_title)) % (10 ** 10)
         direction_deck = genanki.Deck(deck_id, deck_title)
@@ -72,37 +71,28 @@ class AnkiService:
             subdeck_id = abs(hash(subdeck_title)) % (10 ** 10)
             subdeck = genanki.Deck(subdeck_id, subdeck_title)
 
-            if data and subdeck_type in data and isinstance(data[subdeck_type], list):
-                for item in data[subdeck_type]:
-                    if item and len(item) >= 4:
-                        idx = item[0]
-                        japanese = str(item[1]) if item[1] else ""
-                        english = str(item[2]) if item[2] else ""
-                        romaji = str(item[3]) if item[3] else ""
-                        mp3_filename = f"{idx}.mp3"
-                        if direction == "ja_en":
-                            note = genanki.Note(
-                                model=model,
-                                fields=[
-                                    f"{japanese}<br>[sound:{mp3_filename}]",
-                                    english,
-                                    romaji
-                                ],
-                                tags=[self.tool_tag]
-                            )
-                        else:
-                            note = genanki.Note(
-                                model=model,
-                                fields=[
-                                    english,
-                                    japanese,
-                                    f"{romaji}<br>[sound:{mp3_filename}]"
-                                ],
-                                tags=[self.tool_tag]
-                            )
-                        subdeck.add_note(note)
-                    else:
-                        print(f"[create_direction_deck] Skipped line: not enough elements")
+            for card in cards.by_kind(subdeck_type):
+                if direction == "ja_en":
+                    note = genanki.Note(
+                        model=model,
+                        fields=[
+                            f"{card.japanese}<br>{self.sound_tag(card.audio)}",
+                            card.english,
+                            self.back_reading(card)
+                        ],
+                        tags=[self.tool_tag]
+                    )
+                else:
+                    note = genanki.Note(
+                        model=model,
+                        fields=[
+                            card.english,
+                            card.japanese,
+                            f"{card.reading}<br>{self.sound_tag(card.audio)}{self.sound_tag(card.audio_slow)}"
+                        ],
+                        tags=[self.tool_tag]
+                    )
+                subdeck.add_note(note)
             subdecks.append(subdeck)
         return [direction_deck] + subdecks
 
@@ -116,26 +106,16 @@ class AnkiService:
             print(f"[load_anki_css] Could not load CSS: {e}")
             return ""
 
-    def generate_anki_deck(self, data: dict, deck_title: str, output_dir: str = None):
-        """
-        Generate an Anki .apkg file with a timestamped filename.
-        If output_dir is provided, use that folder;
-        otherwise fall back to OUTPUT_DIR under BASE_DIR.
-        """
-        output_dir = output_dir or self.settings.OUTPUT_DIR
-        tmp_anki_dir = self.BASE_DIR / output_dir
-        tmp_anki_dir.mkdir(parents=True, exist_ok=True)
+    def output_folder(self, output_dir: str = None) -> Path:
+        """The folder packages are written to: output_dir, else OUTPUT_DIR, under BASE_DIR."""
+        return self.BASE_DIR / (output_dir or self.settings.OUTPUT_DIR)
 
-        print(f"[generate_anki_deck] Using output folder: {tmp_anki_dir.resolve()}")
+    def create_model(self):
+        """The note model (CARD_MODEL) every deck's notes use."""
+        import genanki
 
-        deck_id = abs(hash(deck_title)) % (10 ** 10)
-        main_deck = genanki.Deck(
-            deck_id,
-            deck_title,
-            description=f"Generated by {self.tool_tag} on {datetime.now():%Y-%m-%d %H:%M:%S}"
-        )
         css = self.load_anki_css()
-        model = genanki.Model(
+        return genanki.Model(
             self.settings.CARD_MODEL,
             'Simple Model',
             fields=[
@@ -153,20 +133,118 @@ class AnkiService:
             css=css,
         )
 
+    def create_decks(self, cards: CardStore, deck_title: str, model) -> list:
+        """The top-level deck for deck_title followed by its direction decks and their subdecks."""
+        import genanki
+
+        deck_id = abs(hash(deck_title)) % (10 ** 10)
+        main_deck = genanki.Deck(
+            deck_id,
+            deck_title,
+            description=f"Generated by {self.tool_tag} on {datetime.now():%Y-%m-%d %H:%M:%S}"
+        )
         all_decks = [main_deck]
-        all_decks += self.create_direction_deck(data, deck_title, "ja_en", model)
-        all_decks += self.create_direction_deck(data, deck_title, "en_ja", model)
+        all_decks += self.create_direction_deck(cards, deck_title, "ja_en", model)
+        all_decks += self.create_direction_deck(cards, deck_title, "en_ja", model)
+        return all_decks
+
+    def generate_anki_deck(self, cards: CardStore, deck_title: str, output_dir: str = None):
+        """
+        Generate an Anki .apkg file with a timestamped filename.
+        If output_dir is provided, use that folder;
+        otherwise fall back to OUTPUT_DIR under BASE_DIR.
+        Returns the path of the written package.
+        """
+        all_decks = self.create_decks(cards, deck_title, self.create_model())
+
+        # Only the clips the cards reference, from this job's workspace
+        media_files = []
+        if cards.media_dir is not None:
+            for card in cards:
+                for name in card.media():
+                    if (cards.media_dir / name).is_file():
+                        media_files.append(str((cards.media_dir / name).resolve()))
+
+        return self._write_package(all_decks, media_files, deck_title, output_dir)
+
+    def generate_combined_deck(self, decks: list[tuple[str, CardStore]], package_title: str, output_dir: str = None):
+        """
+        Write several decks, given as (title, cards), into one .apkg named
+        after package_title, each deck under package_title::title. The decks
+        share one note model, and their clips are pooled by content (see
+        pool_media), so a clip several decks use is stored once. The decks'
+        notes are built on COMBINED_DECK_WORKERS threads.
+        Returns the path of the written package.
+        """
+        import genanki
+
+        model = self.create_model()
+        media_files = self.pool_media([cards for _, cards in decks])
+
+        titles = []
+        for title, _ in decks:
+            title = f"{package_title}::{title}"
+            unique, n = title, 2
+            while unique in titles:
+                unique, n = f"{title} ({n})", n + 1
+            titles.append(unique)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.settings.COMBINED_DECK_WORKERS)) as executor:
+            built = list(executor.map(self.create_decks, [cards for _, cards in decks], titles, [model] * len(decks)))
+
+        parent = genanki.Deck(
+            abs(hash(package_title)) % (10 ** 10),
+            package_title,
+            description=f"Generated by {self.tool_tag} on {datetime.now():%Y-%m-%d %H:%M:%S}"
+        )
+        all_decks = [parent] + [deck for deck_list in built for deck in deck_list]
+        return self._write_package(all_decks, media_files, package_title, output_dir)
+
+    @staticmethod
+    def pool_media(card_stores: list[CardStore]) -> list[str]:
+        """
+        Rename each clip the cards reference after a hash of its content (in
+        its workspace, updating the cards) and return one path per distinct
+        clip. Jobs name clips by card id, so without this two decks' clips
+        would clash in the package; with it the same text in the same voice
+        is stored once.
+        """
+        pooled = {}  # pooled name -> path
+        for cards in card_stores:
+            if cards.media_dir is None:
+                continue
+            renamed = {}  # name in the workspace -> pooled name
+            for card in cards:
+                for attr in ("audio", "audio_slow"):
+                    name = getattr(card, attr)
+                    if not name:
+                        continue
+                    if name not in renamed:
+                        path = cards.media_dir / name
+                        if not path.is_file():
+                            renamed[name] = None
+                            continue
+                        digest = hashlib.sha1(path.read_bytes()).hexdigest()[:20]
+                        renamed[name] = f"{digest}{path.suffix}"
+                        pooled_path = cards.media_dir / renamed[name]
+                        os.replace(path, pooled_path)
+                        pooled.setdefault(renamed[name], str(pooled_path.resolve()))
+                    setattr(card, attr, renamed[name])
+        return list(pooled.values())
+
+    def _write_package(self, decks: list, media_files: list[str], title: str, output_dir: str = None) -> Path:
+        import genanki
+
+        tmp_anki_dir = self.output_folder(output_dir)
+        tmp_anki_dir.mkdir(parents=True, exist_ok=True)
+
+        print(f"[generate_anki_deck] Using output folder: {tmp_anki_dir.resolve()}")
 
         timestamp = datetime.now().strftime("%m-%d-%Y_%I-%M-%p")
-        safe_title = deck_title.replace(' ', '_')
+        safe_title = title.replace(' ', '_')
         filename = f"{safe_title}_{timestamp}.apkg"
         apkg_path = tmp_anki_dir / filename
 
-        media_files = []
-        tmp_mp3_dir = self.BASE_DIR / self.settings.TMP_MP3_DIR
-        if tmp_mp3_dir.exists() and tmp_mp3_dir.is_dir():
-            for mp3_file in tmp_mp3_dir.glob("*.mp3"):
-                media_files.append(str(mp3_file.resolve()))
-
-        genanki.Package(all_decks, media_files=media_files).write_to_file(str(apkg_path))
+        genanki.Package(decks, media_files=media_files).write_to_file(str(apkg_path))
         print(f"[generate_anki_deck] Deck saved to: {apkg_path.resolve()}")
+        return apkg_path
@@ -0,0 +1,93 @@
+import sys
+from typing import Iterable, Iterator
+
+
+class Card:
+    """
+    One card: a line (L), word (W) or kanji (K) with its English, romaji
+    reading, a numeric id (unique within the deck, used for media names)
+    and its audio files (normal and slowed) once synthesized.
+    """
+    __slots__ = ("id", "kind", "japanese", "english", "reading", "audio", "audio_slow")
+
+    def __init__(self, id: int, kind: str, japanese: str, english: str, reading: str = "", audio: str = None):
+        self.id = id
+        self.kind = kind
+        self.japanese = japanese
+        self.english = english
+        self.reading = reading
+        self.audio = audio
+        self.audio_slow = None
+
+    def media(self) -> tuple:
+        """Names of the card's audio files."""
+        return tuple(name for name in (self.audio, self.audio_slow) if name)
+
+    def __repr__(self):
+        return f"Card({self.id}, {self.kind!r}, {self.japanese!r}, {self.english!r}, {self.reading!r}, audio={self.audio!r})"
+
+
+class CardStore:
+    """
+    The cards of one deck, grouped by kind in TRANSLATION_TYPE_KEYS order.
+    Built once from the translated rows and then shared by the audio and
+    packaging stages, which only fill in audio references.
+
+    Strings are interned, so text repeated across kinds and near-duplicate
+    lines is stored once, and each card is a fixed-size __slots__ record.
+    Card audio names are relative to media_dir, the job's workspace.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(sys.intern(key) for key in keys)
+        self._cards = {key: [] for key in self.keys}
+        self._next_id = 1
+        self.media_dir = None
+
+    @classmethod
+    def from_data(cls, data: dict, keys: Iterable[str]) -> "CardStore":
+        """
+        Build the store from {"L": [[japanese, english, reading], ...], ...}
+        rows, numbering cards from 1 in key order. Rows without Japanese text
+        are skipped.
+        """
+        store = cls(keys)
+        intern = sys.intern
+        card_id = store._next_id
+        for kind in store.keys:
+            rows = data.get(kind)
+            if not isinstance(rows, list):
+                continue
+            cards = store._cards[kind]
+            for row in rows:
+                if not (isinstance(row, (list, tuple)) and row and row[0]):
+                    continue
+                english = row[1] if len(row) > 1 and row[1] else ""
+                reading = row[2] if len(row) > 2 and row[2] else ""
+                cards.append(Card(card_id, kind, intern(str(row[0])), intern(str(english)), intern(str(reading))))
+                card_id += 1
+        store._next_id = card_id
+        return store
+
+    def add(self, kind: str, japanese: str, english: str, reading: str = "") -> Card:
+        card = Card(self._next_id, sys.intern(kind), sys.intern(japanese), sys.intern(english), sys.intern(reading))
+        self._cards[kind].append(card)
+        self._next_id += 1
+        return card
+
+    def by_kind(self, kind: str) -> list[Card]:
+        return self._cards.get(kind, [])
+
+    def __iter__(self) -> Iterator[Card]:
+        for kind in self.keys:
+            yield from self._cards[kind]
+
+    def __len__(self) -> int:
+        return sum(len(cards) for cards in self._cards.values())
+
+    def to_data(self) -> dict:
+        """The rows as plain lists ([id, japanese, english, reading]), e.g. for JSON."""
+        return {
+            kind: [[str(c.id), c.japanese, c.english, c.reading] for c in cards]
+            for kind, cards in self._cards.items()
+        }
@@ -1,16 +1,17 @@
-import shutil
 from pathlib import Path
-from settings import TMP_MP3_DIR
+from services.settings_service import AppSettings
+from services.workspace_service import WorkspaceService
 
 class CleanupService:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, settings: AppSettings):
         self.BASE_DIR = base_dir
+        self.settings = settings
 
     def cleanup_tmp_mp3(self):
-        tmp_dir = self.BASE_DIR / TMP_MP3_DIR
-        if tmp_dir.exists() and tmp_dir.is_dir():
-            shutil.rmtree(tmp_dir)
-            print(f"[cleanup_tmp_mp3] Deleted {tmp_dir.resolve()}")
+        # Only this process's job workspaces; another running instance keeps its own
+        workspaces = WorkspaceService(self.BASE_DIR, self.settings)
+        workspaces.remove_own()
+        print(f"[cleanup_tmp_mp3] Deleted workspaces in {workspaces.root.resolve()}")
 
     def full_cleanup(self):
         """Call both cleanups."""
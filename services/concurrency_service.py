@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from services.settings_service import AppSettings
+
+# HTTP statuses that mean "too many requests", not "bad request"
+_OVERLOAD_STATUSES = (429, 503)
+# Exception class names that mean the backend is overloaded (openai, requests, httpx, builtins)
+_OVERLOAD_NAMES = ("RateLimitError", "APITimeoutError", "Timeout", "ReadTimeout", "ConnectTimeout", "TimeoutError")
+# Latency above the expected by less than this is scheduling noise, not congestion
+_LATENCY_NOISE = 0.01
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether error (or the error it wraps) is a 429/503 or a timeout."""
+    while error is not None:
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(getattr(error, "response", None), "status_code", None)
+        if status in _OVERLOAD_STATUSES:
+            return True
+        if any(cls.__name__ in _OVERLOAD_NAMES for cls in type(error).__mro__):
+            return True
+        error = error.__cause__
+    return False
+
+
+class AdaptiveLimiter:
+    """
+    Caps the requests in flight to one backend and tunes the cap while the
+    job runs (AIMD, as in TCP congestion control).
+
+    Every request that completes while the limiter was full adds 1/limit to
+    the limit, so it grows by about one per round of requests, up to the
+    maximum. A 429, 503 or timeout, or a request slower than
+    AUTOTUNE_LATENCY_TOLERANCE times the expected latency, multiplies it by
+    AUTOTUNE_BACKOFF, down to the minimum. The expected latency is the best
+    seen per unit of work (line, mora, second of audio) times the request's
+    cost, but at least the fastest request seen, which covers the fixed
+    overhead of small requests. After a decrease the requests already in flight complete
+    before the limit moves again, so one burst of 429s counts once.
+
+    Limits come from AUTOTUNE_LIMITS as [min, start, max]; a max of 0 means
+    the CPU count. With AUTOTUNE_ENABLED off the limit stays at start.
+    """
+
+    def __init__(self, name: str, settings: AppSettings):
+        self.name = name
+        self.settings = settings
+        minimum, start, maximum = settings.AUTOTUNE_LIMITS.get(name, [1, 1, 1])
+        self.maximum = max(1, maximum or os.cpu_count() or 1)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(min(max(start, self.minimum), self.maximum))
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._peak = 0
+        self._completed = 0
+        self._hold_until = 0  # completion count before which the limit stays put
+        self._best = {}  # kind -> [fastest request, best latency per unit of work]
+        self._stats = {"requests": 0, "overloads": 0, "backoffs": 0, "latency": 0.0}
+
+    @contextmanager
+    def slot(self, cost: float = 1.0, kind: str = ""):
+        """
+        Hold one of the limit's slots for a request; blocks while full.
+        cost is the request's amount of work and kind groups requests whose
+        latencies are comparable (an audio query and a synthesis are not).
+        """
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+            full = self._in_flight >= int(self.limit)
+        start = time.perf_counter()
+        overloaded = False
+        try:
+            yield
+        except BaseException as e:
+            overloaded = is_overload(e)
+            raise
+        finally:
+            self._release(time.perf_counter() - start, cost, kind, full, overloaded)
+
+    def call(self, func, *args, cost: float = 1.0, kind: str = "", retries: int = 3, **kwargs):
+        """func(*args, **kwargs) in a slot, retried after a pause when the backend is overloaded."""
+        for attempt in range(retries + 1):
+            try:
+                with self.slot(cost, kind):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == retries or not is_overload(e):
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+
+    def snapshot(self) -> dict:
+        """Current limit and counters, for the run metrics."""
+        with self._cond:
+            requests = self._stats["requests"]
+            return {
+                "limit": round(self.limit, 2),
+                "min": self.minimum,
+                "max": self.maximum,
+                "peak_in_flight": self._peak,
+                "requests": requests,
+                "overloads": self._stats["overloads"],
+                "backoffs": self._stats["backoffs"],
+                "mean_latency_s": round(self._stats["latency"] / requests, 4) if requests else 0.0,
+            }
+
+    def _release(self, latency: float, cost: float, kind: str, full: bool, overloaded: bool):
+        per_unit = latency / max(cost, 1e-9)
+        with self._cond:
+            self._in_flight -= 1
+            self._completed += 1
+            self._stats["requests"] += 1
+            self._stats["latency"] += latency
+            if overloaded:
+                self._stats["overloads"] += 1
+            best = self._best.setdefault(kind, [float("inf"), float("inf")])
+            if not overloaded:
+                best[0] = min(best[0], latency)
+                best[1] = min(best[1], per_unit)
+            expected = max(best[0], best[1] * cost)
+            slow = latency > expected * self.settings.AUTOTUNE_LATENCY_TOLERANCE and latency - expected > _LATENCY_NOISE
+
+            if self.settings.AUTOTUNE_ENABLED and self._completed > self._hold_until:
+                if overloaded or (slow and self.limit > self.minimum):
+                    previous = self.limit
+                    self.limit = max(float(self.minimum), self.limit * self.settings.AUTOTUNE_BACKOFF)
+                    self._hold_until = self._completed + self._in_flight
+                    self._stats["backoffs"] += 1
+                    reason = "overloaded" if overloaded else f"slow ({latency:.2f}s, expected {expected:.2f}s)"
+                    print(f"[{self.name} limiter] {reason}, limit {previous:.1f} -> {self.limit:.1f}")
+                elif full and not slow:
+                    self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import hmac
+import importlib.util
+import os
+import threading
+import time
+from pathlib import Path
+
+from services.encryption_service import EncryptionService
+from services.settings_service import AppSettings
+
+
+class CredentialSessionService:
+    """
+    Keeps the decrypted API key in memory after it has been unlocked with
+    the PIN, so repeated generations skip the key derivation. The session
+    locks itself after CREDENTIAL_IDLE_TTL seconds without use (0 disables
+    caching) or when lock() is called. Safe to share between threads: only
+    one derivation runs at a time and waiting callers reuse its result.
+
+    Keys stored with a KDF other than KEY_KDF are re-encrypted with KEY_KDF
+    after the next successful unlock.
+    """
+    KEYS_FILE = "keys.py"
+
+    def __init__(self, base_dir: Path, settings: AppSettings, encryption_service: EncryptionService = None):
+        self.BASE_DIR = base_dir
+        self.settings = settings
+        self.encryption_service = encryption_service or EncryptionService()
+        self._lock = threading.Lock()
+        self._api_key = None
+        self._pin_digest = None
+        self._session_salt = os.urandom(16)
+        self._last_used = 0.0
+        self._load_keys()
+
+    def _load_keys(self):
+        spec = importlib.util.spec_from_file_location("local_keys", str(self.BASE_DIR / self.KEYS_FILE))
+        local_keys = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(local_keys)
+        self._encrypted_api_key = local_keys.ENCRYPTED_API_KEY
+        self._salt = local_keys.SALT
+        self._iv = local_keys.IV
+        self._kdf = getattr(local_keys, "KDF", EncryptionService.LEGACY_KDF)
+
+    def _digest(self, pin: str) -> bytes:
+        # Cheap per-session check that a PIN typed while unlocked is still the right one
+        return hmac.new(self._session_salt, pin.encode(), hashlib.sha256).digest()
+
+    def _expired(self) -> bool:
+        ttl = self.settings.CREDENTIAL_IDLE_TTL
+        return ttl <= 0 or time.monotonic() - self._last_used > ttl
+
+    def is_unlocked(self) -> bool:
+        with self._lock:
+            return self._api_key is not None and not self._expired()
+
+    def get_api_key(self, pin: str = None) -> str:
+        """
+        Return the decrypted API key, deriving it from the PIN only when the
+        session is locked or expired. Raises ValueError on a missing or wrong PIN.
+        """
+        with self._lock:
+            if self._api_key is not None and self._expired():
+                self._clear()
+
+            if self._api_key is not None:
+                if pin and not hmac.compare_digest(self._digest(pin), self._pin_digest):
+                    raise ValueError("Invalid PIN or failed to decrypt API key.")
+                self._last_used = time.monotonic()
+                return self._api_key
+
+            if not pin:
+                raise ValueError("PIN must be provided to decrypt the API key.")
+
+            api_key = self.encryption_service.decrypt(
+                pin,
+                self._encrypted_api_key,
+                self._salt,
+                self._iv,
+                self._kdf,
+            )
+            if not api_key:
+                raise ValueError("Invalid PIN or failed to decrypt API key.")
+
+            if self._kdf != self.settings.KEY_KDF:
+                self._write_keys(api_key, pin)
+
+            self._api_key = api_key
+            self._pin_digest = self._digest(pin)
+            self._last_used = time.monotonic()
+            return api_key
+
+    def unlock(self, pin: str) -> bool:
+        """Unlock the session with the PIN. Returns False if the PIN is wrong."""
+        try:
+            self.get_api_key(pin)
+            return True
+        except ValueError:
+            return False
+
+    def lock(self):
+        """Forget the decrypted key; the next request needs the PIN again."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._api_key = None
+        self._pin_digest = None
+
+    def store_api_key(self, api_key: str, pin: str):
+        """
+        Encrypt a new API key with the PIN using KEY_KDF, write keys.py and
+        lock the session so the next request uses the new key.
+        """
+        with self._lock:
+            self._write_keys(api_key, pin)
+            self._clear()
+
+    def _write_keys(self, api_key: str, pin: str):
+        kdf = self.settings.KEY_KDF
+        salt = os.urandom(16)
+        key = self.encryption_service.derive_key(pin, salt, kdf)
+        iv, encrypted = self.encryption_service.encrypt(api_key, key)
+
+        encoded_salt = base64.b64encode(salt).decode()
+        encoded_iv = base64.b64encode(iv).decode()
+        encoded_data = base64.b64encode(encrypted).decode()
+
+        key_file = self.BASE_DIR / self.KEYS_FILE
+        tmp_file = key_file.with_name(self.KEYS_FILE + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(f'ENCRYPTED_API_KEY = "{encoded_data}"\n')
+            f.write(f'SALT = "{encoded_salt}"\n')
+            f.write(f'IV = "{encoded_iv}"\n')
+            f.write(f'KDF = "{kdf}"\n')
+        os.replace(tmp_file, key_file)
+
+        self._encrypted_api_key = encoded_data
+        self._salt = encoded_salt
+        self._iv = encoded_iv
+        self._kdf = kdf
+        print(f"[_write_keys] API key stored with {kdf}")
@@ -2,35 +2,76 @@ import base64
 import os
 from typing import Optional, Tuple
 
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import hashes, padding
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-
 
 class EncryptionService:
+    # keys.py files written before the KDF was recorded used this.
+    LEGACY_KDF = "pbkdf2:iterations=100000"
+
+    # cryptography is imported on first use so it stays off the startup path.
     def __init__(self, iterations: int = 100_000):
         self.iterations = iterations
-        self.backend = default_backend()
 
-    def derive_key(self, pin: str, salt: bytes) -> bytes:
+    @staticmethod
+    def parse_kdf(kdf: str) -> Tuple[str, dict]:
+        """
+        Split a KDF spec such as "scrypt:n=32768,r=8,p=1" or
+        "pbkdf2:iterations=100000" into its name and integer parameters.
+        """
+        name, _, raw_params = kdf.partition(":")
+        params = {}
+        for item in filter(None, raw_params.split(",")):
+            key, _, value = item.partition("=")
+            params[key.strip()] = int(value)
+        name = name.strip().lower()
+        if name not in ("pbkdf2", "scrypt"):
+            raise ValueError(f"Unsupported KDF: {kdf}")
+        return name, params
+
+    @property
+    def backend(self):
+        from cryptography.hazmat.backends import default_backend
+        return default_backend()
+
+    def derive_key(self, pin: str, salt: bytes, kdf: str = None) -> bytes:
         """
-        Derives a symmetric key from the PIN and salt using PBKDF2.
+        Derives a symmetric key from the PIN and salt.
+        kdf is a spec for parse_kdf; PBKDF2 with self.iterations if omitted.
+        scrypt is memory-hard: n * r * 128 bytes of RAM per derivation.
         """
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=self.iterations,
-            backend=self.backend,
-        )
-        return kdf.derive(pin.encode())
+        name, params = self.parse_kdf(kdf or f"pbkdf2:iterations={self.iterations}")
+
+        if name == "scrypt":
+            from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+            deriver = Scrypt(
+                salt=salt,
+                length=32,
+                n=params.get("n", 2 ** 15),
+                r=params.get("r", 8),
+                p=params.get("p", 1),
+                backend=self.backend,
+            )
+        else:
+            from cryptography.hazmat.primitives import hashes
+            from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+            deriver = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=params.get("iterations", self.iterations),
+                backend=self.backend,
+            )
+        return deriver.derive(pin.encode())
 
     def encrypt(self, data: str, key: bytes) -> Tuple[bytes, bytes]:
         """
         Encrypts the data string using AES-CBC with PKCS7 padding.
         Returns (iv, encrypted_bytes)
         """
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
         iv = os.urandom(16)
         cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=self.backend)
         encryptor = cipher.encryptor()
@@ -41,11 +82,15 @@ class EncryptionService:
         encrypted = encryptor.update(padded_data) + encryptor.finalize()
         return iv, encrypted
 
-    def decrypt(self, pin: str, encrypted_api_key_b64: str, salt_b64: str, iv_b64: str) -> Optional[str]:
+    def decrypt(self, pin: str, encrypted_api_key_b64: str, salt_b64: str, iv_b64: str, kdf: str = None) -> Optional[str]:
         """
         Decrypts the encrypted API key given the PIN, encrypted data, salt, and IV (all base64 encoded).
+        kdf is the spec the key was stored with (see derive_key).
         Returns decrypted string or None on failure.
         """
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
         try:
             salt = base64.b64decode(salt_b64)
             iv = base64.b64decode(iv_b64)
@@ -55,7 +100,7 @@ class EncryptionService:
             return None
 
         try:
-            key = self.derive_key(pin, salt)
+            key = self.derive_key(pin, salt, kdf)
         except Exception as e:
             print(f"[Decrypt] Key derivation error: {e}")
             return None
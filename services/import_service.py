@@ -0,0 +1,195 @@
+import codecs
+import mmap
+import posixpath
+import re
+import zipfile
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterator
+from xml.etree import ElementTree
+
+from services.settings_service import AppSettings
+
+_SRT_INDEX_RE = re.compile(r"^\d+$")
+_SRT_TIMING_RE = re.compile(r"^\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}\s*-->")
+_MARKUP_RE = re.compile(r"<[^>]*>|\{[^}]*\}")
+_ASS_BREAK_RE = re.compile(r"\\[Nn]")
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class ImportService:
+    """
+    Reads source files for the pipeline without loading them whole:
+    plain text (UTF-8 or Shift-JIS, memory-mapped), .srt/.ass/.ssa subtitles
+    and EPUB books. iter_chunks() yields text chunks that go straight into
+    PipelineService.preprocess.
+    """
+    SUPPORTED_EXTENSIONS = (".txt", ".srt", ".ass", ".ssa", ".epub")
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.base_dir = base_dir
+        self.settings = settings
+
+    def iter_chunks(self, path) -> Iterator[str]:
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix == ".srt":
+            return self.iter_srt(path)
+        if suffix in (".ass", ".ssa"):
+            return self.iter_ass(path)
+        if suffix == ".epub":
+            return self.iter_epub(path)
+        return self.iter_text(path)
+
+    def file_filter(self) -> str:
+        """Filter string for QFileDialog."""
+        patterns = " ".join(f"*{ext}" for ext in self.SUPPORTED_EXTENSIONS)
+        return f"Text, subtitles and books ({patterns})"
+
+    # Plain text
+    def detect_encoding(self, sample: bytes) -> str:
+        """
+        Pick the encoding from a BOM, or the first of IMPORT_ENCODINGS that
+        decodes the sample (a multi-byte character cut at the end is allowed).
+        """
+        for bom, encoding in _BOMS:
+            if sample.startswith(bom):
+                return encoding
+        for encoding in self.settings.IMPORT_ENCODINGS:
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding
+            except (UnicodeDecodeError, LookupError):
+                continue
+        return self.settings.IMPORT_ENCODINGS[-1]
+
+    def iter_text(self, path: Path) -> Iterator[str]:
+        """Decode a memory-mapped text file IMPORT_CHUNK_BYTES at a time."""
+        chunk_bytes = self.settings.IMPORT_CHUNK_BYTES
+        with open(path, "rb") as f:
+            if path.stat().st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                encoding = self.detect_encoding(mapped[:chunk_bytes])
+                print(f"[iter_text] Reading {path.name} as {encoding}")
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+                for offset in range(0, len(mapped), chunk_bytes):
+                    text = decoder.decode(mapped[offset:offset + chunk_bytes])
+                    if text:
+                        yield text
+                text = decoder.decode(b"", final=True)
+                if text:
+                    yield text
+
+    def _iter_text_lines(self, path: Path) -> Iterator[str]:
+        with open(path, "rb") as f:
+            encoding = self.detect_encoding(f.read(self.settings.IMPORT_CHUNK_BYTES))
+        with open(path, encoding=encoding, errors="replace") as f:
+            yield from f
+
+    # Subtitles
+    def iter_srt(self, path: Path) -> Iterator[str]:
+        """Yield subtitle text lines, skipping cue numbers, timings and tags."""
+        for line in self._iter_text_lines(path):
+            line = line.strip()
+            if not line or _SRT_INDEX_RE.match(line) or _SRT_TIMING_RE.match(line):
+                continue
+            text = _MARKUP_RE.sub("", line)
+            if text:
+                yield text + "\n"
+
+    def iter_ass(self, path: Path) -> Iterator[str]:
+        """Yield the text field of every Dialogue event, without override tags."""
+        for line in self._iter_text_lines(path):
+            if not line.startswith("Dialogue:"):
+                continue
+            # Dialogue: Layer,Start,End,Style,Name,MarginL,MarginR,MarginV,Effect,Text
+            fields = line.split(",", 9)
+            if len(fields) < 10:
+                continue
+            text = _MARKUP_RE.sub("", fields[9].strip())
+            text = _ASS_BREAK_RE.sub("\n", text).replace("\\h", " ")
+            if text.strip():
+                yield text + "\n"
+
+    # EPUB
+    def iter_epub(self, path: Path) -> Iterator[str]:
+        """Yield the text of each chapter in spine order, one member at a time."""
+        with zipfile.ZipFile(path) as book:
+            for name in self._epub_spine(book):
+                extractor = _HtmlTextExtractor()
+                with book.open(name) as member:
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                    while True:
+                        data = member.read(self.settings.IMPORT_CHUNK_BYTES)
+                        extractor.feed(decoder.decode(data, final=not data))
+                        text = extractor.take_text()
+                        if text:
+                            yield text
+                        if not data:
+                            break
+                extractor.close()
+                text = extractor.take_text()
+                if text:
+                    yield text
+                yield "\n"
+
+    def _epub_spine(self, book: zipfile.ZipFile) -> list[str]:
+        ns = {
+            "c": "urn:oasis:names:tc:opendocument:xmlns:container",
+            "opf": "http://www.idpf.org/2007/opf",
+        }
+        container = ElementTree.fromstring(book.read("META-INF/container.xml"))
+        opf_path = container.find(".//c:rootfile", ns).get("full-path")
+        opf = ElementTree.fromstring(book.read(opf_path))
+        opf_dir = posixpath.dirname(opf_path)
+
+        manifest = {
+            item.get("id"): posixpath.normpath(posixpath.join(opf_dir, item.get("href")))
+            for item in opf.iterfind(".//opf:manifest/opf:item", ns)
+        }
+        return [
+            manifest[itemref.get("idref")]
+            for itemref in opf.iterfind(".//opf:spine/opf:itemref", ns)
+            if itemref.get("idref") in manifest
+        ]
+
+
+class _HtmlTextExtractor(HTMLParser):
+    """Collects visible text from (X)HTML, one line per block element. Drops furigana (<rt>, <rp>)."""
+    BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "blockquote", "section"}
+    SKIP_TAGS = {"script", "style", "rt", "rp", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def take_text(self) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        return text
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+from services.settings_service import AppSettings
+
+
+class JobCacheService:
+    """
+    Remembers which package each job produced, so generating the same deck
+    again returns the existing .apkg without calling the API or the engine.
+
+    A job's fingerprint covers the normalized input lines, the deck title,
+    the tool version, hashes of the prompt and the kanji index, and every
+    setting in FINGERPRINT_SETTINGS (model, speaker, encoder and so on). Fingerprints
+    are kept in a small index (JOB_CACHE_INDEX) in the output folder, next
+    to the packages they point at.
+    """
+    # Settings that change what a job produces
+    FINGERPRINT_SETTINGS = (
+        "TRANSLATION_BACKEND", "AI_MODEL", "TEMPERATURE", "RESPONSE_FORMAT",
+        "LOCAL_MT_MODEL_DIR", "LOCAL_MT_QUANTIZE", "LOCAL_MT_MAX_LENGTH", "LOCAL_MT_NUM_BEAMS",
+        "ROUTING_ENABLED", "ROUTE_EASY_BACKEND", "ROUTE_EASY_MODEL", "ROUTE_HARD_MODEL",
+        "NEAR_DUP_ENABLED", "NEAR_DUP_FUZZY", "NEAR_DUP_THRESHOLD", "NEAR_DUP_SHINGLE_SIZE", "NEAR_DUP_BANDS",
+        "NEAR_DUP_VARIANT_RULES", "TRANSLATION_TYPE_KEYS", "LOCAL_READING_KEYS",
+        "WORD_SOURCE", "WORD_MIN_COUNT", "WORD_MAX_COUNT", "WORD_KANA_ONLY", "WORD_STOP_FILE", "WORD_STOP_LIST",
+        "KANJI_INDEX_FILE", "KANJI_MAX_MEANINGS",
+        "SUBDECK_NAMES", "CARD_MODEL", "VOICEVOX_SPEAKER", "SLOW_AUDIO_ENABLED", "SLOW_AUDIO_SPEED",
+        "TTS_MAX_CHUNK_MORAS", "TTS_CROSSFADE_MS",
+        "AUDIO_ENCODER", "MP3_VBR_QUALITY", "MP3_BITRATE", "MP3_QUALITY", "OPUS_BITRATE",
+    )
+
+    def __init__(self, base_dir: Path, settings: AppSettings, version: str = ""):
+        self.base_dir = base_dir
+        self.settings = settings
+        self.version = version
+        self._lock = threading.Lock()
+
+    def fingerprint(self, lines: list[str], deck_title: str) -> str:
+        """Hex digest identifying the job; equal digests produce the same deck."""
+        job = {
+            "version": self.version,
+            "title": deck_title.strip(),
+            "prompt": self._prompt_hash(),
+            "stop_words": self._file_hash(self.settings.WORD_STOP_FILE) if self.settings.WORD_STOP_FILE else "",
+            "kanji_index": self._file_hash(self.settings.KANJI_INDEX_FILE),
+            "settings": {name: getattr(self.settings, name) for name in self.FINGERPRINT_SETTINGS},
+            "lines": [" ".join(unicodedata.normalize("NFKC", line).split()) for line in lines],
+        }
+        encoded = json.dumps(job, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def lookup(self, fingerprint: str, output_dir: Path) -> Path | None:
+        """
+        The package recorded for fingerprint in output_dir, or None. With
+        JOB_CACHE_COPY a fresh copy (hard link where possible) is returned
+        instead, so every run still leaves a new timestamped file.
+        """
+        if not self.settings.JOB_CACHE_ENABLED:
+            return None
+        with self._lock:
+            index = self._read_index(output_dir)
+            entry = index.get(fingerprint)
+            if entry is None:
+                return None
+            apkg_path = output_dir / entry["file"]
+            if not apkg_path.is_file() or self._stamp(apkg_path) != [entry.get("size"), entry.get("mtime_ns")]:
+                # Deleted or overwritten since; forget it
+                del index[fingerprint]
+                self._write_index(output_dir, index)
+                return None
+
+        print(f"[lookup] Same job as {apkg_path.name} ({entry.get('created', '?')}), reusing it")
+        if not self.settings.JOB_CACHE_COPY:
+            return apkg_path
+        copy_path = output_dir / f"{entry['title'].replace(' ', '_')}_{datetime.now():%m-%d-%Y_%I-%M-%p}.apkg"
+        if copy_path == apkg_path:
+            return apkg_path
+        try:
+            os.link(apkg_path, copy_path)
+        except OSError:
+            shutil.copy2(apkg_path, copy_path)
+        return copy_path
+
+    def record(self, fingerprint: str, apkg_path: Path, deck_title: str):
+        """Remember that fingerprint produced apkg_path (in its own folder's index)."""
+        if not self.settings.JOB_CACHE_ENABLED:
+            return
+        output_dir = apkg_path.parent
+        size, mtime_ns = self._stamp(apkg_path)
+        with self._lock:
+            index = self._read_index(output_dir)
+            # A package written over another job's file (same title, same minute) replaces its entry
+            index = {key: entry for key, entry in index.items() if entry.get("file") != apkg_path.name}
+            index[fingerprint] = {
+                "file": apkg_path.name,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "title": deck_title,
+                "created": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._write_index(output_dir, index)
+
+    @staticmethod
+    def _stamp(path: Path) -> list:
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _prompt_hash(self) -> str:
+        settings = self.settings
+        if settings.WORD_SOURCE == "local":
+            prompt_path = settings.COMPACT_WORDS_PROMPT_FILE if settings.RESPONSE_FORMAT == "tsv" else settings.WORDS_PROMPT_FILE
+        else:
+            prompt_path = settings.COMPACT_PROMPT_FILE if settings.RESPONSE_FORMAT == "tsv" else settings.PROMPT_FILE
+        return self._file_hash(prompt_path)
+
+    def _file_hash(self, relative_path: str) -> str:
+        try:
+            return hashlib.sha256((self.base_dir / relative_path).read_bytes()).hexdigest()
+        except OSError:
+            return ""
+
+    def _read_index(self, output_dir: Path) -> dict:
+        try:
+            with open(output_dir / self.settings.JOB_CACHE_INDEX, encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[_read_index] Ignoring unreadable job index in {output_dir}: {e}")
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _write_index(self, output_dir: Path, index: dict):
+        """Write the index via write-then-rename, so a crash never leaves half a file."""
+        index_path = output_dir / self.settings.JOB_CACHE_INDEX
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            print(f"[_write_index] Could not save the job index in {output_dir}: {e}")
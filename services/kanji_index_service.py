@@ -0,0 +1,124 @@
+import mmap
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from services.settings_service import AppSettings
+
+# File layout (little-endian):
+#   header  "KJIX", u16 version, u16 reserved, u32 first code point, u32 last code point
+#   table   u32 record offset per code point in [first, last] (0 = no entry)
+#   records u16 length, then UTF-8 "meanings\x1fon\x1fkun" with items separated by \x1e
+_MAGIC = b"KJIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+_OFFSET = struct.Struct("<I")
+_LENGTH = struct.Struct("<H")
+_FIELD_SEP = "\x1f"
+_ITEM_SEP = "\x1e"
+
+
+class KanjiEntry(NamedTuple):
+    meanings: tuple
+    on: tuple
+    kun: tuple
+
+
+class KanjiIndexService:
+    """
+    Offline kanji lookups (English meanings, on and kun readings from
+    KANJIDIC2) from a memory-mapped table keyed by code point, used to build
+    the K subdeck without asking the model. The file is mapped on first use;
+    each lookup is one table read and one record decode.
+    """
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.base_dir = base_dir
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._first = self._last = 0
+
+    def _open(self):
+        with self._lock:
+            if self._map is not None:
+                return
+            path = self.base_dir / self.settings.KANJI_INDEX_FILE
+            self._file = open(path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _, self._first, self._last = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC or version != _VERSION:
+                self.close()
+                raise ValueError(f"{path} is not a kanji index (version {_VERSION})")
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+            self._map = self._file = None
+
+    def lookup(self, char: str) -> KanjiEntry | None:
+        if self._map is None:
+            self._open()
+        code = ord(char)
+        if not self._first <= code <= self._last:
+            return None
+        (offset,) = _OFFSET.unpack_from(self._map, _HEADER.size + (code - self._first) * _OFFSET.size)
+        if not offset:
+            return None
+        (length,) = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        fields = self._map[start:start + length].decode("utf-8").split(_FIELD_SEP)
+        return KanjiEntry(*(tuple(filter(None, field.split(_ITEM_SEP))) for field in fields))
+
+    def build_items(self, lines: Iterable[str], reading_service) -> list[list[str]]:
+        """
+        Return K items ([kanji, meaning, reading]) for each distinct kanji in
+        the lines, in first-seen order. The reading is the romaji of the first
+        kun and on readings; kanji missing from the index are skipped.
+        """
+        seen = {}
+        for line in lines:
+            for char in line:
+                if "一" <= char <= "鿿" and char not in seen:
+                    seen[char] = self.lookup(char)
+
+        missing = [char for char, entry in seen.items() if entry is None]
+        if missing:
+            print(f"[build_items] Not in kanji index: {''.join(missing)}")
+
+        entries = {char: entry for char, entry in seen.items() if entry is not None}
+        kana = {
+            char: [r.replace(".", "").strip("-") for r in (entry.kun[:1] + entry.on[:1])]
+            for char, entry in entries.items()
+        }
+        readings = reading_service.romanize_batch(r for rs in kana.values() for r in rs)
+
+        max_meanings = self.settings.KANJI_MAX_MEANINGS
+        return [
+            [char, ", ".join(entry.meanings[:max_meanings]), " / ".join(readings[r] for r in kana[char])]
+            for char, entry in entries.items()
+        ]
+
+    @staticmethod
+    def write(path: Path, entries: dict[str, KanjiEntry]):
+        """Write an index file from {kanji: KanjiEntry}."""
+        codes = sorted(ord(char) for char in entries)
+        first, last = codes[0], codes[-1]
+        table = [0] * (last - first + 1)
+        records = bytearray()
+        base = _HEADER.size + len(table) * _OFFSET.size
+
+        for code in codes:
+            entry = entries[chr(code)]
+            payload = _FIELD_SEP.join(_ITEM_SEP.join(items) for items in entry).encode("utf-8")
+            table[code - first] = base + len(records)
+            records += _LENGTH.pack(len(payload)) + payload
+
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, first, last))
+            f.write(struct.pack(f"<{len(table)}I", *table))
+            f.write(records)
@@ -0,0 +1,106 @@
+import json
+import threading
+from pathlib import Path
+
+from services.settings_service import AppSettings
+
+
+class LocalTranslationService:
+    """
+    Translates lines offline with a MarianMT model (e.g. Helsinki-NLP/opus-mt-ja-en
+    saved with save_pretrained) from LOCAL_MT_MODEL_DIR, on the CPU.
+
+    Lines are sorted by length and translated LOCAL_MT_BATCH_SIZE at a time so
+    each batch pads to similar lengths. With LOCAL_MT_QUANTIZE the Linear layers
+    are quantized to int8 when the model loads. torch and transformers are
+    imported on first use only.
+    """
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.BASE_DIR = base_dir
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._model = None
+        self._tokenizer = None
+        self._loaded_key = None
+
+    def model_dir(self) -> Path | None:
+        if not self.settings.LOCAL_MT_MODEL_DIR:
+            return None
+        path = Path(self.settings.LOCAL_MT_MODEL_DIR)
+        return path if path.is_absolute() else self.BASE_DIR / path
+
+    def is_available(self) -> bool:
+        model_dir = self.model_dir()
+        return model_dir is not None and (model_dir / "config.json").is_file()
+
+    def _load(self):
+        # Reload only when the model folder or quantization setting changed
+        key = (self.model_dir(), self.settings.LOCAL_MT_QUANTIZE, self.settings.LOCAL_MT_THREADS)
+        if self._model is not None and self._loaded_key == key:
+            return
+        if not self.is_available():
+            raise RuntimeError(f"No local translation model found in '{self.settings.LOCAL_MT_MODEL_DIR}'.")
+
+        import torch
+        from transformers import MarianMTModel, MarianTokenizer
+
+        if self.settings.LOCAL_MT_THREADS > 0:
+            torch.set_num_threads(self.settings.LOCAL_MT_THREADS)
+
+        model_dir = str(key[0])
+        print(f"[_load] Loading local translation model from {model_dir}")
+        tokenizer = MarianTokenizer.from_pretrained(model_dir)
+        model = MarianMTModel.from_pretrained(model_dir).eval()
+        if self.settings.LOCAL_MT_QUANTIZE:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        self._tokenizer, self._model, self._loaded_key = tokenizer, model, key
+
+    def translate(self, texts: list[str]) -> list[str]:
+        """Translate texts, returning the translations in the same order."""
+        if not texts:
+            return []
+        import torch
+
+        with self._lock:
+            self._load()
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            results = [""] * len(texts)
+            batch_size = max(1, self.settings.LOCAL_MT_BATCH_SIZE)
+
+            with torch.inference_mode():
+                for start in range(0, len(order), batch_size):
+                    batch = order[start:start + batch_size]
+                    encoded = self._tokenizer(
+                        [texts[i] for i in batch],
+                        return_tensors="pt",
+                        padding=True,
+                        truncation=True,
+                        max_length=self.settings.LOCAL_MT_MAX_LENGTH,
+                    )
+                    generated = self._model.generate(
+                        **encoded,
+                        num_beams=self.settings.LOCAL_MT_NUM_BEAMS,
+                        max_new_tokens=self.settings.LOCAL_MT_MAX_LENGTH,
+                    )
+                    for i, text in zip(batch, self._tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                        results[i] = text.strip()
+        return results
+
+    def request_translation_data(self, lines: list[str], pin: str = None, words: list[str] = None) -> dict:
+        """
+        Same contract as TranslationService.request_translation_data. The
+        model cannot pick words, so W is empty unless a words list (from
+        WordExtractionService) is given, whose words are then translated
+        on their own.
+        """
+        translations = self.translate(list(lines) + list(words or ()))
+        data = {"L": [list(pair) for pair in zip(lines, translations)], "W": []}
+        if words:
+            data["W"] = [list(pair) for pair in zip(words, translations[len(lines):])]
+        return data
+
+    def request_translation_api(self, lines: list[str], pin: str = None, prompt_path: str = None) -> str:
+        """The same result as JSON, like TranslationService.request_translation_api."""
+        return json.dumps(self.request_translation_data(lines), ensure_ascii=False)
@@ -0,0 +1,162 @@
+import hashlib
+import re
+import struct
+from pathlib import Path
+
+import jaconv
+
+from services.settings_service import AppSettings
+
+# Full-width ASCII and half-width katakana, the only characters width folding changes
+_WIDTH_VARIANT_RE = re.compile("[\uFF01-\uFF5E\uFF61-\uFF9F]")
+# Punctuation, symbols and spaces (anything that is not a letter or digit)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+# Negative forms; lines that differ in these are never grouped (待っている / 待っていない)
+_NEGATION_RE = re.compile("ない|なかっ|なく|ません|ぬ|ねえ|ねぇ|無い|無かっ|ず(?!っ)")
+# Characters at the end of a key that must match for two keys to be grouped
+_ENDING_CHARS = 3
+
+
+class NearDuplicateService:
+    """
+    Groups lines that differ only in character width, punctuation or small
+    variants (NEAR_DUP_VARIANT_RULES) so one representative per group is sent
+    for translation and the result is copied to the other members.
+
+    Lines are normalized first and equal normalized keys are grouped. With
+    NEAR_DUP_FUZZY the remaining keys also go through MinHash/LSH over
+    character shingles, with candidate pairs confirmed by their exact Jaccard
+    similarity. Keys whose endings or negative forms differ are never
+    grouped, since those lines differ in meaning however similar they look.
+    """
+    NUM_PERM = 16            # 32-bit hashes per signature (one 64-byte blake2b digest)
+    MAX_BUCKET_CANDIDATES = 8  # most recent entries compared per LSH bucket
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.base_dir = base_dir
+        self.settings = settings
+        self._rules = None
+        self._rules_source = None
+
+    def normalize(self, line: str) -> str:
+        """Fold widths, drop punctuation/symbols/spaces and apply the variant rules."""
+        text = line
+        if _WIDTH_VARIANT_RE.search(text):
+            text = jaconv.z2h(text, kana=False, ascii=True, digit=True)
+            text = jaconv.h2z(text, kana=True, ascii=False, digit=False)
+        text = _NON_WORD_RE.sub("", text)
+        for pattern, replacement in self._variant_rules():
+            text = pattern.sub(replacement, text)
+        return text
+
+    def _variant_rules(self) -> list[tuple[re.Pattern, str]]:
+        # Recompiled only when the setting changes
+        source = self.settings.NEAR_DUP_VARIANT_RULES
+        if source != self._rules_source:
+            self._rules = [(re.compile(pattern), replacement) for pattern, replacement in source]
+            self._rules_source = [list(rule) for rule in source]
+        return self._rules
+
+    def cluster(self, lines: list[str]) -> dict[str, list[str]]:
+        """
+        Return {representative: [members...]} in first-seen order. The
+        representative is the first line of its group and is its own first member.
+        """
+        parent = list(range(len(lines)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+        threshold = self.settings.NEAR_DUP_THRESHOLD
+        bands = max(1, min(self.settings.NEAR_DUP_BANDS, self.NUM_PERM))
+        rows = self.NUM_PERM // bands
+
+        by_key = {}
+        shingles_by_index = {}
+        keys_by_index = {}
+        buckets = {}
+        hash_cache = {}  # shingle -> hashes, for this call only so the service does not grow across jobs
+        for i, line in enumerate(lines):
+            key = self.normalize(line) or line
+            if key in by_key:
+                union(i, by_key[key])
+                continue
+            by_key[key] = i
+            if not self.settings.NEAR_DUP_FUZZY:
+                continue
+
+            shingles = self._shingles(key)
+            signature = self._signature(shingles, hash_cache)
+            candidates = set()
+            for band in range(bands):
+                bucket = buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), [])
+                candidates.update(bucket[-self.MAX_BUCKET_CANDIDATES:])
+                bucket.append(i)
+
+            for j in candidates:
+                if find(j) == find(i) or not self.compatible(key, keys_by_index[j]):
+                    continue
+                other = shingles_by_index[j]
+                common = len(shingles & other)
+                if common >= threshold * (len(shingles) + len(other) - common):
+                    union(i, j)
+            shingles_by_index[i] = shingles
+            keys_by_index[i] = key
+
+        groups = {}
+        for i, line in enumerate(lines):
+            groups.setdefault(lines[find(i)], []).append(line)
+        print(f"[cluster] {len(lines)} lines -> {len(groups)} representatives")
+        return groups
+
+    @staticmethod
+    def compatible(key: str, other: str) -> bool:
+        """Whether two normalized keys may be grouped: same ending and the same negative forms."""
+        return key[-_ENDING_CHARS:] == other[-_ENDING_CHARS:] and _NEGATION_RE.findall(key) == _NEGATION_RE.findall(other)
+
+    def expand(self, data: dict, groups: dict[str, list[str]]) -> dict:
+        """
+        Copy each translated representative in data["L"] to the other members
+        of its group, right after it. Modifies data in-place and returns it.
+        """
+        lines = data.get("L")
+        if not isinstance(lines, list):
+            return data
+
+        # The model may echo a line with different punctuation or width
+        by_key = {self.normalize(rep): members for rep, members in groups.items() if len(members) > 1}
+        expanded = []
+        for item in lines:
+            expanded.append(item)
+            if not (isinstance(item, list) and item and isinstance(item[0], str)):
+                continue
+            members = groups.get(item[0]) or by_key.get(self.normalize(item[0]), ())
+            expanded.extend([member, *item[1:]] for member in members if member != item[0])
+        data["L"] = expanded
+        return data
+
+    def _shingles(self, key: str) -> frozenset:
+        n = self.settings.NEAR_DUP_SHINGLE_SIZE
+        if len(key) <= n:
+            return frozenset((key,))
+        return frozenset(key[i:i + n] for i in range(len(key) - n + 1))
+
+    def _signature(self, shingles: frozenset, cache: dict) -> tuple:
+        # Each shingle gets NUM_PERM independent 32-bit hashes from one digest;
+        # the signature is their column-wise minimum.
+        hashes = []
+        for shingle in shingles:
+            values = cache.get(shingle)
+            if values is None:
+                digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=4 * self.NUM_PERM).digest()
+                values = cache[shingle] = struct.unpack(f"<{self.NUM_PERM}I", digest)
+            hashes.append(values)
+        return tuple(map(min, zip(*hashes)))
@@ -0,0 +1,322 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from services.text_manipulation_service import TextManipulationService
+from services.import_service import ImportService
+from services.near_duplicate_service import NearDuplicateService
+from services.reading_service import ReadingService
+from services.word_extraction_service import WordExtractionService
+from services.kanji_index_service import KanjiIndexService
+from services.card_store_service import CardStore
+from services.translation_service import TranslationService
+from services.local_translation_service import LocalTranslationService
+from services.tts_service import TextToSpeechService
+from services.anki_service import AnkiService
+from services.job_cache_service import JobCacheService
+from services.workspace_service import WorkspaceService
+from services.profiling_service import ProfilingService
+from services.credential_session_service import CredentialSessionService
+from services.settings_service import AppSettings
+
+
+class PipelineService:
+    """
+    Runs the deck generation pipeline without any UI:
+    split lines -> translate -> synthesize audio -> package the deck.
+    Each stage is its own method so callers (the generator page, benchmarks)
+    can drive or time them individually.
+
+    With profiling on (PROFILE_RUNS or profile=True) every stage is wrapped in
+    cProfile/tracemalloc and a profile bundle is written next to the package.
+    Stages run on worker threads (run_many, watch mode) are not profiled.
+    Run details that are not timings (e.g. model routing) are collected in
+    self.metrics and written into the bundle as well; run_many records each
+    deck's details in its entry of self.metrics["decks"].
+
+    A job whose fingerprint (lines, title, model, prompt, speaker, encoder,
+    version) matches an earlier package in the output folder is answered
+    from the job cache by cached_package, before any API or engine call.
+    A job with untranslated lines or clips that failed to synthesize or
+    encode is not recorded, so running it again retries them.
+
+    The concurrency limits for OpenAI, the engine and the encoder, as tuned
+    so far, are recorded in self.metrics["concurrency"] when a deck is packaged.
+
+    Batch mode (batch=True, or BATCH_ENABLED by default) waits for the OpenAI
+    Batch API, which can take hours, so the app passes batch=False and only
+    the command line uses it.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path,
+        settings: AppSettings,
+        tts_service: TextToSpeechService = None,
+        credentials: CredentialSessionService = None,
+        profile: bool = None,
+        batch: bool = None,
+    ):
+        self.BASE_DIR = base_dir
+        self.settings = settings
+        if profile is None:
+            profile = settings.PROFILE_RUNS
+        self.profiler = ProfilingService() if profile else None
+        self.batch = settings.BATCH_ENABLED if batch is None else batch
+        self.text_processor = TextManipulationService(base_dir=self.BASE_DIR, settings=settings)
+        self.import_service = ImportService(self.BASE_DIR, settings)
+        self.near_duplicates = NearDuplicateService(self.BASE_DIR, settings)
+        self.readings = ReadingService(self.BASE_DIR, settings)
+        self.word_extractor = WordExtractionService(self.BASE_DIR, settings, self.readings)
+        self.kanji_index = KanjiIndexService(self.BASE_DIR, settings)
+        self.local_translation = LocalTranslationService(self.BASE_DIR, settings)
+        self.translation_service = TranslationService(
+            base_dir=self.BASE_DIR,
+            settings=settings,
+            credentials=credentials,
+            local_translation=self.local_translation,
+        )
+        self.tts_service = tts_service or TextToSpeechService(base_dir=self.BASE_DIR, settings=settings)
+        self.anki_service = AnkiService(self.BASE_DIR, settings)
+        self.job_cache = JobCacheService(self.BASE_DIR, settings, version=self.anki_service.tool_tag)
+        self.workspaces = WorkspaceService(self.BASE_DIR, settings)
+        self.workspaces.start()
+        self.metrics = {}
+
+    def preprocess(self, raw_text) -> list[str]:
+        """
+        Split raw input into unique Japanese-only lines, in first-seen order.
+        raw_text is a string or an iterable of text chunks (e.g. a file read
+        with TextManipulationService.iter_chunks).
+        """
+        if self.profiler:
+            self.profiler.reset()
+        self.metrics = {}
+        chunks = (raw_text,) if isinstance(raw_text, str) else raw_text
+        with self._stage("split_lines"):
+            return list(self.text_processor.iter_source_lines(chunks))
+
+    def preprocess_file(self, path) -> list[str]:
+        """Like preprocess, for a .txt/.srt/.ass/.epub file streamed from disk."""
+        return self.preprocess(self.import_service.iter_chunks(path))
+
+    def translate(self, lines: list[str], pin: str, metrics: dict = None) -> CardStore:
+        """
+        Request translations for the lines and return the L/W/K cards.
+        The L and W romaji (LOCAL_READING_KEYS) and the K items come from
+        local lookups, not the model.
+        With NEAR_DUP_ENABLED only one line per near-duplicate group is sent
+        and its translation is copied to the rest of the group.
+        With WORD_SOURCE = "local" the W words are picked locally from all
+        lines and the model (or the local backend) only glosses them.
+        Raises if the API call fails or the response cannot be parsed.
+        Lines still untranslated after the retries are left out of the deck
+        and counted in metrics["untranslated"].
+        Run details go to metrics, self.metrics by default; callers on worker
+        threads pass their own dict.
+        """
+        if metrics is None:
+            metrics = self.metrics
+        source_lines = lines
+        groups = None
+        if self.settings.NEAR_DUP_ENABLED:
+            with self._stage("collapse_duplicates"):
+                groups = self.near_duplicates.cluster(lines)
+                lines = list(groups)
+        words = None
+        if self.settings.WORD_SOURCE == "local":
+            with self._stage("extract_words"):
+                words = self.word_extractor.extract(source_lines)
+            metrics["words"] = {"kept": len(words)}
+        else:
+            self.readings.warm_up()
+        with self._stage("translation"):
+            data = self._request_translation(lines, pin, metrics, words)
+            if groups:
+                self.near_duplicates.expand(data, groups)
+        translated = {row[0] for row in data["L"]}
+        untranslated = [line for line in source_lines if line not in translated]
+        if untranslated:
+            print(f"[translate] {len(untranslated)} of {len(source_lines)} lines have no translation and are left out")
+            metrics["untranslated"] = len(untranslated)
+        with self._stage("readings"):
+            self.readings.fill_readings(data)
+            data["K"] = self.kanji_index.build_items(source_lines, self.readings)
+        return CardStore.from_data(data, self.settings.TRANSLATION_TYPE_KEYS)
+
+    def _request_translation(self, lines: list[str], pin: str, metrics: dict, words: list[str] = None) -> dict:
+        if self.settings.TRANSLATION_BACKEND == "local":
+            return self.local_translation.request_translation_data(lines, words=words)
+        if self.batch:
+            # No local fallback: an unfinished batch is resumed by running the job again
+            data, metrics["batch"] = self.translation_service.request_batch_translation_data(lines, pin=pin, words=words)
+            return data
+        try:
+            if self.settings.ROUTING_ENABLED:
+                data, metrics["routing"] = self.translation_service.route_translation_data(lines, pin=pin, words=words)
+                return data
+            return self.translation_service.request_translation_data(lines, pin=pin, words=words)
+        except RuntimeError:
+            # OpenAI unreachable; a wrong PIN (ValueError) is not retried locally
+            if not (self.settings.LOCAL_MT_FALLBACK and self.local_translation.is_available()):
+                raise
+            print("[translate] OpenAI request failed, using the local model")
+            return self.local_translation.request_translation_data(lines, words=words)
+
+    def fingerprint(self, lines: list[str], deck_title: str) -> str:
+        """The job cache fingerprint of building deck_title from lines."""
+        return self.job_cache.fingerprint(lines, deck_title)
+
+    def cached_package(self, fingerprint: str, output_dir: str = None) -> Path | None:
+        """The package an identical earlier job wrote to the output folder, or None."""
+        apkg_path = self.job_cache.lookup(fingerprint, self.anki_service.output_folder(output_dir))
+        self.metrics["job_cache"] = {"fingerprint": fingerprint, "hit": apkg_path is not None}
+        return apkg_path
+
+    def synthesize(self, cards: CardStore, metrics: dict = None):
+        """
+        Generate the audio clips for every card, in a new workspace for the job.
+        Clips that failed to synthesize or encode are counted in
+        metrics["failed_clips"] (self.metrics by default, as in translate).
+        """
+        if metrics is None:
+            metrics = self.metrics
+        if cards.media_dir is None:
+            cards.media_dir = self.workspaces.create()
+        with self._stage("generate_wavs"):
+            failed = self.tts_service.generate_wavs(cards)
+        with self._stage("encode_audio"):
+            failed += len(self.tts_service.encode_audio(cards.media_dir, cards))
+        if failed:
+            metrics["failed_clips"] = failed
+
+    def package(self, cards: CardStore, deck_title: str, output_dir: str = None, fingerprint: str = None) -> Path:
+        """
+        Write the .apkg and return its path. The job's workspace is released.
+        With a fingerprint the package is recorded in the job cache, unless
+        self.metrics shows untranslated lines or failed clips.
+        """
+        try:
+            with self._stage("generate_anki_deck"):
+                apkg_path = self.anki_service.generate_anki_deck(cards, deck_title, output_dir=output_dir)
+        finally:
+            self.release(cards)
+        if fingerprint and self._complete(self.metrics):
+            self.job_cache.record(fingerprint, apkg_path, deck_title)
+        elif fingerprint:
+            print("[package] Lines or clips are missing, so the package is not reused for this job")
+        self.metrics["concurrency"] = self.concurrency()
+        if self.profiler:
+            self.profiler.write_bundle(apkg_path.parent, metrics=self.metrics)
+        return apkg_path
+
+    def run(self, raw_text, deck_title: str, pin: str, output_dir: str = None) -> Path:
+        """
+        Run every stage in order and return the path of the written package,
+        or of the cached package when the same job was run before.
+        raw_text is anything preprocess accepts.
+        """
+        lines = self.preprocess(raw_text)
+        fingerprint = self.fingerprint(lines, deck_title)
+        cached = self.cached_package(fingerprint, output_dir=output_dir)
+        if cached:
+            return cached
+        cards, metrics = self._build_deck(lines, pin)
+        self.metrics.update(metrics)
+        return self.package(cards, deck_title, output_dir=output_dir, fingerprint=fingerprint)
+
+    def run_many(self, inputs: list[tuple], package_title: str, pin: str, output_dir: str = None) -> Path:
+        """
+        Build one deck per (title, raw_text) input and write them all into
+        one package named package_title (see AnkiService.generate_combined_deck),
+        so they are imported and synced once. The decks are translated and
+        voiced on COMBINED_DECK_WORKERS threads, within the backends'
+        concurrency limits. Each deck's counts and translation details are
+        reported in self.metrics["decks"]; a deck that fails is left out of
+        the package and reported there with its error. The run raises only
+        when every deck failed. Returns the package path, or the cached package of an
+        identical earlier run.
+        """
+        if self.profiler:
+            self.profiler.reset()
+        self.metrics = {}
+        with self._stage("split_lines"):
+            jobs = [
+                (title, list(self.text_processor.iter_source_lines((raw_text,) if isinstance(raw_text, str) else raw_text)))
+                for title, raw_text in inputs
+            ]
+        fingerprint = self.fingerprint([self.fingerprint(lines, title) for title, lines in jobs], package_title)
+        cached = self.cached_package(fingerprint, output_dir=output_dir)
+        if cached:
+            return cached
+
+        with ThreadPoolExecutor(max_workers=max(1, self.settings.COMBINED_DECK_WORKERS), thread_name_prefix="deck") as executor:
+            futures = [executor.submit(self._build_deck, lines, pin) for _, lines in jobs]
+        built, report, first_error = [], [], None
+        for (title, _), future in zip(jobs, futures):
+            error = future.exception()
+            if error is None:
+                cards, metrics = future.result()
+                built.append((title, cards))
+                report.append({"title": title, **{kind: len(cards.by_kind(kind)) for kind in cards.keys}, **metrics})
+            else:
+                print(f"[run_many] Could not build the deck {title!r}: {error}")
+                report.append({"title": title, "error": str(error)})
+                first_error = first_error or error
+        self.metrics["decks"] = report
+        if not built:
+            raise first_error
+
+        try:
+            with self._stage("generate_anki_deck"):
+                apkg_path = self.anki_service.generate_combined_deck(built, package_title, output_dir=output_dir)
+        finally:
+            for _, cards in built:
+                self.release(cards)
+        if first_error is None and all(self._complete(deck) for deck in report):
+            self.job_cache.record(fingerprint, apkg_path, package_title)
+        self.metrics["concurrency"] = self.concurrency()
+        if self.profiler:
+            self.profiler.write_bundle(apkg_path.parent, metrics=self.metrics)
+        return apkg_path
+
+    def concurrency(self) -> dict:
+        """Current limit and counters of each backend's AdaptiveLimiter."""
+        limiters = (
+            self.translation_service.openai_limit,
+            self.tts_service.engine_limit,
+            self.tts_service.encoder_limit,
+        )
+        return {limiter.name: limiter.snapshot() for limiter in limiters}
+
+    def release(self, cards: CardStore):
+        """Hand the job's workspace to the background cleanup."""
+        self.workspaces.release(cards.media_dir)
+        cards.media_dir = None
+
+    def _build_deck(self, lines: list[str], pin: str) -> tuple[CardStore, dict]:
+        """
+        Translate and voice one deck's lines; the workspace is released if
+        synthesis fails. Returns the cards and the deck's translate metrics,
+        kept apart from self.metrics so decks can be built on several threads.
+        """
+        metrics = {}
+        cards = self.translate(lines, pin, metrics=metrics)
+        try:
+            self.synthesize(cards, metrics=metrics)
+        except BaseException:
+            self.release(cards)
+            raise
+        return cards, metrics
+
+    @staticmethod
+    def _complete(metrics: dict) -> bool:
+        """Whether a deck got every translation and clip, so its package may be reused."""
+        return not metrics.get("untranslated") and not metrics.get("failed_clips")
+
+    def _stage(self, name: str):
+        # Python 3.12+ allows one active cProfile profiler, so only the main thread's stages are profiled
+        if self.profiler and threading.current_thread() is threading.main_thread():
+            return self.profiler.stage(name)
+        return nullcontext()
@@ -1,6 +1,6 @@
 # services/popup_service.py
 
-from PySide6.QtWidgets import QMessageBox, QWidget
+from PySide6.QtWidgets import QApplication, QMessageBox, QWidget
 
 class PopupService:
     @staticmethod
@@ -9,6 +9,22 @@ class PopupService:
             message = (
                 "An unexpected error occurred."
             )
+        if QApplication.instance() is None:
+            # Headless (CLI) run: there is no window to show a dialog on
+            print(f"[{title}] {message}")
+            return
+        QMessageBox.information(
+            parent,
+            title,
+            message,
+            QMessageBox.Ok
+        )
+
+    @staticmethod
+    def show_info_popup(parent: QWidget, title: str, message: str):
+        if QApplication.instance() is None:
+            print(f"[{title}] {message}")
+            return
         QMessageBox.information(
             parent,
             title,
@@ -0,0 +1,90 @@
+import cProfile
+import json
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import time
+
+
+class ProfilingService:
+    """
+    Wraps pipeline stages in cProfile and tracemalloc and writes a profile
+    bundle: one .pstats file per stage, the top allocations per stage and a
+    summary.json. Only created when profiling is switched on, so normal runs
+    never pay for it.
+    """
+
+    def __init__(self, top_allocations: int = 25):
+        self.top_allocations = top_allocations
+        self._stages = []
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            self._stages.append({
+                "name": name,
+                "seconds": seconds,
+                "peak_kb": peak // 1024,
+                "profiler": profiler,
+                "allocations": after.compare_to(before, "lineno")[:self.top_allocations],
+            })
+
+    def write_bundle(self, output_dir: Path, metrics: dict = None) -> Path:
+        """
+        Write everything recorded so far into output_dir/profile_<timestamp>/
+        and reset for the next run. metrics, if given, goes to metrics.json.
+        Returns the bundle folder.
+        """
+        bundle_dir = Path(output_dir) / f"profile_{datetime.now():%m-%d-%Y_%H-%M-%S}"
+        bundle_dir.mkdir(parents=True, exist_ok=True)
+
+        summary = []
+        with open(bundle_dir / "allocations.txt", "w", encoding="utf-8") as f:
+            for i, stage in enumerate(self._stages, start=1):
+                pstats_name = f"{i:02d}_{stage['name']}.pstats"
+                stage["profiler"].dump_stats(str(bundle_dir / pstats_name))
+
+                f.write(f"=== {stage['name']} ({stage['seconds']:.3f}s, peak {stage['peak_kb']} KiB) ===\n")
+                for stat in stage["allocations"]:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+
+                summary.append({
+                    "stage": stage["name"],
+                    "seconds": round(stage["seconds"], 6),
+                    "peak_kb": stage["peak_kb"],
+                    "pstats": pstats_name,
+                })
+
+        with open(bundle_dir / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        if metrics:
+            with open(bundle_dir / "metrics.json", "w", encoding="utf-8") as f:
+                json.dump(metrics, f, indent=2, ensure_ascii=False)
+
+        self.reset()
+        print(f"[write_bundle] Profile written to: {bundle_dir.resolve()}")
+        return bundle_dir
+
+    def reset(self):
+        self._stages = []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from services.settings_service import AppSettings
+
+# Particles pykakasi reads literally when they stand alone
+_PARTICLE_READINGS = {"は": "wa", "へ": "e", "を": "o"}
+
+
+class ReadingService:
+    """
+    Produces Hepburn romaji locally with pykakasi, so the model is only asked
+    for translations. The converter is loaded once per process on first use
+    and readings are memoized (READING_CACHE_SIZE most recent texts).
+    """
+    _kakasi = None
+    _kakasi_lock = threading.Lock()
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.base_dir = base_dir
+        self.settings = settings
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _converter(cls):
+        with cls._kakasi_lock:
+            if cls._kakasi is None:
+                import pykakasi
+                cls._kakasi = pykakasi.kakasi()
+            return cls._kakasi
+
+    def warm_up(self):
+        """Load the converter in a background thread (e.g. while waiting for the API)."""
+        threading.Thread(target=self._converter, daemon=True).start()
+
+    def romanize(self, text: str) -> str:
+        return self.romanize_batch([text])[text]
+
+    def romanize_batch(self, texts) -> dict[str, str]:
+        """Return {text: romaji}, converting each distinct uncached text once."""
+        result = {}
+        with self._lock:
+            for text in texts:
+                if text in result:
+                    continue
+                reading = self._cache.get(text)
+                if reading is None:
+                    reading = self._convert(text)
+                    self._cache[text] = reading
+                    if len(self._cache) > self.settings.READING_CACHE_SIZE:
+                        self._cache.popitem(last=False)
+                else:
+                    self._cache.move_to_end(text)
+                result[text] = reading
+        return result
+
+    def segment(self, text: str) -> list[str]:
+        """Split text into pykakasi's tokens (words, with okurigana and some particles attached)."""
+        with self._lock:
+            return [token["orig"] for token in self._converter().convert(text)]
+
+    def _convert(self, text: str) -> str:
+        parts = []
+        for token in self._converter().convert(text):
+            reading = _PARTICLE_READINGS.get(token["orig"], token["hepburn"]).strip()
+            if not reading:
+                continue
+            if parts and not reading[0].isalnum():
+                parts[-1] += reading  # keep punctuation on the previous word
+            else:
+                parts.append(reading)
+        return " ".join(parts)
+
+    def fill_readings(self, data: dict) -> dict:
+        """
+        Set the romaji column (third element) of every L and W item from its
+        Japanese text, replacing anything the model returned there.
+        Modifies data in-place and returns it.
+        """
+        items = [
+            item
+            for key in self.settings.LOCAL_READING_KEYS
+            if isinstance(data.get(key), list)
+            for item in data[key]
+            if isinstance(item, list) and item and isinstance(item[0], str)
+        ]
+        readings = self.romanize_batch(item[0] for item in items)
+        for item in items:
+            if len(item) < 2:
+                item.append("")
+            item[2:] = [readings[item[0]]]
+        return data
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from services.settings_service import AppSettings
+
+
+class ResponseParserService:
+    """
+    Parses translation responses into {"L": [[line, english], ...], "W": [...]}.
+
+    The compact "tsv" format (prompt_compact.txt) is one row per item under
+    section markers:
+
+        #L
+        猫は空を見た<TAB>The cat saw the sky
+        #W
+        空<TAB>sky
+
+    Rows are read as the text arrives and a malformed row is skipped instead
+    of failing the response (fields after the first two are ignored), so a truncated reply still yields every complete
+    row. The "json" format is the one-line JSON of prompt.txt.
+    """
+    SECTION_PREFIX = "#"
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.base_dir = base_dir
+        self.settings = settings
+
+    def parse(self, content: str, truncated: bool = False) -> dict:
+        """
+        Parse a whole response. With truncated=True (the model hit its token
+        limit) the final unterminated row is dropped as possibly cut off.
+        """
+        if self.settings.RESPONSE_FORMAT == "json" or content.lstrip().startswith("{"):
+            return json.loads(content)
+        data = {}
+        for section, row in self.iter_rows((content,), truncated=truncated):
+            data.setdefault(section, []).append(row)
+        return data
+
+    def iter_rows(self, chunks: Iterable[str], truncated: bool = False) -> Iterator[tuple[str, list[str]]]:
+        """Yield (section, [fields...]) for every complete row in a stream of text chunks."""
+        section = None
+        partial = ""
+        for chunk in chunks:
+            lines = (partial + chunk).split("\n")
+            partial = lines.pop()
+            for line in lines:
+                section, row = self._parse_line(line, section)
+                if row:
+                    yield section, row
+        if partial and not truncated:
+            section, row = self._parse_line(partial, section)
+            if row:
+                yield section, row
+
+    def _parse_line(self, line: str, section: str) -> tuple[str, list[str] | None]:
+        line = line.strip("\r ")
+        if not line or line.startswith("```"):
+            return section, None
+        if line.startswith(self.SECTION_PREFIX):
+            return line[len(self.SECTION_PREFIX):].strip().upper() or section, None
+        if section not in self.settings.TRANSLATION_TYPE_KEYS:
+            return section, None
+
+        fields = [field.strip() for field in line.split("\t")]
+        if len(fields) < 2 or not all(fields[:2]):
+            print(f"[_parse_line] Skipped malformed row: {line!r}")
+            return section, None
+        return section, fields[:2]
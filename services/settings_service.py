@@ -1,83 +1,390 @@
+from dataclasses import dataclass, field, fields, replace
 from pathlib import Path
 import importlib.util
+import json
 import os
 import base64
+import typing
 
 from services.encryption_service import EncryptionService
 
 
+@dataclass
+class AppSettings:
+    """
+    Typed view of settings.py. Loaded once by SettingsService and shared by
+    every service and page, so changes made at runtime are seen everywhere.
+    Defaults mirror settings.py and cover names an older settings.py lacks.
+    """
+    # Paths & I/O
+    TMP_MP3_DIR: str = "tmp_mp3"
+    OUTPUT_DIR: str = ""
+    VOICEVOX_PATH: str = ""
+    PROMPT_FILE: str = "prompt.txt"
+    DEBUG_INPUT_FILE: str = "debugging/input.txt"
+    DEBUG_RESPONSE_FILE: str = "debugging/response.txt"
+    WORKSPACE_QUOTA_MB: int = 2048
+    WORKSPACE_KEEP_FINISHED: bool = False
+    CSS_FILE: str = "anki_style.txt"
+    ICON_FILE: str = "icons/icon.png"
+
+    # VOICEVOX / TTS
+    API_URL: str = "127.0.0.1"
+    API_PORT: str = "50021"
+    AUDIO_QUERY_ENDPOINT: str = "/audio_query"
+    AUDIO_SYNTHESIS_ENDPOINT: str = "/synthesis"
+    MULTI_SYNTHESIS_ENDPOINT: str = "/multi_synthesis"
+    MULTI_SYNTHESIS_ENABLED: bool = True
+    MULTI_SYNTHESIS_MAX_BATCH: int = 32
+    MULTI_SYNTHESIS_MAX_MORAS: int = 400
+    TTS_MAX_CHUNK_MORAS: int = 60
+    TTS_CROSSFADE_MS: float = 15.0
+    AUDIO_QUERY_CACHE_SIZE: int = 20000
+    SLOW_AUDIO_ENABLED: bool = False
+    SLOW_AUDIO_SPEED: float = 0.75
+    VOICEVOX_SPEAKER: int = 2
+
+    # Audio encoding
+    AUDIO_ENCODER: str = "mp3"
+    MP3_VBR_QUALITY: int = 6
+    MP3_BITRATE: int = 128
+    MP3_QUALITY: int = 2
+    OPUS_BITRATE: int = 24
+
+    # Concurrency
+    AUTOTUNE_ENABLED: bool = True
+    AUTOTUNE_LIMITS: dict[str, list[int]] = field(default_factory=lambda: {
+        "openai": [1, 2, 8],
+        "engine": [1, 4, 16],
+        "encoder": [1, 2, 0],
+    })
+    AUTOTUNE_BACKOFF: float = 0.5
+    AUTOTUNE_LATENCY_TOLERANCE: float = 2.0
+
+    # Application window
+    WINDOW_TITLE: str = "Anki Deck Generator"
+    WINDOW_LENGTH: int = 600
+    WINDOW_WIDTH: int = 800
+    ICON_SIZE: int = 64
+    FONT_SIZE: int = 16
+    MARGINS: list[int] = field(default_factory=lambda: [20, 20, 20, 20])
+    SPACING: int = 16
+
+    # Text processing
+    SEGMENT_CHUNK_SIZE: int = 65536
+    DEDUP_MAX_ENTRIES: int = 200000
+    IMPORT_CHUNK_BYTES: int = 1048576
+    IMPORT_ENCODINGS: list[str] = field(default_factory=lambda: ["utf-8", "cp932"])
+
+    # Near-duplicate lines
+    NEAR_DUP_ENABLED: bool = True
+    NEAR_DUP_FUZZY: bool = False
+    NEAR_DUP_THRESHOLD: float = 0.8
+    NEAR_DUP_SHINGLE_SIZE: int = 2
+    NEAR_DUP_BANDS: int = 4
+    NEAR_DUP_VARIANT_RULES: list[list[str]] = field(default_factory=lambda: [
+        ["[ーｰ〜～]+$", ""],
+        ["([ぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮ])\\1+", "\\1"],
+        ["(.)\\1{2,}", "\\1\\1"],
+    ])
+
+    # Deck & card defaults
+    DEFAULT_TITLE: str = ""
+    SUBDECK_NAMES: dict[str, str] = field(default_factory=lambda: {"L": "Lines", "W": "Words", "K": "Kanji"})
+    CARD_MODEL: int = 1607392319
+    COMBINED_DECK_WORKERS: int = 3
+    TRANSLATION_TYPE_KEYS: list[str] = field(default_factory=lambda: ["L", "W", "K"])
+
+    # Job cache
+    JOB_CACHE_ENABLED: bool = True
+    JOB_CACHE_INDEX: str = ".deck_index.json"
+    JOB_CACHE_COPY: bool = False
+
+    # Watch mode
+    WATCH_DEBOUNCE: float = 2.0
+    WATCH_POLLING: bool = False
+    WATCH_POLL_INTERVAL: float = 5.0
+    WATCH_MAX_JOBS: int = 2
+    WATCH_STATE_DIR: str = "watch_state"
+
+    # AI / translation
+    AI_MODEL: str = "gpt-4o-mini"
+    MAX_TOKENS: int = 16000
+    TEMPERATURE: float = 0.2
+    RESPONSE_FORMAT: str = "tsv"
+    COMPACT_PROMPT_FILE: str = "prompt_compact.txt"
+    WORDS_PROMPT_FILE: str = "prompt_words.txt"
+    COMPACT_WORDS_PROMPT_FILE: str = "prompt_compact_words.txt"
+    TRANSLATION_RETRIES: int = 1
+    TRANSLATION_CHUNK_LINES: int = 200
+
+    # Word extraction
+    WORD_SOURCE: str = "model"
+    WORD_MIN_COUNT: int = 1
+    WORD_MAX_COUNT: int = 150
+    WORD_KANA_ONLY: bool = False
+    WORD_STOP_FILE: str = ""
+    WORD_STOP_LIST: list[str] = field(default_factory=lambda: [
+        "私", "僕", "俺", "君", "あなた", "彼", "彼女", "人", "事", "物", "時", "今", "何",
+        "ここ", "そこ", "これ", "それ", "あれ", "する", "いる", "ある", "なる", "言う",
+    ])
+
+    # Model routing
+    ROUTING_ENABLED: bool = False
+    ROUTE_EASY_MAX_CHARS: int = 12
+    ROUTE_EASY_MAX_KANJI: int = 2
+    ROUTE_EASY_BACKEND: str = "openai"
+    ROUTE_EASY_MODEL: str = "gpt-4o-mini"
+    ROUTE_HARD_MODEL: str = "gpt-4o"
+    ROUTE_LATENCY_BUDGET: float = 120.0
+    MODEL_PRICES: dict[str, list[float]] = field(default_factory=lambda: {
+        "gpt-4o-mini": [0.15, 0.60],
+        "gpt-4o": [2.50, 10.00],
+        "gpt-4.1-nano": [0.10, 0.40],
+        "gpt-4.1-mini": [0.40, 1.60],
+    })
+
+    # Batch mode
+    BATCH_ENABLED: bool = False
+    BATCH_DIR: str = "batch_jobs"
+    BATCH_LINES_PER_REQUEST: int = 100
+    BATCH_COMPLETION_WINDOW: str = "24h"
+    BATCH_POLL_INTERVAL: float = 60.0
+    BATCH_MAX_WAIT: float = 0.0
+    BATCH_PRICE_FACTOR: float = 0.5
+    LOCAL_READING_KEYS: list[str] = field(default_factory=lambda: ["L", "W"])
+    READING_CACHE_SIZE: int = 50000
+    KANJI_INDEX_FILE: str = "kanji_index.bin"
+    KANJI_MAX_MEANINGS: int = 3
+
+    # Local translation
+    TRANSLATION_BACKEND: str = "openai"
+    LOCAL_MT_MODEL_DIR: str = ""
+    LOCAL_MT_FALLBACK: bool = True
+    LOCAL_MT_THREADS: int = 0
+    LOCAL_MT_QUANTIZE: bool = True
+    LOCAL_MT_BATCH_SIZE: int = 16
+    LOCAL_MT_MAX_LENGTH: int = 256
+    LOCAL_MT_NUM_BEAMS: int = 1
+
+    # API key security
+    KEY_KDF: str = "scrypt:n=32768,r=8,p=1"
+    CREDENTIAL_IDLE_TTL: int = 900
+
+    # Debug flags & terms
+    DEBUG_INPUT: bool = False
+    DEBUG_API: bool = False
+    PROFILE_RUNS: bool = False
+    TERMS_AGREEMENT_AGREED_TO: bool = False
+
+    @classmethod
+    def from_module(cls, module) -> "AppSettings":
+        """Build settings from a loaded settings.py module."""
+        values = {f.name: getattr(module, f.name) for f in fields(cls) if hasattr(module, f.name)}
+        return cls(**values)
+
+
+_SETTING_TYPES = {f.name: f.type for f in fields(AppSettings)}
+
+
+def _matches(value, expected) -> bool:
+    origin = typing.get_origin(expected)
+    if origin is list:
+        (item_type,) = typing.get_args(expected)
+        return isinstance(value, list) and all(_matches(v, item_type) for v in value)
+    if origin is dict:
+        key_type, value_type = typing.get_args(expected)
+        return isinstance(value, dict) and all(
+            _matches(k, key_type) and _matches(v, value_type) for k, v in value.items()
+        )
+    if expected is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, expected)
+
+
+def validate_setting(key: str, value):
+    """
+    Check a value against the AppSettings schema and return it (ints are
+    widened to float where a float is expected). Raises ValueError.
+    """
+    expected = _SETTING_TYPES.get(key)
+    if expected is None:
+        raise ValueError(f"unknown setting '{key}'")
+    if not _matches(value, expected):
+        expected_name = expected.__name__ if isinstance(expected, type) else str(expected)
+        raise ValueError(f"expected {expected_name}, got {value!r}")
+    return float(value) if expected is float else value
+
+
 class SettingsService:
+    """
+    Loads settings.py as the shipped defaults and overlays the user's
+    choices from config.json. Changes go through update(), which validates
+    them against AppSettings, writes config.json atomically and notifies the
+    subscribers whose keys changed, so they apply without a restart.
+    """
+    CONFIG_FILE = "config.json"
+
     def __init__(self, base_dir: Path):
         self.base_dir = base_dir
         self.encryption_service = EncryptionService()
-        self._settings_cache = {
-            "OUTPUT_DIR": None,
-            "VOICEVOX_PATH": None,
-        }
         self.settings = None
+        self._defaults = None
+        self._overrides = {}
+        self._config_mtime = None
+        self._subscribers = []
+        self._credentials = None
+
+    @property
+    def credentials(self):
+        """The CredentialSessionService shared by everything that needs the API key."""
+        if self._credentials is None:
+            if self.settings is None:
+                raise RuntimeError("Settings not loaded.")
+            from services.credential_session_service import CredentialSessionService
+            self._credentials = CredentialSessionService(self.base_dir, self.settings, self.encryption_service)
+        return self._credentials
+
+    @property
+    def config_path(self) -> Path:
+        return self.base_dir / self.CONFIG_FILE
 
-    def load_settings(self):
+    def load_settings(self) -> AppSettings:
         settings_path = self.base_dir / "settings.py"
         spec = importlib.util.spec_from_file_location("settings", str(settings_path))
-        settings = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(settings)
+        settings_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(settings_module)
+        settings = AppSettings.from_module(settings_module)
+        self._defaults = replace(settings)
+
+        self._overrides = self._read_config()
+        for key, value in self._overrides.items():
+            setattr(settings, key, value)
         self.settings = settings
+        return settings
 
-        self._settings_cache["OUTPUT_DIR"] = settings.OUTPUT_DIR
-        self._settings_cache["VOICEVOX_PATH"] = settings.VOICEVOX_PATH
+    def _read_config(self) -> dict:
+        """Read config.json, dropping (and reporting) entries that fail validation."""
+        try:
+            self._config_mtime = self.config_path.stat().st_mtime
+            with open(self.config_path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[_read_config] Ignoring unreadable {self.CONFIG_FILE}: {e}")
+            return {}
+        if not isinstance(raw, dict):
+            print(f"[_read_config] Ignoring {self.CONFIG_FILE}: expected an object")
+            return {}
 
-        return settings
+        valid = {}
+        for key, value in raw.items():
+            try:
+                valid[key] = validate_setting(key, value)
+            except ValueError as e:
+                print(f"[_read_config] Skipping {key}: {e}")
+        return valid
 
     def save_settings(self):
-        settings_path = self.base_dir / "settings.py"
+        """Write the user's overrides to config.json via write-then-rename."""
+        tmp_path = self.config_path.with_name(self.CONFIG_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._overrides, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.config_path)
+        self._config_mtime = self.config_path.stat().st_mtime
+
+    def update(self, **changes) -> dict:
+        """
+        Validate and apply setting changes, persist them and notify
+        subscribers. Returns only the values that actually changed.
+        """
+        if self.settings is None:
+            raise RuntimeError("Settings not loaded.")
+        validated = {key: validate_setting(key, value) for key, value in changes.items()}
+        changed = {key: value for key, value in validated.items() if getattr(self.settings, key) != value}
+        self._overrides.update(validated)
+        for key, value in changed.items():
+            setattr(self.settings, key, value)
+        self.save_settings()
+        self._notify(changed)
+        return changed
+
+    def reload_if_changed(self) -> dict:
+        """
+        Re-read config.json if it was edited outside the app and apply the
+        differences live. Returns the values that changed.
+        """
+        try:
+            mtime = self.config_path.stat().st_mtime
+        except FileNotFoundError:
+            return {}
+        if self.settings is None or mtime == self._config_mtime:
+            return {}
+
+        previous_keys = set(self._overrides)
+        self._overrides = self._read_config()
+        # Keys removed from the file fall back to their settings.py defaults
+        target = {key: getattr(self._defaults, key) for key in previous_keys - set(self._overrides)}
+        target.update(self._overrides)
+        changed = {key: value for key, value in target.items() if getattr(self.settings, key) != value}
+        for key, value in changed.items():
+            setattr(self.settings, key, value)
+        self._notify(changed)
+        return changed
 
-        with open(settings_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        replacements = {
-            "OUTPUT_DIR": f'r"{self._settings_cache["OUTPUT_DIR"]}"',
-            "VOICEVOX_PATH": f'r"{self._settings_cache["VOICEVOX_PATH"]}"',
-            "TERMS_AGREEMENT_AGREED_TO": str(getattr(self.settings, "TERMS_AGREEMENT_AGREED_TO", False)),
-        }
-
-        updated_lines = []
-        for line in lines:
-            updated = False
-            for key, val in replacements.items():
-                if line.strip().startswith(f"{key}"):
-                    updated_lines.append(f'{key} = {val}\n')
-                    updated = True
-                    break
-            if not updated:
-                updated_lines.append(line)
-
-        with open(settings_path, "w", encoding="utf-8") as f:
-            f.writelines(updated_lines)
+    def subscribe(self, callback, keys=None):
+        """
+        Call callback(changed) whenever one of keys changes (any key if None).
+        changed maps each changed key to its new value.
+        """
+        self._subscribers.append((callback, set(keys) if keys else None))
+
+    def _notify(self, changed: dict):
+        for callback, keys in self._subscribers:
+            relevant = changed if keys is None else {k: v for k, v in changed.items() if k in keys}
+            if relevant:
+                callback(relevant)
 
     # Output Folder
     def get_output_folder(self) -> str:
-        return self._settings_cache["OUTPUT_DIR"]
+        return self.settings.OUTPUT_DIR
 
     def set_output_folder(self, folder_path: str):
-        self._settings_cache["OUTPUT_DIR"] = folder_path
-        self.settings.OUTPUT_DIR = folder_path
+        self.update(OUTPUT_DIR=folder_path)
 
     # VOICEVOX Path
     def get_voicevox_path(self) -> str:
-        return self._settings_cache["VOICEVOX_PATH"]
+        return self.settings.VOICEVOX_PATH
 
     def set_voicevox_path(self, path: str) -> bool:
-        previous = self._settings_cache["VOICEVOX_PATH"]
-        self._settings_cache["VOICEVOX_PATH"] = path
-        self.settings.VOICEVOX_PATH = path
-        return previous != path  # True if changed
+        return "VOICEVOX_PATH" in self.update(VOICEVOX_PATH=path)  # True if changed
+
+    # VOICEVOX Speaker
+    def get_voicevox_speaker(self) -> int:
+        return self.settings.VOICEVOX_SPEAKER
+
+    def set_voicevox_speaker(self, speaker: int):
+        self.update(VOICEVOX_SPEAKER=speaker)
+
+    # Translation backend
+    def get_translation_backend(self) -> str:
+        return self.settings.TRANSLATION_BACKEND
+
+    def get_local_model_dir(self) -> str:
+        return self.settings.LOCAL_MT_MODEL_DIR
+
+    # Audio encoder
+    def get_audio_encoder(self) -> str:
+        return self.settings.AUDIO_ENCODER
 
     # Terms Agreement
     def set_terms_accepted(self):
-        if self.settings is None:
-            raise RuntimeError("Settings not loaded.")
-        self.settings.TERMS_AGREEMENT_AGREED_TO = True
-        self.save_settings()
+        self.update(TERMS_AGREEMENT_AGREED_TO=True)
 
     def is_terms_accepted(self) -> bool:
         if self.settings is None:
@@ -87,33 +394,20 @@ class SettingsService:
     # API Key Management
     def encrypt_and_store_api_key(self, api_key: str, pin: str):
         """
-        Encrypts and saves the API key with provided PIN,
-        writes base64 encoded data, salt, and iv into keys.py
+        Encrypts and saves the API key with provided PIN into keys.py,
+        using the KDF from KEY_KDF. Locks the credential session.
         """
-        salt = os.urandom(16)
-        key = self.encryption_service.derive_key(pin, salt)
-        iv, encrypted = self.encryption_service.encrypt(api_key, key)
-
-        encoded_salt = base64.b64encode(salt).decode()
-        encoded_iv = base64.b64encode(iv).decode()
-        encoded_data = base64.b64encode(encrypted).decode()
-
-        key_file = self.base_dir / "keys.py"
-        with open(key_file, "w", encoding="utf-8") as f:
-            f.write(f'ENCRYPTED_API_KEY = "{encoded_data}"\n')
-            f.write(f'SALT = "{encoded_salt}"\n')
-            f.write(f'IV = "{encoded_iv}"\n')
+        self.credentials.store_api_key(api_key, pin)
 
     # Optional utility if needed externally
-    def save_all(self, api_key: str = None, pin: str = None) -> bool:
+    def save_all(self, api_key: str = None, pin: str = None, **changes) -> dict:
         """
         Saves all settings including optional encrypted API key.
-        Returns True if VOICEVOX path was changed (requires restart).
+        Returns the settings that changed; subscribers have already applied them.
         """
-        voicevox_changed = self.set_voicevox_path(self.get_voicevox_path())
-        self.save_settings()
+        changed = self.update(**changes)
 
         if api_key and pin:
             self.encrypt_and_store_api_key(api_key, pin)
 
-        return voicevox_changed
+        return changed
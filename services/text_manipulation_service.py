@@ -1,55 +1,128 @@
 import sys
+from collections import deque
+from itertools import islice
 from pathlib import Path
 import re
-from settings import DEBUG_INPUT, DEBUG_INPUT_FILE, TRANSLATION_TYPE_KEYS
+from typing import Iterable, Iterator, TextIO
+from services.settings_service import AppSettings
+
+SENTENCE_END = ".。！？!?"
+QUOTE_OPEN = "「『"
+QUOTE_CLOSE = "」』"
+_NEWLINE_RE = re.compile(r"[\r\n]+")
+_QUOTE_RE = re.compile("[" + re.escape(QUOTE_OPEN + QUOTE_CLOSE) + "]")
+_SENTENCE_SPLIT_RE = re.compile("[" + re.escape(SENTENCE_END) + "]")
+_BOUNDARY_RE = re.compile("[" + re.escape(SENTENCE_END + QUOTE_OPEN + QUOTE_CLOSE) + "]")
+_NON_SOURCE_RE = re.compile(r"[^\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\n]+")
 
 class TextManipulationService:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, settings: AppSettings):
         # Resolve BASE_DIR for both dev and PyInstaller contexts if not provided
         self.base_dir = base_dir
+        self.settings = settings
 
     def split_lines(self, text: str) -> str:
         """
         Split text into lines at line-ending punctuation (., 。, !, ！, ?, ？)
         (removing that punctuation and any following spaces), OR at any
         existing newline. Returns a clean, stripped list joined by '\n'.
+        Punctuation inside 「」 or 『』 does not split the line.
         """
-        # Split on:
-        #  - any of .  。  ！  !  ?  ？  followed by optional spaces
-        #  - OR one or more newline characters
-        parts = re.split(r'[\.。！？!?]\s*|\r?\n+', text)
+        return "\n".join(self.iter_sentences((text,)))
 
-        # Trim whitespace and drop empty pieces
-        lines = [p.strip() for p in parts if p.strip()]
+    def extract_unique_lines(self, raw_text: str) -> list[str]:
+        """Process raw lines into unique lines (deduplicated, non-empty), in first-seen order."""
+        return list(self.iter_unique(filter(None, raw_text.splitlines())))
 
-        return "\n".join(lines)
+    def iter_chunks(self, stream: TextIO, chunk_size: int = None) -> Iterator[str]:
+        """Read a text stream in chunks of SEGMENT_CHUNK_SIZE characters."""
+        chunk_size = chunk_size or self.settings.SEGMENT_CHUNK_SIZE
+        return iter(lambda: stream.read(chunk_size), "")
 
-    def extract_unique_lines(self, raw_text: str) -> list[str]:
-        """Process raw lines into unique lines (deduplicated, non-empty)."""
-        lines = set(filter(None, raw_text.splitlines()))
-        return sorted(lines)
+    def iter_sentences(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Streaming form of split_lines: yields stripped, non-empty sentences
+        from text that arrives in chunks. Only the unfinished last line of a
+        chunk is carried over, so sentences and quotes may span chunk
+        boundaries. A newline always ends a sentence and closes any open
+        quote, so one stray 「 cannot swallow the rest of the input.
+        """
+        carry = []
+        for chunk in chunks:
+            carry.append(chunk)
+            if not _NEWLINE_RE.search(chunk):
+                continue
+            lines = _NEWLINE_RE.split("".join(carry))
+            carry = [lines.pop()]
+            for line in lines:
+                yield from self._line_sentences(line)
+        yield from self._line_sentences("".join(carry))
+
+    def _line_sentences(self, line: str) -> Iterator[str]:
+        if not _QUOTE_RE.search(line):
+            # Common case: no quotes, let the regex engine do the splitting
+            for part in _SENTENCE_SPLIT_RE.split(line):
+                part = part.strip()
+                if part:
+                    yield part
+            return
 
-    def add_indices_to_data(self, data: dict) -> dict:
+        depth = 0
+        start = 0
+        for match in _BOUNDARY_RE.finditer(line):
+            char = match.group()
+            if char in QUOTE_OPEN:
+                depth += 1
+            elif char in QUOTE_CLOSE:
+                depth = max(0, depth - 1)
+            elif depth == 0:
+                part = line[start:match.start()].strip()
+                if part:
+                    yield part
+                start = match.end()
+        part = line[start:].strip()
+        if part:
+            yield part
+
+    def iter_unique(self, lines: Iterable[str], max_entries: int = None) -> Iterator[str]:
+        """
+        Yield each line the first time it is seen, keeping input order.
+        Memory is bounded: only the last DEDUP_MAX_ENTRIES distinct lines are
+        remembered, so a repeat further back than that is let through.
         """
-        Adds a unique string index as the first element of each array in L, W, K.
-        Modifies data in-place and returns it.
+        max_entries = max_entries or self.settings.DEDUP_MAX_ENTRIES
+        seen = set()
+        order = deque()
+        for line in lines:
+            if line in seen:
+                continue
+            seen.add(line)
+            order.append(line)
+            if len(order) > max_entries:
+                seen.discard(order.popleft())
+            yield line
+
+    def iter_source_lines(self, chunks: Iterable[str]) -> Iterator[str]:
         """
-        idx = 1
-        for key in TRANSLATION_TYPE_KEYS:
-            if key in data and isinstance(data[key], list):
-                for item in data[key]:
-                    if isinstance(item, list):
-                        item.insert(0, str(idx))
-                        idx += 1
-        return data
+        Streaming split_lines -> remove_non_source_language -> extract_unique_lines
+        in a single pass, without holding intermediate copies of the text.
+        """
+        return self.iter_unique(self._iter_cleaned(self.iter_sentences(chunks)))
+
+    def _iter_cleaned(self, sentences: Iterator[str], batch_size: int = 1024) -> Iterator[str]:
+        # Filter in batches: one regex pass over joined sentences beats one per sentence
+        batch = list(islice(sentences, batch_size))
+        while batch:
+            yield from filter(None, _NON_SOURCE_RE.sub("", "\n".join(batch)).split("\n"))
+            batch = list(islice(sentences, batch_size))
 
     def get_default_input(self) -> str:
         """
         Returns the contents of input.txt if DEBUG_INPUT is True and the file exists,
         else returns an empty string.
         """
-        default_input_path = self.base_dir / DEBUG_INPUT_FILE
-        if DEBUG_INPUT and default_input_path.exists():
+        default_input_path = self.base_dir / self.settings.DEBUG_INPUT_FILE
+        if self.settings.DEBUG_INPUT and default_input_path.exists():
             with open(default_input_path, encoding="utf-8") as f:
                 return f.read()
         return ""
@@ -65,10 +138,6 @@ class TextManipulationService:
         Everything else (ASCII letters, numbers, Latin punctuation, etc.)
         is removed.
         """
-        # This regex matches any character NOT in the Japanese blocks;
+        # _NON_SOURCE_RE matches any character NOT in the Japanese blocks;
         # we replace those with empty string.
-        return re.sub(
-            r"[^\u3000-\u303F\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\n]+",
-            "",
-            text
-        )
+        return _NON_SOURCE_RE.sub("", text)
@@ -1,68 +1,482 @@
+import hashlib
+import json
+import re
 import sys
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-import importlib.util
-import openai
-from settings import DEBUG_API, AI_MODEL, MAX_TOKENS, TEMPERATURE, PROMPT_FILE, DEBUG_RESPONSE_FILE
-from services.encryption_service import EncryptionService
+from services.concurrency_service import AdaptiveLimiter
+from services.credential_session_service import CredentialSessionService
+from services.response_parser_service import ResponseParserService
+from services.settings_service import AppSettings
+
+_KANJI_RANGE = ("\u4E00", "\u9FFF")
+_QUOTES = "「『"
+
+
+def _line_key(text: str) -> str:
+    """A line as compared with the model's echo of it: NFKC, without spaces or punctuation."""
+    return re.sub(r"[\W_]+", "", unicodedata.normalize("NFKC", text))
+
 
 class TranslationService:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, settings: AppSettings, credentials: CredentialSessionService = None, local_translation=None):
         self.BASE_DIR = base_dir
-        self.encryption_service = EncryptionService()
-        # load keys module from base_dir/keys.py
-        spec = importlib.util.spec_from_file_location(
-            "local_keys",                       # arbitrary module name
-            str(self.BASE_DIR / "keys.py")      # path to the keys file
-        )
-        local_keys = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(local_keys)
-        # stash the values on self for later
-        self._encrypted_api_key = local_keys.ENCRYPTED_API_KEY
-        self._salt              = local_keys.SALT
-        self._iv                = local_keys.IV
-
-    def request_translation_api(self, lines: list[str], pin: str, prompt_path: str = PROMPT_FILE) -> str:
-        if DEBUG_API:
-            return self.request_translation_api_debug(lines, response_path=self.BASE_DIR / DEBUG_RESPONSE_FILE)
-
-        if not pin:
-            raise ValueError("PIN must be provided to decrypt the API key.")
-
-        # decrypt from the locally loaded keys.py
-        api_key = self.encryption_service.decrypt(
-            pin,
-            self._encrypted_api_key,
-            self._salt,
-            self._iv,
-        )
-        if not api_key:
-            raise ValueError("Invalid PIN or failed to decrypt API key.")
+        self.settings = settings
+        # shared session holding the unlocked API key (see CredentialSessionService)
+        self.credentials = credentials or CredentialSessionService(self.BASE_DIR, settings)
+        self.parser = ResponseParserService(self.BASE_DIR, settings)
+        # optional LocalTranslationService for the "local" routing tier and budget overruns
+        self.local_translation = local_translation
+        # Chat requests in flight at once, tuned while running
+        self.openai_limit = AdaptiveLimiter("openai", settings)
+
+    def request_translation_api(self, lines: list[str], pin: str, prompt_path: str = None) -> str:
+        return self.complete(lines, pin, prompt_path)[0]
+
+    def complete(self, lines: list[str], pin: str, prompt_path: str = None, model: str = None, words: list[str] = None) -> tuple[str, str, dict]:
+        """
+        Send the lines with the prompt for RESPONSE_FORMAT to model (default
+        AI_MODEL); return (content, finish_reason, token usage).
+        """
+        if self.settings.DEBUG_API:
+            content = self.request_translation_api_debug(lines, response_path=self.BASE_DIR / self.settings.DEBUG_RESPONSE_FILE)
+            return content, "stop", {}
 
+        # PIN is only needed when the credential session is locked
+        api_key = self.credentials.get_api_key(pin)
+
+        import openai
         openai.api_key = api_key
 
+        model = model or self.settings.AI_MODEL
+        try:
+            with self.openai_limit.slot(cost=len(lines), kind=model):
+                response = openai.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(lines, prompt_path, words),
+                    max_tokens=self.settings.MAX_TOKENS,
+                    temperature=self.settings.TEMPERATURE,
+                )
+            choice = response.choices[0]
+            content = choice.message.content.strip()
+            print(content)
+            usage = {}
+            if response.usage is not None:
+                usage = {
+                    "prompt_tokens": response.usage.prompt_tokens,
+                    "completion_tokens": response.usage.completion_tokens,
+                }
+            return content, choice.finish_reason, usage
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            raise RuntimeError("Failed to connect to OpenAI service.") from e
+
+    def _build_messages(self, lines: list[str], prompt_path: str = None, words: list[str] = None) -> list[dict]:
+        """
+        Prompt and input lines. With words (a locally extracted W list) the
+        words prompt is used and the model only glosses the words listed
+        after the #WORDS marker.
+        """
+        if prompt_path is None:
+            if words is not None:
+                prompt_path = self.settings.COMPACT_WORDS_PROMPT_FILE if self.settings.RESPONSE_FORMAT == "tsv" else self.settings.WORDS_PROMPT_FILE
+            else:
+                prompt_path = self.settings.COMPACT_PROMPT_FILE if self.settings.RESPONSE_FORMAT == "tsv" else self.settings.PROMPT_FILE
         prompt_file = self.BASE_DIR / prompt_path
         with open(prompt_file, encoding="utf-8") as f:
             prompt = f.read().strip()
 
         joined_lines = "\n".join(lines)
-        messages = [
+        if words is not None:
+            joined_lines += "\n#WORDS\n" + "\n".join(words)
+        return [
             {"role": "system", "content": prompt},
             {"role": "user",   "content": joined_lines}
         ]
 
+    @staticmethod
+    def _assign_words(words: list[str], groups: list[list[str]]) -> list:
+        """
+        Split a W list between groups of lines (requests, tiers): each word
+        goes with the first group it occurs in. None (the model picks the
+        words) stays None for every group.
+        """
+        if words is None:
+            return [None] * len(groups)
+        remaining = list(words)
+        assigned = []
+        for lines in groups:
+            text = "\n".join(lines)
+            mine = [word for word in remaining if word in text]
+            taken = set(mine)
+            remaining = [word for word in remaining if word not in taken]
+            assigned.append(mine)
+        return assigned
+
+    @staticmethod
+    def _match_lines(rows: list[list[str]], lines: list[str]) -> list[list[str]]:
+        """
+        Point each L row at the requested line it translates. The model's echo
+        of a line may differ slightly (width, punctuation, spacing), so rows
+        are matched on _line_key; a row for no requested line, or for a line
+        already matched, is dropped.
+        """
+        unmatched = {}
+        for line in lines:
+            unmatched.setdefault(_line_key(line), []).append(line)
+        matched = []
+        for row in rows:
+            echo = row[0]
+            candidates = unmatched.get(_line_key(echo), [])
+            if not candidates:
+                print(f"[_match_lines] Dropped a row for no requested line: {echo!r}")
+                continue
+            line = echo if echo in candidates else candidates[0]
+            candidates.remove(line)
+            matched.append([line, *row[1:]])
+        return matched
+
+    @staticmethod
+    def _merge_part(data: dict, seen_words: set, part: dict) -> set:
+        """Add a parsed reply to data (W de-duplicated); return the lines it translated."""
+        translated = set()
+        for row in part.get("L", []):
+            data["L"].append(row)
+            translated.add(row[0])
+        for row in part.get("W", []):
+            if row[0] not in seen_words:
+                seen_words.add(row[0])
+                data["W"].append(row)
+        return translated
+
+    def request_translation_data(self, lines: list[str], pin: str, model: str = None, usage: dict = None, words: list[str] = None) -> dict:
+        """
+        Request and parse translations. Lines missing from the reply (dropped
+        or cut off by the token limit) are re-requested on their own, up to
+        TRANSLATION_RETRIES times. Returns {"L": [...], "W": [...]}; token
+        counts are added to usage if given. Raises RuntimeError when no line
+        at all could be translated.
+        The first field of each L row is the requested line, even when the
+        model echoed it with small differences.
+        With words, W holds glosses for those words only instead of words the
+        model picked; words still unglossed go along with a retry.
+        More than TRANSLATION_CHUNK_LINES lines are sent as several requests
+        in parallel, as many at once as the openai limiter allows.
+        """
+        size = self.settings.TRANSLATION_CHUNK_LINES
+        if not size or len(lines) <= size or self.settings.DEBUG_API:
+            data = self._request_chunk(lines, pin, model, usage, words)
+            if lines and not data["L"]:
+                raise RuntimeError(f"No translation in the reply for any of {len(lines)} lines.")
+            return data
+
+        chunks = [lines[i:i + size] for i in range(0, len(lines), size)]
+        chunk_words = self._assign_words(words, chunks)
+        chunk_usages = [{} for _ in chunks]
+        print(f"[request_translation_data] Sending {len(lines)} lines as {len(chunks)} requests")
+        with ThreadPoolExecutor(max_workers=self.openai_limit.maximum) as executor:
+            parts = list(executor.map(self._request_chunk, chunks, [pin] * len(chunks), [model] * len(chunks), chunk_usages, chunk_words))
+
+        data = {"L": [], "W": []}
+        seen_words = set()
+        for part in parts:
+            self._merge_part(data, seen_words, part)
+        if usage is not None:
+            for chunk_usage in chunk_usages:
+                for key, value in chunk_usage.items():
+                    usage[key] = usage.get(key, 0) + value
+        if not data["L"]:
+            raise RuntimeError(f"No translation in the replies for any of {len(lines)} lines.")
+        return data
+
+    def _request_chunk(self, lines: list[str], pin: str, model: str = None, usage: dict = None, words: list[str] = None) -> dict:
+        data = {"L": [], "W": []}
+        seen_words = set()
+        pending = list(lines)
+        for attempt in range(1 + self.settings.TRANSLATION_RETRIES):
+            if attempt:
+                print(f"[request_translation_data] Re-requesting {len(pending)} missing lines")
+            pending_words = self._assign_words(words, [pending])[0]
+            if pending_words is not None:
+                pending_words = [word for word in pending_words if word not in seen_words]
+            content, finish_reason, reply_usage = self.complete(pending, pin, model=model, words=pending_words)
+            if usage is not None:
+                for key, value in reply_usage.items():
+                    usage[key] = usage.get(key, 0) + value
+            part = self.parser.parse(content, truncated=finish_reason == "length")
+            if pending_words is not None:
+                wanted = set(pending_words)
+                part["W"] = [row for row in part.get("W", []) if row[0] in wanted]
+            part["L"] = self._match_lines(part.get("L", []), pending)
+            translated = self._merge_part(data, seen_words, part)
+
+            pending = [line for line in pending if line not in translated]
+            if not pending:
+                break
+        if pending:
+            print(f"[request_translation_data] Still no translation after {self.settings.TRANSLATION_RETRIES} retries "
+                  f"for {len(pending)} of {len(lines)} lines: {pending[:3]}")
+        return data
+
+    # Tiered routing
+    def classify(self, line: str) -> str:
+        """"easy" for short lines with few kanji and no quoted speech, else "hard"."""
+        kanji = sum(1 for ch in line if _KANJI_RANGE[0] <= ch <= _KANJI_RANGE[1])
+        if (
+            len(line) <= self.settings.ROUTE_EASY_MAX_CHARS
+            and kanji <= self.settings.ROUTE_EASY_MAX_KANJI
+            and not any(q in line for q in _QUOTES)
+        ):
+            return "easy"
+        return "hard"
+
+    def route_translation_data(self, lines: list[str], pin: str, words: list[str] = None) -> tuple[dict, dict]:
+        """
+        Translate easy lines with ROUTE_EASY_BACKEND/ROUTE_EASY_MODEL and hard
+        ones with ROUTE_HARD_MODEL, both tiers in parallel. A tier still running
+        after ROUTE_LATENCY_BUDGET seconds is handed to the local model when one
+        is available. Returns (data, report) with lines, seconds, tokens and
+        estimated cost per tier. A words list is split between the tiers.
+        """
+        settings = self.settings
+        tiers = {"easy": [], "hard": []}
+        for line in lines:
+            tiers[self.classify(line)].append(line)
+        targets = {
+            "easy": (settings.ROUTE_EASY_BACKEND, settings.ROUTE_EASY_MODEL),
+            "hard": ("openai", settings.ROUTE_HARD_MODEL),
+        }
+        tier_words = dict(zip(tiers, self._assign_words(words, list(tiers.values()))))
+
+        start = time.monotonic()
+        results, report = {}, {"tiers": {}}
+        executor = ThreadPoolExecutor(max_workers=len(tiers))
         try:
-            response = openai.chat.completions.create(
-                model=AI_MODEL,
-                messages=messages,
-                max_tokens=MAX_TOKENS,
-                temperature=TEMPERATURE,
-            )
-            content = response.choices[0].message.content.strip()
-            print(content)
-            return content
-        except Exception as e:
-            print(f"OpenAI API error: {e}")
-            raise RuntimeError("Failed to connect to OpenAI service.") from e
+            futures = {
+                name: executor.submit(self._run_tier, tier_lines, pin, *targets[name], tier_words[name])
+                for name, tier_lines in tiers.items() if tier_lines
+            }
+            budget = settings.ROUTE_LATENCY_BUDGET or None
+            wait(futures.values(), timeout=budget)
+
+            for name, future in futures.items():
+                backend, model = targets[name]
+                if not future.done() and backend == "openai" and self._local_available():
+                    # The late request keeps running in the background; its reply is ignored
+                    print(f"[route_translation_data] {name} tier over the {budget:.0f}s budget, using the local model")
+                    results[name] = self._run_tier(tiers[name], pin, "local", None, tier_words[name])
+                    report["tiers"][name] = {"over_budget": True}
+                else:
+                    results[name] = future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        data = {"L": [], "W": []}
+        seen_words = set()
+        for name, (tier_data, tier_report) in results.items():
+            self._merge_part(data, seen_words, tier_data)
+            report["tiers"][name] = {**tier_report, **report["tiers"].get(name, {})}
+
+        # Keep the input order across tiers
+        order = {line: i for i, line in enumerate(lines)}
+        data["L"].sort(key=lambda row: order.get(row[0], len(order)))
+
+        report["seconds"] = round(time.monotonic() - start, 3)
+        report["cost_usd"] = round(sum(t.get("cost_usd", 0.0) for t in report["tiers"].values()), 6)
+        for name, tier in report["tiers"].items():
+            print(f"[route_translation_data] {name}: {tier['lines']} lines via {tier['backend']}"
+                  f"{' ' + tier['model'] if tier['model'] else ''} in {tier['seconds']:.2f}s, ~${tier.get('cost_usd', 0):.4f}")
+        return data, report
+
+    def _local_available(self) -> bool:
+        return self.local_translation is not None and self.local_translation.is_available()
+
+    def _run_tier(self, lines: list[str], pin: str, backend: str, model: str, words: list[str] = None) -> tuple[dict, dict]:
+        start = time.monotonic()
+        usage = {}
+        if backend == "local":
+            if self.local_translation is None:
+                raise RuntimeError("No local translation backend configured.")
+            data = self.local_translation.request_translation_data(lines, words=words)
+            model = None
+        else:
+            model = model or self.settings.AI_MODEL
+            data = self.request_translation_data(lines, pin, model=model, usage=usage, words=words)
+        report = {
+            "lines": len(lines),
+            "backend": backend,
+            "model": model,
+            "seconds": round(time.monotonic() - start, 3),
+            **usage,
+        }
+        cost = self._estimate_cost(model, usage)
+        if cost is not None:
+            report["cost_usd"] = cost
+        return data, report
+
+    def _estimate_cost(self, model: str, usage: dict, factor: float = 1.0) -> float | None:
+        """USD for the token usage at MODEL_PRICES, or None if the model has no price."""
+        prices = self.settings.MODEL_PRICES.get(model) if model else None
+        if not prices or not usage:
+            return None
+        tokens_cost = usage.get("prompt_tokens", 0) * prices[0] + usage.get("completion_tokens", 0) * prices[1]
+        return round(tokens_cost * factor / 1_000_000, 6)
+
+    # Bulk batch mode
+    def request_batch_translation_data(self, lines: list[str], pin: str, words: list[str] = None) -> tuple[dict, dict]:
+        """
+        Translate the lines through the OpenAI Batch API: requests of
+        BATCH_LINES_PER_REQUEST lines are written to a JSONL file, uploaded and
+        submitted as one batch, which is polled until it ends.
+
+        The batch id is saved in BATCH_DIR under a fingerprint of the job, so
+        running the same job again (e.g. after a restart or BATCH_MAX_WAIT
+        running out) resumes polling instead of submitting a second batch.
+        Lines the batch did not translate are requested interactively.
+        A words list is split between the requests.
+        Returns (data, report) like route_translation_data.
+        """
+        settings = self.settings
+        model = settings.AI_MODEL
+        messages = self._build_messages([], words=words)
+        size = max(1, settings.BATCH_LINES_PER_REQUEST)
+        chunks = [lines[i:i + size] for i in range(0, len(lines), size)]
+        chunk_words = self._assign_words(words, chunks)
+
+        job_id = hashlib.sha256(
+            json.dumps([model, messages[0]["content"], size, lines, words], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+        batch_dir = self.BASE_DIR / settings.BATCH_DIR
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        state_path = batch_dir / f"{job_id}.json"
+        requests_path = batch_dir / f"{job_id}.jsonl"
+
+        import openai
+        openai.api_key = self.credentials.get_api_key(pin)
+
+        start = time.monotonic()
+        if state_path.exists():
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            print(f"[request_batch_translation_data] Resuming batch {state['batch_id']}")
+        else:
+            with open(requests_path, "w", encoding="utf-8") as f:
+                for n, (chunk, batch_words) in enumerate(zip(chunks, chunk_words)):
+                    f.write(json.dumps({
+                        "custom_id": f"chunk-{n}",
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": model,
+                            "messages": self._build_messages(chunk, words=batch_words),
+                            "max_tokens": settings.MAX_TOKENS,
+                            "temperature": settings.TEMPERATURE,
+                        },
+                    }, ensure_ascii=False) + "\n")
+            try:
+                with open(requests_path, "rb") as f:
+                    input_file = openai.files.create(file=f, purpose="batch")
+                batch = openai.batches.create(
+                    input_file_id=input_file.id,
+                    endpoint="/v1/chat/completions",
+                    completion_window=settings.BATCH_COMPLETION_WINDOW,
+                )
+            except Exception as e:
+                print(f"OpenAI API error: {e}")
+                raise RuntimeError("Failed to submit the translation batch.") from e
+            state = {"batch_id": batch.id, "input_file_id": input_file.id, "requests": len(chunks), "submitted": time.time()}
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            requests_path.unlink(missing_ok=True)
+            print(f"[request_batch_translation_data] Submitted batch {batch.id} ({len(chunks)} requests, {len(lines)} lines)")
+
+        batch = self._poll_batch(openai, state["batch_id"])
+
+        data = {"L": [], "W": []}
+        seen_words = set()
+        usage = {}
+        translated = set()
+        wanted = set(words or ())
+        if batch.output_file_id:
+            output = openai.files.content(batch.output_file_id).text
+            for record in output.splitlines():
+                if not record.strip():
+                    continue
+                result = json.loads(record)
+                response = result.get("response") or {}
+                if response.get("status_code") != 200:
+                    error = result.get("error") or response.get("body", {}).get("error")
+                    print(f"[request_batch_translation_data] {result.get('custom_id')} failed: {error}")
+                    continue
+                body = response["body"]
+                choice = body["choices"][0]
+                for key, value in (body.get("usage") or {}).items():
+                    if key in ("prompt_tokens", "completion_tokens"):
+                        usage[key] = usage.get(key, 0) + value
+                part = self.parser.parse(choice["message"]["content"], truncated=choice.get("finish_reason") == "length")
+                if words is not None:
+                    part["W"] = [row for row in part.get("W", []) if row[0] in wanted]
+                chunk_index = int(result.get("custom_id", "chunk-").rpartition("-")[2] or -1)
+                if 0 <= chunk_index < len(chunks):
+                    part["L"] = self._match_lines(part.get("L", []), chunks[chunk_index])
+                translated |= self._merge_part(data, seen_words, part)
+        # The batch is finished either way; a rerun should start a new one
+        state_path.unlink(missing_ok=True)
+
+        missing = [line for line in lines if line not in translated]
+        report = {
+            "batch_id": batch.id,
+            "status": batch.status,
+            "requests": state["requests"],
+            "lines": len(lines),
+            "missing_lines": len(missing),
+            "seconds": round(time.monotonic() - start, 3),
+            **usage,
+        }
+        cost = self._estimate_cost(model, usage, factor=settings.BATCH_PRICE_FACTOR)
+        if cost is not None:
+            report["cost_usd"] = cost
+
+        if missing:
+            if batch.status == "failed" and not translated:
+                raise RuntimeError(f"Translation batch {batch.id} failed: {batch.errors}")
+            print(f"[request_batch_translation_data] Requesting {len(missing)} lines missing from the batch")
+            missing_words = None if words is None else [word for word in words if word not in seen_words]
+            self._merge_part(data, seen_words, self.request_translation_data(missing, pin, words=missing_words))
+            order = {line: i for i, line in enumerate(lines)}
+            data["L"].sort(key=lambda row: order.get(row[0], len(order)))
+
+        print(f"[request_batch_translation_data] Batch {batch.id} {batch.status}: "
+              f"{len(lines) - len(missing)}/{len(lines)} lines in {report['seconds']:.0f}s")
+        return data, report
+
+    def _poll_batch(self, openai, batch_id: str):
+        """
+        Poll a batch every BATCH_POLL_INTERVAL seconds until it ends. Errors
+        while polling are retried with a growing delay; after BATCH_MAX_WAIT
+        seconds (0 = no limit) a RuntimeError is raised and the saved state
+        lets the next run pick the batch up again.
+        """
+        interval = self.settings.BATCH_POLL_INTERVAL
+        deadline = time.monotonic() + self.settings.BATCH_MAX_WAIT if self.settings.BATCH_MAX_WAIT else None
+        delay = interval
+        while True:
+            try:
+                batch = openai.batches.retrieve(batch_id)
+                delay = interval
+                if batch.status in ("completed", "failed", "expired", "cancelled"):
+                    return batch
+                counts = batch.request_counts
+                if counts is not None:
+                    print(f"[_poll_batch] {batch_id} {batch.status}: {counts.completed}/{counts.total} requests done")
+            except Exception as e:
+                print(f"[_poll_batch] Could not check batch {batch_id}: {e}")
+                delay = min(delay * 2, max(interval, 600))
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise RuntimeError(f"Batch {batch_id} is still running; run the same job again to resume it.")
+            time.sleep(delay)
 
     def request_translation_api_debug(self, lines: list[str], response_path: Path) -> str:
         try:
@@ -1,30 +1,166 @@
-import importlib.util
+import io
 import subprocess
-import requests
+import sys
+import threading
+from collections import OrderedDict
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os
+import time
 import wave
-import lameenc
-from services.popup_service import PopupService
+import zipfile
+from services.card_store_service import CardStore
+from services.concurrency_service import AdaptiveLimiter
+from services.settings_service import AppSettings
+
+def _phrase_moras(phrase: dict) -> int:
+    return len(phrase.get("moras", ())) + (1 if phrase.get("pause_mora") else 0)
+
+
+def _count_moras(audio_query: dict) -> int:
+    return sum(_phrase_moras(phrase) for phrase in audio_query.get("accent_phrases", ()))
+
+
+def _split_audio_query(audio_query: dict, max_moras: int, edge_seconds: float) -> list[dict]:
+    """
+    Split an audio query into queries of at most max_moras morae (a single
+    longer accent phrase stays whole). Cuts go after a pause (punctuation)
+    when that keeps the chunk within the limit, else between accent
+    phrases. Inner chunk edges get edge_seconds of silence for the crossfade.
+    """
+    groups, current, pause_at = [], [], None
+    for phrase in audio_query.get("accent_phrases", ()):
+        size = _phrase_moras(phrase)
+        if current and sum(map(_phrase_moras, current)) + size > max_moras:
+            cut = len(current)
+            if pause_at is not None and sum(map(_phrase_moras, current[pause_at + 1:])) + size <= max_moras:
+                cut = pause_at + 1
+            groups.append(current[:cut])
+            current = current[cut:]
+            pause_at = max((i for i, p in enumerate(current) if p.get("pause_mora")), default=None)
+        current.append(phrase)
+        if phrase.get("pause_mora"):
+            pause_at = len(current) - 1
+    if current:
+        groups.append(current)
+
+    queries = []
+    for i, group in enumerate(groups):
+        query = dict(audio_query, accent_phrases=group)
+        query.pop("kana", None)  # describes the whole line, not this chunk
+        if i > 0:
+            query["prePhonemeLength"] = edge_seconds
+        if i < len(groups) - 1:
+            query["postPhonemeLength"] = edge_seconds
+        queries.append(query)
+    return queries
+
+
+def _join_wavs(wavs: list[bytes], crossfade_ms: float) -> bytes:
+    """Concatenate 16-bit WAVs of one format, blending crossfade_ms across each join."""
+    params = None
+    pcm = array("h")
+    for wav_bytes in wavs:
+        with wave.open(io.BytesIO(wav_bytes), "rb") as wf:
+            chunk_params = (wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+            samples = array("h", wf.readframes(wf.getnframes()))
+        if params is None:
+            params = chunk_params
+        elif chunk_params != params:
+            raise ValueError(f"chunk format {chunk_params} differs from {params}")
+        if params[1] != 2:
+            raise ValueError("only 16-bit audio can be joined")
+        if sys.byteorder == "big":
+            samples.byteswap()
+
+        channels = params[0]
+        overlap = min(int(params[2] * crossfade_ms / 1000) * channels, len(pcm), len(samples))
+        overlap -= overlap % channels
+        start = len(pcm) - overlap
+        frames = overlap // channels
+        for i in range(overlap):
+            weight = (i // channels + 1) / (frames + 1)
+            pcm[start + i] = int(pcm[start + i] * (1 - weight) + samples[i] * weight)
+        pcm.extend(samples[overlap:])
+
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(params[0])
+        wf.setsampwidth(2)
+        wf.setframerate(params[2])
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+class Mp3Encoder:
+    """MP3 through lameenc: VBR at LAME preset MP3_VBR_QUALITY (-V0 to -V9), or constant MP3_BITRATE when it is -1."""
+    extension = "mp3"
+
+    def __init__(self, settings: AppSettings):
+        self.settings = settings
+
+    def encode(self, pcm: bytes, sample_rate: int, channels: int) -> bytes:
+        import lameenc
+
+        encoder = lameenc.Encoder()
+        if self.settings.MP3_VBR_QUALITY >= 0:
+            encoder.set_vbr(4)  # vbr_default (LAME's -V presets)
+            encoder.set_vbr_quality(self.settings.MP3_VBR_QUALITY)
+        else:
+            encoder.set_bit_rate(self.settings.MP3_BITRATE)
+        encoder.set_in_sample_rate(sample_rate)
+        encoder.set_channels(channels)
+        encoder.set_quality(self.settings.MP3_QUALITY)
+        return encoder.encode(pcm) + encoder.flush()
+
+
+class OpusEncoder:
+    """
+    Opus in an Ogg container through soundfile (libsndfile 1.0.29 or later),
+    at about OPUS_BITRATE kbps. Opus takes 8, 12, 16, 24 or 48 kHz input;
+    VOICEVOX produces 24 kHz.
+    """
+    extension = "ogg"
+
+    def __init__(self, settings: AppSettings):
+        self.settings = settings
+
+    def encode(self, pcm: bytes, sample_rate: int, channels: int) -> bytes:
+        import soundfile
+
+        # libsndfile maps compression level 0..1 linearly onto 256..6 kbps
+        level = min(max((256 - self.settings.OPUS_BITRATE) / 250, 0.0), 1.0)
+        buf = io.BytesIO()
+        with soundfile.SoundFile(
+            buf, "w", samplerate=sample_rate, channels=channels,
+            format="OGG", subtype="OPUS", compression_level=level,
+        ) as f:
+            f.buffer_write(pcm, dtype="int16")
+        return buf.getvalue()
+
 
 class TextToSpeechService:
-    def __init__(self, base_dir: Path, parent=None):
+    # Settings the engine process is launched with; changing one restarts it.
+    ENGINE_SETTINGS = ("VOICEVOX_PATH", "API_URL", "API_PORT")
+    # AUDIO_ENCODER name -> encoder class; each has an extension and encode(pcm, sample_rate, channels)
+    ENCODERS = {"mp3": Mp3Encoder, "opus": OpusEncoder}
+
+    def __init__(self, base_dir: Path, settings: AppSettings, parent=None):
         self.base_dir = base_dir
-        self.tmp_dir = self.base_dir / "tmp_mp3"  # keep same tmp_dir name
-        self.tmp_dir.mkdir(parents=True, exist_ok=True)
         self.proc = None
+        # None until the engine has been asked; False once it answered 404
+        self._multi_synthesis_supported = None
+        # (text, speaker) -> audio query, most recently used last
+        self._query_cache = OrderedDict()
+        self._query_lock = threading.Lock()
+        # Requests in flight to the engine and encoder jobs at once, tuned while running
+        self.engine_limit = AdaptiveLimiter("engine", settings)
+        self.encoder_limit = AdaptiveLimiter("encoder", settings)
         self.parent = parent  # QWidget for popup parent
-        self.settings = self._load_settings()
-
-    def _load_settings(self):
-        """
-        Dynamically load settings.py as a module.
-        """
-        settings_path = self.base_dir / "settings.py"
-        spec = importlib.util.spec_from_file_location("settings", str(settings_path))
-        settings = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(settings)
-        return settings
+        self.settings = settings
 
     def start_voicevox_process(self):
         """
@@ -36,10 +172,11 @@ class TextToSpeechService:
         if not exe_path.exists() or exe_path.is_dir() or exe_path.stat().st_size == 0:
             print(f"[start_voicevox_process] ERROR: Invalid VOICEVOX executable at: {exe_path}")
             if self.settings.TERMS_AGREEMENT_AGREED_TO:
+                from services.popup_service import PopupService
                 PopupService.show_error_popup(
                     parent=self.parent,
                     title="Voicevox Error",
-                    message="Voicevox failed to start.\nPlease check the executable path in settings.py."
+                    message="Voicevox failed to start.\nPlease check the VOICEVOX path in Settings."
                 )
             return None
 
@@ -65,104 +202,278 @@ class TextToSpeechService:
         except Exception as e:
             print(f"[start_voicevox_process] ERROR: Failed to start VOICEVOX: {e}")
             if self.settings.TERMS_AGREEMENT_AGREED_TO:
+                from services.popup_service import PopupService
                 PopupService.show_error_popup(
                     parent=self.parent,
                     title="Voicevox Error",
-                    message="Voicevox failed to start.\nPlease check the executable path in settings.py."
+                    message="Voicevox failed to start.\nPlease check the VOICEVOX path in Settings."
                 )
             return None
 
+    def wait_until_ready(self, timeout: float = 60.0) -> bool:
+        """
+        Poll the engine's /version endpoint until it answers.
+        Returns False if the timeout passes or the launched process exits.
+        """
+        import requests
+
+        version_url = f"http://{self.settings.API_URL.rstrip('/')}:{self.settings.API_PORT}/version"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(version_url, timeout=2).ok:
+                    return True
+            except requests.RequestException:
+                pass
+            if self.proc and self.proc.poll() is not None:
+                return False
+            time.sleep(0.5)
+        return False
+
+    @property
+    def encoder(self):
+        """The encoder selected by AUDIO_ENCODER (MP3 for unknown names)."""
+        encoder_class = self.ENCODERS.get(self.settings.AUDIO_ENCODER)
+        if encoder_class is None:
+            print(f"[encoder] Unknown AUDIO_ENCODER {self.settings.AUDIO_ENCODER!r}, using mp3")
+            encoder_class = Mp3Encoder
+        return encoder_class(self.settings)
+
+    def restart_voicevox_process(self, changed: dict = None):
+        """
+        Restart the engine so it picks up a new path, host or port.
+        Registered as a settings subscriber for ENGINE_SETTINGS; other
+        changes (such as the speaker) are read per request and need no restart.
+        """
+        print(f"[restart_voicevox_process] Engine settings changed: {', '.join(changed or {})}")
+        self.stop_voicevox_process()
+        self._multi_synthesis_supported = None
+        return self.start_voicevox_process()
+
     def stop_voicevox_process(self):
         if self.proc:
             self.proc.terminate()
             self.proc.wait()
             self.proc = None
 
-    def generate_wavs(self, data: dict):
+    def generate_wavs(self, cards: CardStore):
         """
-        Generate WAV files using VOICEVOX service based on the given data.
+        Generate WAV files using VOICEVOX service for every card: the Japanese
+        text of lines (L), the romaji reading of words and kanji. The files go
+        to cards.media_dir; each synthesized card's audio is set to the name
+        its clip will have once encoded (.mp3 or .ogg, see AUDIO_ENCODER).
+
+        Audio queries are grouped into batches for the engine's
+        multi-synthesis endpoint (one request, a zip of WAVs back). A batch
+        closes at MULTI_SYNTHESIS_MAX_BATCH clips or MULTI_SYNTHESIS_MAX_MORAS
+        morae, so many short words share a request while long lines go in
+        small batches. Engines without the endpoint get one /synthesis
+        request per clip. Queries and batches run on worker threads, as many
+        at once as the engine limiter allows (see AdaptiveLimiter); a 429,
+        503 or timeout is retried after a pause.
+
+        Clips longer than TTS_MAX_CHUNK_MORAS are split at pauses or accent
+        phrases, the chunks synthesized in parallel with the batches, and
+        joined with a TTS_CROSSFADE_MS crossfade.
+
+        Audio queries are cached (AUDIO_QUERY_CACHE_SIZE). With
+        SLOW_AUDIO_ENABLED each card also gets a slowed clip (audio_slow),
+        synthesized from the same query with speedScale times
+        SLOW_AUDIO_SPEED, so it costs one synthesis and no extra query.
+
+        Returns the number of clips that could not be synthesized.
         """
+        import requests
+
         settings = self.settings
-        print(f"[generate_wavs] Generating WAVs in: {self.tmp_dir.resolve()}")
+        out_dir = cards.media_dir
+        print(f"[generate_wavs] Generating WAVs in: {out_dir.resolve()}")
 
-        for key in settings.TRANSLATION_TYPE_KEYS:
-            if data and key in data and isinstance(data[key], list):
-                for item in data[key]:
-                    if not item:
-                        continue
+        max_chunk = settings.TTS_MAX_CHUNK_MORAS
+        long_clips, batch_jobs = [], []
+        workers = self.engine_limit.maximum
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=workers) as executor:
+            # The session is shared by the worker threads, one pooled connection each
+            session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+            query_jobs = []
+            for card in cards:
+                text = card.japanese if card.kind == "L" else card.reading
+                if text:
+                    query_jobs.append((card, text, executor.submit(self._audio_query, session, text)))
+
+            batch, batch_moras = [], 0
+            for card, text, query_job in query_jobs:
+                print(f"[generate_wavs] Synthesizing ({card.kind}): {text}")
+                try:
+                    audio_query = query_job.result()
+                except Exception as e:
+                    print(f"[generate_wavs] Voicevox synthesis failed for line {card.id} ({card.kind}): {e}")
+                    continue
 
-                    idx = item[0] if len(item) > 0 else None
-                    text = item[1] if key == 'L' and len(item) > 1 else (
-                        item[3] if len(item) > 3 else None
-                    )
-                    if not text:
+                variants = [("", audio_query)]
+                if settings.SLOW_AUDIO_ENABLED:
+                    speed = audio_query.get("speedScale", 1.0) * settings.SLOW_AUDIO_SPEED
+                    variants.append(("slow", dict(audio_query, speedScale=speed)))
+
+                moras = _count_moras(audio_query)
+                for variant, variant_query in variants:
+                    if max_chunk and moras > max_chunk:
+                        chunks = _split_audio_query(variant_query, max_chunk, settings.TTS_CROSSFADE_MS / 1000)
+                        futures = [executor.submit(self._synthesize_one, session, chunk) for chunk in chunks]
+                        long_clips.append((card, variant, futures))
                         continue
+                    if batch and (len(batch) >= settings.MULTI_SYNTHESIS_MAX_BATCH or batch_moras + moras > settings.MULTI_SYNTHESIS_MAX_MORAS):
+                        batch_jobs.append(executor.submit(self._synthesize_batch, session, batch, out_dir))
+                        batch, batch_moras = [], 0
+                    batch.append((card, variant, variant_query))
+                    batch_moras += moras
+            if batch:
+                batch_jobs.append(executor.submit(self._synthesize_batch, session, batch, out_dir))
+            for job in batch_jobs:
+                job.result()
 
-                    print(f"[generate_wavs] Synthesizing ({key}): {text}")
-                    try:
-                        query_url = f"http://{settings.API_URL.rstrip('/')}:{settings.API_PORT}{settings.AUDIO_QUERY_ENDPOINT}"
-                        query_resp = requests.post(
-                            query_url,
-                            params={"text": text, "speaker": settings.VOICEVOX_SPEAKER},
-                        )
-                        query_resp.raise_for_status()
-                        audio_query = query_resp.json()
-
-                        synth_url = f"http://{settings.API_URL.rstrip('/')}:{settings.API_PORT}{settings.AUDIO_SYNTHESIS_ENDPOINT}"
-                        synth_resp = requests.post(
-                            synth_url,
-                            params={"speaker": settings.VOICEVOX_SPEAKER},
-                            json=audio_query,
-                        )
-                        synth_resp.raise_for_status()
-
-                        wav_path = self.tmp_dir / f"{idx}.wav"
-                        with open(wav_path, "wb") as f:
-                            f.write(synth_resp.content)
-                        print(f"[generate_wavs] WAV saved: {wav_path.resolve()}")
-
-                    except Exception as e:
-                        print(f"[generate_wavs] Voicevox synthesis failed for line {idx} ({key}): {e}")
-
-    def convert_to_mp3(self):
-        """
-        Convert all .wav files in tmp_dir to .mp3 using lameenc. Reads WAV header to preserve sample rate and channels.
-        """
-        print(f"[convert_to_mp3] Converting WAVs to MP3 in: {self.tmp_dir.resolve()}")
+            for card, variant, futures in long_clips:
+                try:
+                    wav_bytes = _join_wavs([future.result() for future in futures], settings.TTS_CROSSFADE_MS)
+                    self._save_wav(card, wav_bytes, out_dir, variant)
+                except Exception as e:
+                    print(f"[generate_wavs] Voicevox synthesis failed for line {card.id} ({card.kind}): {e}")
+
+        failed = sum(
+            (not card.audio) + (settings.SLOW_AUDIO_ENABLED and not card.audio_slow)
+            for card in cards
+            if (card.japanese if card.kind == "L" else card.reading)
+        )
+        if failed:
+            print(f"[generate_wavs] {failed} clips could not be synthesized")
+        return failed
+
+    def _audio_query(self, session, text: str) -> dict:
+        """The engine's audio query for text, from the cache when possible. Treat it as read-only."""
+        key = (text, self.settings.VOICEVOX_SPEAKER)
+        with self._query_lock:
+            audio_query = self._query_cache.get(key)
+            if audio_query is not None:
+                self._query_cache.move_to_end(key)
+                return audio_query
+
+        audio_query = self.engine_limit.call(
+            self._engine_post, session, self.settings.AUDIO_QUERY_ENDPOINT,
+            params={"text": text, "speaker": self.settings.VOICEVOX_SPEAKER},
+            cost=len(text), kind="query",
+        ).json()
+
+        with self._query_lock:
+            self._query_cache[key] = audio_query
+            while len(self._query_cache) > self.settings.AUDIO_QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return audio_query
+
+    def _synthesize_one(self, session, audio_query: dict) -> bytes:
+        return self.engine_limit.call(
+            self._engine_post, session, self.settings.AUDIO_SYNTHESIS_ENDPOINT,
+            params={"speaker": self.settings.VOICEVOX_SPEAKER}, json=audio_query,
+            cost=_count_moras(audio_query), kind="synthesis",
+        ).content
 
-        for wav_file in self.tmp_dir.glob("*.wav"):
-            mp3_file = wav_file.with_suffix('.mp3')
+    def _engine_url(self, endpoint: str) -> str:
+        return f"http://{self.settings.API_URL.rstrip('/')}:{self.settings.API_PORT}{endpoint}"
+
+    def _engine_post(self, session, endpoint: str, missing_ok: bool = False, **kwargs):
+        """POST to the engine and raise for error statuses (except 404/405 with missing_ok)."""
+        resp = session.post(self._engine_url(endpoint), **kwargs)
+        if not (missing_ok and resp.status_code in (404, 405)):
+            resp.raise_for_status()
+        return resp
+
+    def _synthesize_batch(self, session, batch: list, out_dir: Path):
+        settings = self.settings
+        if len(batch) > 1 and settings.MULTI_SYNTHESIS_ENABLED and self._multi_synthesis_supported is not False:
             try:
-                print(f"[convert_to_mp3] Processing {wav_file.name}")
-                with wave.open(str(wav_file), 'rb') as wf:
-                    sample_rate = wf.getframerate()
-                    channels = wf.getnchannels()
-                    pcm_data = wf.readframes(wf.getnframes())
-
-                # Initialize encoder per file to match WAV properties
-                encoder = lameenc.Encoder()
-                encoder.set_bit_rate(
-                    getattr(self.settings, 'MP3_BITRATE', 128)
-                )
-                encoder.set_in_sample_rate(sample_rate)
-                encoder.set_channels(channels)
-                encoder.set_quality(
-                    getattr(self.settings, 'MP3_QUALITY', 2)
+                resp = self.engine_limit.call(
+                    self._engine_post, session, settings.MULTI_SYNTHESIS_ENDPOINT, missing_ok=True,
+                    params={"speaker": settings.VOICEVOX_SPEAKER},
+                    json=[audio_query for _, _, audio_query in batch],
+                    cost=sum(_count_moras(audio_query) for _, _, audio_query in batch), kind="synthesis",
                 )
+                if resp.status_code in (404, 405):
+                    print("[_synthesize_batch] Engine has no multi-synthesis endpoint, synthesizing one clip per request")
+                    self._multi_synthesis_supported = False
+                else:
+                    # The engine names the WAVs 001.wav, 002.wav, ... in request order
+                    with zipfile.ZipFile(io.BytesIO(resp.content)) as archive:
+                        names = sorted(name for name in archive.namelist() if name.endswith(".wav"))
+                        if len(names) != len(batch):
+                            raise ValueError(f"expected {len(batch)} WAVs, got {len(names)}")
+                        for (card, variant, _), name in zip(batch, names):
+                            self._save_wav(card, archive.read(name), out_dir, variant)
+                    return
+            except Exception as e:
+                print(f"[_synthesize_batch] Multi-synthesis of {len(batch)} clips failed, retrying one by one: {e}")
 
-                mp3_data = encoder.encode(pcm_data)
-                mp3_data += encoder.flush()
-
-                with open(mp3_file, 'wb') as f:
-                    f.write(mp3_data)
-                print(f"[convert_to_mp3] MP3 created: {mp3_file.resolve()}")
+        for card, variant, audio_query in batch:
+            try:
+                self._save_wav(card, self._synthesize_one(session, audio_query), out_dir, variant)
             except Exception as e:
-                print(f"[convert_to_mp3] ERROR encoding {wav_file.name}: {e}")
+                print(f"[generate_wavs] Voicevox synthesis failed for line {card.id} ({card.kind}): {e}")
+
+    def _save_wav(self, card, wav_bytes: bytes, out_dir: Path, variant: str = ""):
+        stem = f"{card.id}_{variant}" if variant else str(card.id)
+        wav_path = out_dir / f"{stem}.wav"
+        with open(wav_path, "wb") as f:
+            f.write(wav_bytes)
+        setattr(card, f"audio_{variant}" if variant else "audio", f"{stem}.{self.encoder.extension}")
+        print(f"[generate_wavs] WAV saved: {wav_path.resolve()}")
+
+    def encode_audio(self, out_dir: Path, cards: CardStore = None) -> list[str]:
+        """
+        Encode all .wav files in out_dir with the AUDIO_ENCODER backend. Reads WAV header to preserve sample rate and channels.
+        Files are encoded on worker threads, as many at once as the encoder limiter allows.
+        Returns the names of the clips that failed to encode; with cards, their
+        audio/audio_slow names are cleared so the notes get no [sound:] tag.
+        """
+        encoder = self.encoder
+        print(f"[encode_audio] Encoding WAVs to .{encoder.extension} in: {out_dir.resolve()}")
+
+        with ThreadPoolExecutor(max_workers=self.encoder_limit.maximum) as executor:
+            futures = [executor.submit(self._encode_file, encoder, wav_file) for wav_file in out_dir.glob("*.wav")]
+        failed = [future.result() for future in futures if future.result()]
+        if failed and cards is not None:
+            missing = set(failed)
+            for card in cards:
+                if card.audio in missing:
+                    card.audio = None
+                if card.audio_slow in missing:
+                    card.audio_slow = None
+            print(f"[encode_audio] {len(failed)} clips failed to encode and were left out")
+        return failed
+
+    def _encode_file(self, encoder, wav_file: Path) -> str | None:
+        """Encode one clip; returns the encoded file's name if it failed."""
+        out_file = wav_file.with_suffix(f".{encoder.extension}")
+        try:
+            print(f"[encode_audio] Processing {wav_file.name}")
+            with wave.open(str(wav_file), 'rb') as wf:
+                sample_rate = wf.getframerate()
+                channels = wf.getnchannels()
+                seconds = wf.getnframes() / sample_rate
+                pcm_data = wf.readframes(wf.getnframes())
+
+            with self.encoder_limit.slot(cost=seconds):
+                encoded = encoder.encode(pcm_data, sample_rate, channels)
+            with open(out_file, 'wb') as f:
+                f.write(encoded)
+            print(f"[encode_audio] Created: {out_file.resolve()}")
+        except Exception as e:
+            print(f"[encode_audio] ERROR encoding {wav_file.name}: {e}")
+            out_file.unlink(missing_ok=True)
+            return out_file.name
+        return None
 
-    def generate_mp3s(self, data: dict):
+    def generate_audio(self, cards: CardStore):
         """
-        Orchestrates the creation of WAVs followed by MP3 conversion.
+        Orchestrates the creation of WAVs followed by encoding.
         """
-        print(f"[generate_mp3s] Starting full generation pipeline in: {self.tmp_dir.resolve()}")
-        self.generate_wavs(data)
-        self.convert_to_mp3()
+        print(f"[generate_audio] Starting full generation pipeline in: {cards.media_dir.resolve()}")
+        self.generate_wavs(cards)
+        self.encode_audio(cards.media_dir, cards)
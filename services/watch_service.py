@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from services.card_store_service import CardStore
+from services.settings_service import AppSettings
+
+
+class _Poller:
+    """Polling stand-in for a watchdog Observer: scans the folder every WATCH_POLL_INTERVAL seconds."""
+
+    def __init__(self, folder: Path, interval: float, notify):
+        self.folder = folder
+        self.interval = interval
+        self.notify = notify
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watch-poll", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: float = None):
+        self._thread.join(timeout)
+
+    def _scan(self) -> dict:
+        stamps = {}
+        try:
+            for entry in os.scandir(self.folder):
+                if entry.is_file():
+                    stat = entry.stat()
+                    stamps[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            print(f"[_Poller] Could not scan {self.folder}: {e}")
+        return stamps
+
+    def _run(self):
+        known = self._scan()
+        while not self._stop.wait(self.interval):
+            current = self._scan()
+            for path, stamp in current.items():
+                if known.get(path) != stamp:
+                    self.notify(path)
+            known = current
+
+
+class WatchService:
+    """
+    Watch mode: keeps one deck per source file in a folder up to date.
+
+    Changes are picked up through filesystem notifications (watchdog), or by
+    polling every WATCH_POLL_INTERVAL seconds when watchdog is missing,
+    cannot watch the folder or WATCH_POLLING is set. A file is processed once
+    it has been quiet for WATCH_DEBOUNCE seconds, and at most WATCH_MAX_JOBS
+    files are processed at the same time.
+
+    Each file's lines, cards and clips from its last run are kept under
+    WATCH_STATE_DIR. Only lines added since then are translated and
+    synthesized; line cards of removed lines are dropped (their words and
+    kanji stay). The deck is then rebuilt from all cards and replaces the
+    file's previous package.
+    """
+    STATE_FILE = "state.json"
+    MEDIA_DIR = "media"
+
+    def __init__(self, base_dir: Path, settings: AppSettings, pipeline):
+        self.base_dir = base_dir
+        self.settings = settings
+        self.pipeline = pipeline
+        self._lock = threading.Lock()
+        self._due = {}  # path -> monotonic time it may be processed
+        self._running = set()
+        self._wake = threading.Event()
+
+    def watch(self, folder, pin: str, output_dir: str = None, stop_event: threading.Event = None):
+        """
+        Process every source file in folder that changed since its last run,
+        then keep watching until stop_event is set (or KeyboardInterrupt).
+        """
+        folder = Path(folder)
+        stop_event = stop_event or threading.Event()
+        for path in sorted(folder.iterdir()):
+            self.notify(path, delay=0)
+
+        observer = self._start_observer(folder)
+        executor = ThreadPoolExecutor(max_workers=max(1, self.settings.WATCH_MAX_JOBS), thread_name_prefix="watch")
+        print(f"[watch] Watching {folder.resolve()}")
+        try:
+            while not stop_event.is_set():
+                for path in self._take_due():
+                    executor.submit(self._run_job, path, pin, output_dir)
+                self._wake.wait(timeout=self._next_wait())
+                self._wake.clear()
+        finally:
+            observer.stop()
+            executor.shutdown(wait=True)
+            observer.join()
+
+    def notify(self, path: Path, delay: float = None):
+        """Note that path changed; it is processed once quiet for WATCH_DEBOUNCE seconds."""
+        path = Path(path)
+        if path.suffix.lower() not in self.pipeline.import_service.SUPPORTED_EXTENSIONS:
+            return
+        if path.name.startswith((".", "~")) or not path.is_file():
+            return
+        delay = self.settings.WATCH_DEBOUNCE if delay is None else delay
+        with self._lock:
+            self._due[path] = time.monotonic() + delay
+        self._wake.set()
+
+    def update_deck(self, path: Path, pin: str, output_dir: str = None) -> Path | None:
+        """
+        Bring the deck for one source file up to date. Returns the new
+        package, or None when the file's lines have not changed.
+        """
+        path = Path(path)
+        state_dir = self._state_dir(path)
+        media_dir = state_dir / self.MEDIA_DIR
+        state = self._load_state(state_dir)
+        output_folder = self.pipeline.anki_service.output_folder(output_dir)
+        previous_package = output_folder / state["package"] if state.get("package") else None
+
+        text_processor = self.pipeline.text_processor
+        lines = list(text_processor.iter_source_lines(self.pipeline.import_service.iter_chunks(path)))
+        previous = set(state["lines"])
+        current = set(lines)
+        added = [line for line in lines if line not in previous]
+        removed = previous - current
+        if not added and not removed and previous_package and previous_package.is_file():
+            print(f"[update_deck] {path.name}: no new lines")
+            return None
+        print(f"[update_deck] {path.name}: {len(added)} new lines, {len(removed)} removed")
+
+        keys = self.settings.TRANSLATION_TYPE_KEYS
+        rows = {kind: state["cards"].get(kind, []) for kind in keys}
+        rows["L"] = [row for row in rows.get("L", []) if row[0] in current]
+        if added:
+            # Jobs run on WATCH_MAX_JOBS threads: keep their metrics out of the shared pipeline.metrics
+            metrics = {}
+            new_cards = self.pipeline.translate(added, pin, metrics=metrics)
+            try:
+                self.pipeline.synthesize(new_cards, metrics=metrics)
+                self._adopt_media(new_cards, media_dir, state)
+            finally:
+                self.pipeline.release(new_cards)
+            for kind in keys:
+                known = {row[0] for row in rows[kind]}
+                for card in new_cards.by_kind(kind):
+                    if card.japanese not in known:
+                        known.add(card.japanese)
+                        rows[kind].append([card.japanese, card.english, card.reading, card.audio, card.audio_slow])
+        # Lines in file order, whatever run they were added in
+        position = {line: i for i, line in enumerate(lines)}
+        rows["L"].sort(key=lambda row: position.get(row[0], len(position)))
+
+        cards = CardStore(keys)
+        for kind in keys:
+            for japanese, english, reading, audio, audio_slow in rows[kind]:
+                card = cards.add(kind, japanese, english, reading)
+                card.audio, card.audio_slow = audio, audio_slow
+        cards.media_dir = media_dir
+        apkg_path = self.pipeline.anki_service.generate_anki_deck(cards, path.stem, output_dir=output_dir)
+        if previous_package and previous_package != apkg_path:
+            previous_package.unlink(missing_ok=True)
+
+        state.update(source=str(path.resolve()), lines=lines, cards=rows, package=apkg_path.name)
+        self._save_state(state_dir, state)
+        self._prune_media(media_dir, rows)
+        return apkg_path
+
+    def _run_job(self, path: Path, pin: str, output_dir: str):
+        try:
+            apkg_path = self.update_deck(path, pin, output_dir)
+            if apkg_path:
+                print(f"[watch] {path.name} -> {apkg_path.name}")
+        except Exception as e:
+            print(f"[watch] Failed to update the deck for {path.name}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(path)
+            self._wake.set()
+
+    def _take_due(self) -> list[Path]:
+        now = time.monotonic()
+        with self._lock:
+            due = [path for path, at in self._due.items() if at <= now and path not in self._running]
+            for path in due:
+                del self._due[path]
+                self._running.add(path)
+        return due
+
+    def _next_wait(self) -> float:
+        with self._lock:
+            waiting = [at for path, at in self._due.items() if path not in self._running]
+        return max(0.05, min(waiting) - time.monotonic()) if waiting else 1.0
+
+    def _start_observer(self, folder: Path):
+        if not self.settings.WATCH_POLLING:
+            try:
+                from watchdog.events import FileSystemEventHandler
+                from watchdog.observers import Observer
+
+                service = self
+
+                class Handler(FileSystemEventHandler):
+                    def on_any_event(self, event):
+                        # "closed" is a close after writing; reads only produce "opened"/"closed_no_write"
+                        if event.is_directory or event.event_type not in ("created", "modified", "moved", "closed"):
+                            return
+                        service.notify(Path(os.fsdecode(getattr(event, "dest_path", "") or event.src_path)))
+
+                observer = Observer()
+                observer.schedule(Handler(), str(folder), recursive=False)
+                observer.start()
+                return observer
+            except ImportError:
+                print("[watch] watchdog is not installed, polling instead")
+            except OSError as e:
+                print(f"[watch] Filesystem notifications unavailable ({e}), polling instead")
+        poller = _Poller(folder, self.settings.WATCH_POLL_INTERVAL, self.notify)
+        poller.start()
+        return poller
+
+    def _state_dir(self, path: Path) -> Path:
+        key = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+        return self.base_dir / self.settings.WATCH_STATE_DIR / key
+
+    def _load_state(self, state_dir: Path) -> dict:
+        state = {"lines": [], "cards": {}, "package": None, "next_media": 1}
+        try:
+            with open(state_dir / self.STATE_FILE, encoding="utf-8") as f:
+                state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[_load_state] Starting over, unreadable state in {state_dir}: {e}")
+        return state
+
+    def _save_state(self, state_dir: Path, state: dict):
+        state_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_dir / (self.STATE_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, state_dir / self.STATE_FILE)
+
+    def _adopt_media(self, cards: CardStore, media_dir: Path, state: dict):
+        """Move the new clips out of the job workspace under names unique to this file's deck."""
+        media_dir.mkdir(parents=True, exist_ok=True)
+        prefix = media_dir.parent.name[:8]
+        for card in cards:
+            for attr in ("audio", "audio_slow"):
+                name = getattr(card, attr)
+                if not name or not (cards.media_dir / name).is_file():
+                    setattr(card, attr, None)
+                    continue
+                new_name = f"{prefix}_{state['next_media']}{Path(name).suffix}"
+                state["next_media"] += 1
+                shutil.move(str(cards.media_dir / name), str(media_dir / new_name))
+                setattr(card, attr, new_name)
+
+    @staticmethod
+    def _prune_media(media_dir: Path, rows: dict):
+        """Delete clips no card uses any more (cards of removed lines)."""
+        if not media_dir.is_dir():
+            return
+        used = {name for kind_rows in rows.values() for row in kind_rows for name in row[3:5] if name}
+        for clip in media_dir.iterdir():
+            if clip.name not in used:
+                clip.unlink(missing_ok=True)
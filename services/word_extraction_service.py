@@ -0,0 +1,89 @@
+from collections import Counter
+from pathlib import Path
+
+from services.reading_service import ReadingService
+from services.settings_service import AppSettings
+
+_KANJI_RANGE = ("一", "鿿")
+_KATAKANA_RANGE = ("ァ", "ヺ")
+_HIRAGANA_RANGE = ("ぁ", "ゖ")
+# Particles pykakasi leaves attached to the word before them (今日は, 東京に)
+_TRAILING_PARTICLES = "はがをにでともへの"
+
+
+def _is_kanji(ch: str) -> bool:
+    return _KANJI_RANGE[0] <= ch <= _KANJI_RANGE[1] or ch == "々"
+
+
+def _is_katakana(ch: str) -> bool:
+    return _KATAKANA_RANGE[0] <= ch <= _KATAKANA_RANGE[1] or ch == "ー"
+
+
+def _is_hiragana(ch: str) -> bool:
+    return _HIRAGANA_RANGE[0] <= ch <= _HIRAGANA_RANGE[1]
+
+
+class WordExtractionService:
+    """
+    Builds the W list locally instead of letting the model pick words.
+
+    Lines are segmented with pykakasi (through ReadingService, which shares
+    the converter). Tokens with kanji or katakana are candidates, with a
+    trailing particle pykakasi left attached removed; hiragana-only tokens,
+    which are mostly grammar fragments with this segmentation, only with
+    WORD_KANA_ONLY. Candidates in WORD_STOP_LIST or WORD_STOP_FILE (words
+    the learner knows) or seen fewer than WORD_MIN_COUNT times are dropped,
+    and the WORD_MAX_COUNT most frequent are kept.
+    """
+
+    def __init__(self, base_dir: Path, settings: AppSettings, readings: ReadingService):
+        self.base_dir = base_dir
+        self.settings = settings
+        self.readings = readings
+
+    def count_words(self, lines) -> Counter:
+        """Candidate words and how often they occur, in first-seen order."""
+        counts = Counter()
+        for line in lines:
+            for token in self.readings.segment(line):
+                word = self._candidate(token)
+                if word:
+                    counts[word] += 1
+        return counts
+
+    def extract(self, lines) -> list[str]:
+        """The words for the W list, most frequent first (ties in first-seen order)."""
+        counts = self.count_words(lines)
+        stop = self.stop_words()
+        kept = [
+            word for word, count in counts.most_common()
+            if count >= self.settings.WORD_MIN_COUNT and word not in stop
+        ]
+        if self.settings.WORD_MAX_COUNT > 0:
+            kept = kept[:self.settings.WORD_MAX_COUNT]
+        print(f"[extract] {len(kept)} of {len(counts)} candidate words kept for the W list")
+        return kept
+
+    def stop_words(self) -> set[str]:
+        stop = set(self.settings.WORD_STOP_LIST)
+        if self.settings.WORD_STOP_FILE:
+            stop_path = self.base_dir / self.settings.WORD_STOP_FILE
+            try:
+                with open(stop_path, encoding="utf-8-sig") as f:
+                    stop.update(line.strip() for line in f if line.strip() and not line.startswith("#"))
+            except OSError as e:
+                print(f"[stop_words] Could not read {stop_path}: {e}")
+        return stop
+
+    def _candidate(self, token: str) -> str:
+        token = token.strip()
+        if not token:
+            return ""
+        if not any(_is_kanji(ch) or _is_katakana(ch) for ch in token):
+            if self.settings.WORD_KANA_ONLY and len(token) > 1 and all(_is_hiragana(ch) for ch in token):
+                return token
+            return ""
+        stem = token[:-1]
+        if token[-1] in _TRAILING_PARTICLES and stem and all(_is_kanji(ch) or _is_katakana(ch) for ch in stem):
+            return stem
+        return token
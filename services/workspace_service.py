@@ -0,0 +1,192 @@
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from itertools import count
+from pathlib import Path
+
+from services.settings_service import AppSettings
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return bool(ok) and exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class WorkspaceService:
+    """
+    Per-job temp folders under TMP_MP3_DIR, so jobs that run back to back
+    or at the same time never share audio files.
+
+    Each workspace records its owning process. Finished workspaces are
+    deleted by a background thread, so a large deletion never holds up the
+    next job. With WORKSPACE_KEEP_FINISHED they are kept instead and the
+    least recently used are deleted once all workspaces together exceed
+    WORKSPACE_QUOTA_MB. Workspaces left by processes that are no longer
+    running (crashed runs) are swept when the cleaner starts.
+    """
+    OWNER_FILE = ".owner"
+    FINISHED_FILE = ".finished"
+
+    _ids = count(1)
+
+    def __init__(self, base_dir: Path, settings: AppSettings):
+        self.base_dir = base_dir
+        self.settings = settings
+        self._queue = queue.Queue()
+        self._finished = {}  # path -> size in bytes, for quota checks
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the background cleaner, which first sweeps orphaned workspaces."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_cleaner, name="workspace-cleanup", daemon=True)
+                self._thread.start()
+
+    @property
+    def root(self) -> Path:
+        return self.base_dir / self.settings.TMP_MP3_DIR
+
+    def create(self, name: str = "job") -> Path:
+        """Create and return a new empty workspace folder owned by this process."""
+        self.start()
+        path = self.root / f"{name}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{next(self._ids)}"
+        path.mkdir(parents=True)
+        with open(path / self.OWNER_FILE, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "created": time.time()}, f)
+        self._queue.put(None)  # re-check the quota with the new job counted
+        return path
+
+    def release(self, path: Path):
+        """Mark a workspace as finished; it is deleted or kept in the background."""
+        if path is None or not Path(path).is_dir():
+            return
+        path = Path(path)
+        self.start()
+        (path / self.FINISHED_FILE).touch()
+        self._queue.put(path)
+
+    def usage(self) -> int:
+        """Bytes used by all workspaces on disk."""
+        if not self.root.is_dir():
+            return 0
+        return sum(_dir_size(entry) for entry in self.root.iterdir() if entry.is_dir())
+
+    def sweep_orphans(self) -> int:
+        """
+        Delete workspaces whose owning process has exited, and loose files
+        left directly in the root by older versions. Returns the number removed.
+        """
+        if not self.root.is_dir():
+            return 0
+        removed = 0
+        for entry in self.root.iterdir():
+            if entry.is_dir():
+                if self._owner_alive(entry):
+                    continue
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink(missing_ok=True)
+            removed += 1
+        if removed:
+            print(f"[sweep_orphans] Removed {removed} leftover workspace entries from {self.root.resolve()}")
+        return removed
+
+    def remove_own(self):
+        """Delete every workspace of this process, e.g. on exit."""
+        if not self.root.is_dir():
+            return
+        pid = os.getpid()
+        for entry in self.root.iterdir():
+            if entry.is_dir() and self._owner_pid(entry) == pid:
+                shutil.rmtree(entry, ignore_errors=True)
+        with self._lock:
+            self._finished.clear()
+
+    def _owner_pid(self, path: Path) -> int | None:
+        try:
+            with open(path / self.OWNER_FILE, encoding="utf-8") as f:
+                return int(json.load(f)["pid"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _owner_alive(self, path: Path) -> bool:
+        pid = self._owner_pid(path)
+        if pid is None:
+            # Being created right now, or not a workspace; leave young folders alone
+            return time.time() - path.stat().st_mtime < 60
+        return _pid_alive(pid)
+
+    def _run_cleaner(self):
+        try:
+            self.sweep_orphans()
+        except OSError as e:
+            print(f"[_run_cleaner] Could not sweep {self.root}: {e}")
+        while True:
+            path = self._queue.get()
+            try:
+                if path is not None:
+                    if self.settings.WORKSPACE_KEEP_FINISHED:
+                        with self._lock:
+                            self._finished[path] = _dir_size(path)
+                    else:
+                        shutil.rmtree(path, ignore_errors=True)
+                self._enforce_quota()
+            except OSError as e:
+                print(f"[_run_cleaner] Cleanup failed for {path}: {e}")
+
+    def _enforce_quota(self):
+        quota = self.settings.WORKSPACE_QUOTA_MB * 1024 * 1024
+        used = self.usage()
+        if used <= quota:
+            return
+        # Least recently finished first; workspaces still in use are never touched
+        with self._lock:
+            finished = sorted(
+                (p for p in self._finished if (p / self.FINISHED_FILE).exists()),
+                key=lambda p: (p / self.FINISHED_FILE).stat().st_mtime,
+            )
+        for path in finished:
+            if used <= quota:
+                break
+            with self._lock:
+                size = self._finished.pop(path, 0)
+            shutil.rmtree(path, ignore_errors=True)
+            used -= size
+            print(f"[_enforce_quota] Reclaimed {path.name} ({size // 1024} KiB)")
+        if used > quota:
+            print(f"[_enforce_quota] Workspaces in use take {used / (1024 * 1024):.1f} MB, over the {self.settings.WORKSPACE_QUOTA_MB} MB quota")
@@ -1,5 +1,5 @@
 # ─── Paths & I/O ───────────────────────────────────────────────────────────────
-TMP_MP3_DIR              = "tmp_mp3"
+TMP_MP3_DIR              = "tmp_mp3"      # holds one workspace folder per job
 OUTPUT_DIR               = r""
 VOICEVOX_PATH            = r""
 PROMPT_FILE              = "prompt.txt"
@@ -7,14 +7,42 @@ DEBUG_INPUT_FILE         = "debugging/input.txt"
 DEBUG_RESPONSE_FILE      = "debugging/response.txt"
 CSS_FILE                 = "anki_style.txt"
 ICON_FILE                = "icons/icon.png"
+WORKSPACE_QUOTA_MB       = 2048           # disk for all job workspaces under TMP_MP3_DIR
+WORKSPACE_KEEP_FINISHED  = False          # keep finished workspaces until the quota needs the space
 
 # ─── VOICEVOX / TTS Settings ───────────────────────────────────────────────────
 API_URL                   = "127.0.0.1"       
 API_PORT                  = "50021"
 AUDIO_QUERY_ENDPOINT      = "/audio_query"
 AUDIO_SYNTHESIS_ENDPOINT  = "/synthesis"
+MULTI_SYNTHESIS_ENDPOINT  = "/multi_synthesis"
+MULTI_SYNTHESIS_ENABLED   = True        # several clips per engine request (zip of WAVs)
+MULTI_SYNTHESIS_MAX_BATCH = 32          # clips per request
+MULTI_SYNTHESIS_MAX_MORAS = 400         # total morae per request, so long lines go in small batches
+TTS_MAX_CHUNK_MORAS       = 60          # longer clips are split and the chunks synthesized in parallel (0 = never)
+TTS_CROSSFADE_MS          = 15          # blend between joined chunks
+AUDIO_QUERY_CACHE_SIZE    = 20000       # audio queries kept for re-synthesis (variants, repeated text)
+SLOW_AUDIO_ENABLED        = False       # add a slowed-down clip to every card
+SLOW_AUDIO_SPEED          = 0.75        # speedScale of the slow clip, relative to normal
 VOICEVOX_SPEAKER          = 2
 
+# ─── Audio Encoding ───────────────────────────────────────────────────────────
+AUDIO_ENCODER             = "mp3"       # "mp3" (lameenc) or "opus" (Opus in .ogg, needs soundfile)
+MP3_VBR_QUALITY           = 6           # LAME VBR preset, 0 (best) to 9 (smallest); -1 = constant MP3_BITRATE
+MP3_BITRATE               = 128         # kbps, constant bitrate mode only
+MP3_QUALITY               = 2           # LAME algorithm quality, 0 (best, slowest) to 9
+OPUS_BITRATE              = 24          # kbps; 16-32 is plenty for synthesized speech
+
+# ─── Concurrency ──────────────────────────────────────────────────────────────
+AUTOTUNE_ENABLED          = True        # tune the limits below while running (back off on 429s/timeouts)
+AUTOTUNE_LIMITS           = {           # requests in flight per backend: [min, start, max]; max 0 = CPU count
+    "openai":  [1, 2, 8],
+    "engine":  [1, 4, 16],
+    "encoder": [1, 2, 0],
+}
+AUTOTUNE_BACKOFF          = 0.5         # limit multiplier after an overload
+AUTOTUNE_LATENCY_TOLERANCE = 2.0        # latency per line/mora/second over this times the best seen counts as overload
+
 # ─── Application Window ────────────────────────────────────────────────────────
 WINDOW_TITLE              = "Anki Deck Generator"
 WINDOW_LENGTH             = 600
@@ -24,19 +52,112 @@ FONT_SIZE                 = 16
 MARGINS                   = [20, 20, 20, 20]
 SPACING                   = 16
 
+# ─── Text Processing ──────────────────────────────────────────────────────────
+SEGMENT_CHUNK_SIZE        = 65536   # characters read per chunk from files/streams
+DEDUP_MAX_ENTRIES         = 200000  # distinct lines remembered for de-duplication
+IMPORT_CHUNK_BYTES        = 1048576 # bytes decoded per step when importing files
+IMPORT_ENCODINGS          = ["utf-8", "cp932"]  # tried in order; cp932 is Windows Shift-JIS
+
+# ─── Near-Duplicate Lines ─────────────────────────────────────────────────────
+NEAR_DUP_ENABLED          = True    # translate one line per group of lines equal after normalization
+NEAR_DUP_FUZZY            = False   # also group similar lines (MinHash/LSH); can merge lines that differ in meaning
+NEAR_DUP_THRESHOLD        = 0.8     # character-shingle Jaccard similarity to group two lines (fuzzy only)
+NEAR_DUP_SHINGLE_SIZE     = 2       # characters per shingle
+NEAR_DUP_BANDS            = 4       # LSH bands (more bands find more candidates, slower)
+NEAR_DUP_VARIANT_RULES    = [       # [regex, replacement] applied after width folding and punctuation removal
+    ["[ーｰ〜～]+$", ""],                                       # trailing long-vowel marks
+    ["([ぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮ])\\1+", "\\1"],  # repeated small kana
+    ["(.)\\1{2,}", "\\1\\1"],                                  # runs of one character
+]
+
 # ─── Deck & Card Defaults ─────────────────────────────────────────────────────
 DEFAULT_TITLE             = ""
 SUBDECK_NAMES             = {"L": "Lines", "W": "Words", "K": "Kanji"}
 CARD_MODEL                = 1607392319
+COMBINED_DECK_WORKERS     = 3           # decks of a combined package built at the same time
 TRANSLATION_TYPE_KEYS     = ["L", "W", "K"]
 
+# ─── Job Cache ────────────────────────────────────────────────────────────────
+JOB_CACHE_ENABLED         = True        # reuse the package of an identical earlier job
+JOB_CACHE_INDEX           = ".deck_index.json"  # fingerprint -> package, kept in the output folder
+JOB_CACHE_COPY            = False       # give a repeated job its own timestamped copy instead of the same file
+
+# ─── Watch Mode ───────────────────────────────────────────────────────────────
+WATCH_DEBOUNCE            = 2.0         # seconds a file must stay unchanged before it is processed
+WATCH_POLLING             = False       # poll instead of filesystem notifications (e.g. network drives)
+WATCH_POLL_INTERVAL       = 5.0         # seconds between folder scans when polling
+WATCH_MAX_JOBS            = 2           # files processed at the same time
+WATCH_STATE_DIR           = "watch_state"  # per-file lines, cards and clips from the last run
+
 # ─── AI/Translation Settings ──────────────────────────────────────────────────
 AI_MODEL                  = "gpt-4o-mini"
 # AI_MODEL                = "gpt-3.5-turbo"
 MAX_TOKENS                = 16000
 TEMPERATURE               = 0.2
+RESPONSE_FORMAT           = "tsv"       # "tsv" (compact rows, prompt_compact.txt) or "json" (prompt.txt)
+COMPACT_PROMPT_FILE       = "prompt_compact.txt"
+WORDS_PROMPT_FILE         = "prompt_words.txt"          # used instead when WORD_SOURCE = "local"
+COMPACT_WORDS_PROMPT_FILE = "prompt_compact_words.txt"
+TRANSLATION_RETRIES       = 1           # re-requests for lines missing from a reply
+TRANSLATION_CHUNK_LINES   = 200         # longer inputs go as parallel requests of this many lines (0 = one request)
+
+# ─── Word Extraction ──────────────────────────────────────────────────────────
+WORD_SOURCE               = "model"     # "model" (picks W from the lines) or "local" (pykakasi picks, the model only glosses)
+WORD_MIN_COUNT            = 1           # times a word must occur in the input to get a card
+WORD_MAX_COUNT            = 150         # most frequent words kept (0 = no limit)
+WORD_KANA_ONLY            = False       # also keep hiragana-only tokens (mostly grammar fragments)
+WORD_STOP_FILE            = ""          # optional file of known words to skip, one per line
+WORD_STOP_LIST            = [           # words never given a card
+    "私", "僕", "俺", "君", "あなた", "彼", "彼女", "人", "事", "物", "時", "今", "何",
+    "ここ", "そこ", "これ", "それ", "あれ", "する", "いる", "ある", "なる", "言う",
+]
+
+# ─── Model Routing ────────────────────────────────────────────────────────────
+ROUTING_ENABLED           = False       # split lines between an easy and a hard tier
+ROUTE_EASY_MAX_CHARS      = 12          # "easy" lines are at most this long ...
+ROUTE_EASY_MAX_KANJI      = 2           # ... with at most this many kanji and no 「」 speech
+ROUTE_EASY_BACKEND        = "openai"    # "openai" (ROUTE_EASY_MODEL) or "local"
+ROUTE_EASY_MODEL          = "gpt-4o-mini"
+ROUTE_HARD_MODEL          = "gpt-4o"
+ROUTE_LATENCY_BUDGET      = 120         # seconds per job before a slow tier goes to the local model (0 = no limit)
+MODEL_PRICES              = {           # USD per 1M tokens [input, output], for run reports (July 2025)
+    "gpt-4o-mini": [0.15, 0.60],
+    "gpt-4o": [2.50, 10.00],
+    "gpt-4.1-nano": [0.10, 0.40],
+    "gpt-4.1-mini": [0.40, 1.60],
+}
+
+# ─── Batch Mode ───────────────────────────────────────────────────────────────
+BATCH_ENABLED             = False       # submit through the OpenAI Batch API and wait for the results (cli.py only)
+BATCH_DIR                 = "batch_jobs"  # request files and saved batch ids, for resuming
+BATCH_LINES_PER_REQUEST   = 100         # lines per request inside the batch
+BATCH_COMPLETION_WINDOW   = "24h"
+BATCH_POLL_INTERVAL       = 60          # seconds between status checks
+BATCH_MAX_WAIT            = 0           # seconds to wait before giving up for this run (0 = until the batch ends)
+BATCH_PRICE_FACTOR        = 0.5         # batch price relative to MODEL_PRICES
+LOCAL_READING_KEYS        = ["L", "W"]  # romaji generated locally with pykakasi, not by the model
+READING_CACHE_SIZE        = 50000       # memoized romaji readings
+KANJI_INDEX_FILE          = "kanji_index.bin"  # offline kanji meanings/readings (K subdeck)
+KANJI_MAX_MEANINGS        = 3           # meanings shown on a kanji card
+
+# ─── Local Translation ────────────────────────────────────────────────────────
+TRANSLATION_BACKEND       = "openai"    # "openai" (AI_MODEL) or "local" (Marian model below)
+LOCAL_MT_MODEL_DIR        = ""          # folder with a saved MarianMT model, e.g. opus-mt-ja-en
+LOCAL_MT_FALLBACK         = True        # use the local model when OpenAI cannot be reached
+LOCAL_MT_THREADS          = 0           # CPU threads for the local model (0 = torch default)
+LOCAL_MT_QUANTIZE         = True        # int8 dynamic quantization of Linear layers
+LOCAL_MT_BATCH_SIZE       = 16          # lines per batch (batches hold lines of similar length)
+LOCAL_MT_MAX_LENGTH       = 256         # max tokens per input line and per translation
+LOCAL_MT_NUM_BEAMS        = 1           # 1 = greedy decoding
+
+# ─── API Key Security ─────────────────────────────────────────────────────────
+# KDF used to encrypt the stored API key; older keys are migrated on next unlock.
+# scrypt memory per unlock = n * r * 128 bytes (32 MiB below).
+KEY_KDF                   = "scrypt:n=32768,r=8,p=1"
+CREDENTIAL_IDLE_TTL       = 900     # seconds the unlocked key stays in memory; 0 = always ask
 
 # ─── Debug Flags & Terms ──────────────────────────────────────────────────────
 DEBUG_INPUT               = False
 DEBUG_API                 = False
+PROFILE_RUNS              = False   # write a cProfile/tracemalloc bundle per run
 TERMS_AGREEMENT_AGREED_TO = False
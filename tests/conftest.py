@@ -0,0 +1,58 @@
+"""
+Shared fixtures: a throwaway BASE_DIR with a stored test key, and the stub
+OpenAI and VOICEVOX backends from benchmarks/stubs.py, so the tests need no
+API key, network or engine install.
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_pipeline import BENCH_PIN, _make_base_dir
+from benchmarks.stubs import StubBatchServer, StubVoicevoxServer
+
+PIN = BENCH_PIN
+
+
+@pytest.fixture(scope="session")
+def openai_stub():
+    """One chat + Batch API stub for the session; the openai client keeps its first base URL."""
+    with StubBatchServer() as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        yield server
+
+
+@pytest.fixture
+def chat(openai_stub):
+    """The session's OpenAI stub with its per-test behaviour reset."""
+    openai_stub.batch_seconds = 0.0
+    openai_stub.failing_polls = 0
+    openai_stub.failed_requests = set()
+    openai_stub.max_completion_chars = None
+    openai_stub.request_count = 0
+    openai_stub.batches.clear()
+    openai_stub.files.clear()
+    return openai_stub
+
+
+@pytest.fixture
+def engine():
+    with StubVoicevoxServer() as server:
+        yield server
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    return _make_base_dir(tmp_path)
+
+
+@pytest.fixture
+def settings(base_dir, chat, engine):
+    """Settings loaded from base_dir, pointed at the stubs, with the test key stored under PIN."""
+    from services.settings_service import SettingsService
+
+    settings_service = SettingsService(base_dir)
+    settings = settings_service.load_settings()
+    settings.API_URL = "127.0.0.1"
+    settings.API_PORT = str(engine.port)
+    settings_service.encrypt_and_store_api_key("sk-test", PIN)
+    return settings
@@ -0,0 +1,65 @@
+"""Batch mode (request_batch_translation_data) against the stub Batch API."""
+import pytest
+
+from tests.conftest import PIN
+
+LINES = [f"これは{i}番目の文です" for i in range(25)]
+
+
+@pytest.fixture
+def translation(base_dir, settings):
+    from services.translation_service import TranslationService
+
+    settings.BATCH_LINES_PER_REQUEST = 10
+    settings.BATCH_POLL_INTERVAL = 0.05
+    return TranslationService(base_dir, settings)
+
+
+def _translated(data: dict) -> list[str]:
+    return [row[0] for row in data["L"]]
+
+
+def test_completed_batch(translation, chat, base_dir, settings):
+    data, report = translation.request_batch_translation_data(LINES, pin=PIN)
+
+    assert _translated(data) == LINES
+    assert report["status"] == "completed"
+    assert report["requests"] == 3
+    assert report["missing_lines"] == 0
+    batch, requests, _ = chat.batches[report["batch_id"]]
+    assert len(chat.files[batch["input_file_id"]].splitlines()) == 3
+    assert [request["custom_id"] for request in requests] == ["chunk-0", "chunk-1", "chunk-2"]
+    # Nothing is left to resume
+    assert not list((base_dir / settings.BATCH_DIR).iterdir())
+
+
+def test_pending_batch_is_resumed(translation, chat, settings):
+    chat.batch_seconds = 0.5
+    settings.BATCH_MAX_WAIT = 0.1
+    with pytest.raises(RuntimeError, match="still running"):
+        translation.request_batch_translation_data(LINES, pin=PIN)
+    assert len(chat.batches) == 1
+
+    settings.BATCH_MAX_WAIT = 0
+    data, report = translation.request_batch_translation_data(LINES, pin=PIN)
+    assert len(chat.batches) == 1
+    assert report["batch_id"] in chat.batches
+    assert _translated(data) == LINES
+
+
+def test_failing_polls_are_retried(translation, chat):
+    # More 503s than the openai client retries on its own, so _poll_batch retries too
+    chat.failing_polls = 4
+    data, report = translation.request_batch_translation_data(LINES, pin=PIN)
+
+    assert chat.failing_polls == 0
+    assert report["status"] == "completed"
+    assert _translated(data) == LINES
+
+
+def test_failed_requests_are_sent_interactively(translation, chat):
+    chat.failed_requests = {"chunk-1"}
+    data, report = translation.request_batch_translation_data(LINES, pin=PIN)
+
+    assert report["missing_lines"] == 10
+    assert _translated(data) == LINES
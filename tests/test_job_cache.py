@@ -0,0 +1,90 @@
+"""The job cache reuses a package only when its job was complete."""
+import socket
+
+from benchmarks.corpus import make_corpus
+from tests.conftest import PIN
+
+TITLE = "Cache Test"
+
+
+def _pipeline(base_dir, settings):
+    from services.pipeline_service import PipelineService
+
+    return PipelineService(base_dir, settings)
+
+
+def _closed_port() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return str(sock.getsockname()[1])
+
+
+def test_complete_job_is_reused(base_dir, settings, tmp_path):
+    pipeline = _pipeline(base_dir, settings)
+    text = make_corpus(10, seed=1)
+
+    first = pipeline.run(text, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert not pipeline.metrics["job_cache"]["hit"]
+    second = pipeline.run(text, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert pipeline.metrics["job_cache"]["hit"]
+    assert second == first
+
+
+def test_job_with_failed_clips_is_not_recorded(base_dir, settings, engine, tmp_path):
+    pipeline = _pipeline(base_dir, settings)
+    text = make_corpus(10, seed=2)
+
+    settings.API_PORT = _closed_port()
+    pipeline.run(text, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert pipeline.metrics["failed_clips"] > 0
+
+    settings.API_PORT = str(engine.port)
+    pipeline.run(text, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert not pipeline.metrics["job_cache"]["hit"]
+    assert "failed_clips" not in pipeline.metrics
+    assert engine.request_count > 0
+
+
+def test_job_with_untranslated_lines_is_not_recorded(base_dir, settings, chat, tmp_path):
+    settings.RESPONSE_FORMAT = "tsv"
+    settings.TRANSLATION_RETRIES = 0
+    settings.TRANSLATION_CHUNK_LINES = 0
+    pipeline = _pipeline(base_dir, settings)
+    text = make_corpus(30, seed=3)
+
+    chat.max_completion_chars = 200
+    pipeline.run(text, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert pipeline.metrics["untranslated"] > 0
+
+    chat.max_completion_chars = None
+    pipeline.run(text, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert not pipeline.metrics["job_cache"]["hit"]
+    assert "untranslated" not in pipeline.metrics
+
+
+def test_combined_package_with_a_partial_deck_is_not_recorded(base_dir, settings, engine, tmp_path):
+    pipeline = _pipeline(base_dir, settings)
+    inputs = [("one", make_corpus(10, seed=4)), ("two", make_corpus(10, seed=5))]
+
+    settings.API_PORT = _closed_port()
+    pipeline.run_many(inputs, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert all(deck["failed_clips"] for deck in pipeline.metrics["decks"])
+
+    settings.API_PORT = str(engine.port)
+    pipeline.run_many(inputs, TITLE, PIN, output_dir=str(tmp_path / "out"))
+    assert not pipeline.metrics["job_cache"]["hit"]
+
+
+def test_fingerprint_follows_output_settings_and_kanji_index(base_dir, settings):
+    pipeline = _pipeline(base_dir, settings)
+    lines = ["猫が好きです"]
+    fingerprints = {pipeline.fingerprint(lines, TITLE)}
+    for name, value in (
+        ("NEAR_DUP_VARIANT_RULES", []), ("NEAR_DUP_SHINGLE_SIZE", 3), ("NEAR_DUP_BANDS", 8),
+        ("KANJI_MAX_MEANINGS", 1), ("TTS_MAX_CHUNK_MORAS", 30), ("TTS_CROSSFADE_MS", 40),
+    ):
+        setattr(settings, name, value)
+        fingerprints.add(pipeline.fingerprint(lines, TITLE))
+    (base_dir / settings.KANJI_INDEX_FILE).write_bytes(b"")
+    fingerprints.add(pipeline.fingerprint(lines, TITLE))
+    assert len(fingerprints) == 8
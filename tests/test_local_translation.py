@@ -0,0 +1,115 @@
+"""
+LocalTranslationService on a tiny random MarianMT model (stubs.make_tiny_marian).
+The model's output is noise, so the checks are about order, loading and
+fallback, not translation quality. Skipped without torch, transformers and
+sentencepiece, except for the missing-model checks.
+"""
+import pytest
+
+from services.settings_service import AppSettings
+from tests.conftest import PIN
+
+# Distinct lengths, so the length sort always forms the same batches
+LINES = ["猫", "猫が好き", "今日は晴れです", "明日は雨が降るでしょう", "駅の前で友達を待っていました", "昨日の夜は遅くまで本を読んでいた"]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    pytest.importorskip("sentencepiece")
+    from benchmarks.stubs import make_tiny_marian
+
+    return make_tiny_marian(tmp_path_factory.mktemp("models") / "tiny_marian", LINES * 20)
+
+
+@pytest.fixture
+def torch_threads():
+    torch = pytest.importorskip("torch")
+    threads = torch.get_num_threads()
+    yield torch
+    torch.set_num_threads(threads)
+
+
+def _service(base_dir, model_dir="", **overrides):
+    from services.local_translation_service import LocalTranslationService
+
+    options = {"LOCAL_MT_MAX_LENGTH": 16, "LOCAL_MT_QUANTIZE": False, **overrides}
+    settings = AppSettings(LOCAL_MT_MODEL_DIR=str(model_dir), **options)
+    return LocalTranslationService(base_dir, settings)
+
+
+def test_batches_keep_input_order(tmp_path, tiny_model):
+    service = _service(tmp_path, tiny_model, LOCAL_MT_BATCH_SIZE=2)
+    forward = service.translate(LINES)
+    backward = service.translate(LINES[::-1])
+
+    assert len(forward) == len(LINES)
+    assert all(isinstance(text, str) for text in forward)
+    # Same batches either way, so each line gets the same output wherever it stands
+    assert backward == forward[::-1]
+
+    one_by_one = _service(tmp_path, tiny_model, LOCAL_MT_BATCH_SIZE=1)
+    assert one_by_one.translate(LINES) == [one_by_one.translate([line])[0] for line in LINES]
+
+
+def test_int8_model_loads_and_translates(tmp_path, tiny_model, torch_threads):
+    torch = torch_threads
+    service = _service(tmp_path, tiny_model, LOCAL_MT_QUANTIZE=True)
+    translations = service.translate(LINES)
+
+    assert len(translations) == len(LINES)
+    quantized = torch.ao.nn.quantized.dynamic.Linear
+    assert any(isinstance(module, quantized) for module in service._model.modules())
+
+
+def test_thread_count_is_applied(tmp_path, tiny_model, torch_threads):
+    torch = torch_threads
+    service = _service(tmp_path, tiny_model, LOCAL_MT_THREADS=2)
+    service.translate(LINES[:2])
+    assert torch.get_num_threads() == 2
+
+
+def test_words_are_translated_after_the_lines(tmp_path, tiny_model):
+    service = _service(tmp_path, tiny_model)
+    data = service.request_translation_data(LINES[:3], words=["猫", "雨"])
+
+    assert [row[0] for row in data["L"]] == LINES[:3]
+    assert [row[0] for row in data["W"]] == ["猫", "雨"]
+
+
+def test_missing_model_dir(tmp_path):
+    service = _service(tmp_path, tmp_path / "no_such_model")
+
+    assert not service.is_available()
+    with pytest.raises(RuntimeError, match="No local translation model"):
+        service.translate(LINES)
+    assert not _service(tmp_path).is_available()
+
+
+def _pipeline_with_failing_openai(base_dir, settings, chat, model_dir):
+    from services.pipeline_service import PipelineService
+
+    settings.LOCAL_MT_MODEL_DIR = str(model_dir)
+    settings.LOCAL_MT_MAX_LENGTH = 16
+    settings.LOCAL_MT_FALLBACK = True
+    settings.RESPONSE_FORMAT = "tsv"
+    settings.TRANSLATION_RETRIES = 0
+    settings.NEAR_DUP_ENABLED = False
+    # Empty replies: no line translated, so the OpenAI request raises RuntimeError
+    chat.max_completion_chars = 0
+    return PipelineService(base_dir, settings)
+
+
+def test_openai_failure_falls_back_to_the_local_model(base_dir, settings, chat, tiny_model):
+    pipeline = _pipeline_with_failing_openai(base_dir, settings, chat, tiny_model)
+    cards = pipeline.translate(LINES, PIN)
+
+    assert [card.japanese for card in cards.by_kind("L")] == LINES
+
+
+def test_no_fallback_without_a_model(base_dir, settings, chat):
+    pipeline = _pipeline_with_failing_openai(base_dir, settings, chat, base_dir / "no_such_model")
+
+    with pytest.raises(RuntimeError):
+        pipeline.translate(LINES, PIN)
@@ -0,0 +1,56 @@
+"""
+Build kanji_index.bin from KANJIDIC2.
+
+Download kanjidic2.xml.gz from https://www.edrdg.org/wiki/index.php/KANJIDIC_Project
+(licensed CC BY-SA 4.0 by the Electronic Dictionary Research and Development
+Group), then run from the repository root:
+
+    python -m tools.build_kanji_index kanjidic2.xml.gz
+    python -m tools.build_kanji_index kanjidic2.xml.gz --output kanji_index.bin
+
+Only characters in the CJK Unified Ideographs block (U+4E00-U+9FFF, the
+range TextManipulationService keeps) with at least one English meaning are
+written.
+"""
+import argparse
+import gzip
+from pathlib import Path
+from xml.etree import ElementTree
+
+from services.kanji_index_service import KanjiEntry, KanjiIndexService
+
+FIRST, LAST = 0x4E00, 0x9FFF
+
+
+def read_kanjidic2(path: Path) -> dict[str, KanjiEntry]:
+    """Stream <character> elements and keep English meanings and on/kun readings."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    entries = {}
+    with opener(path, "rb") as f:
+        for _, element in ElementTree.iterparse(f):
+            if element.tag != "character":
+                continue
+            literal = element.findtext("literal")
+            if literal and len(literal) == 1 and FIRST <= ord(literal) <= LAST:
+                meanings = tuple(m.text for m in element.iterfind(".//rmgroup/meaning") if "m_lang" not in m.attrib)
+                on = tuple(r.text for r in element.iterfind(".//rmgroup/reading[@r_type='ja_on']"))
+                kun = tuple(r.text for r in element.iterfind(".//rmgroup/reading[@r_type='ja_kun']"))
+                if meanings:
+                    entries[literal] = KanjiEntry(meanings, on, kun)
+            element.clear()
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, help="kanjidic2.xml or kanjidic2.xml.gz")
+    parser.add_argument("--output", type=Path, default=Path("kanji_index.bin"))
+    args = parser.parse_args(argv)
+
+    entries = read_kanjidic2(args.source)
+    KanjiIndexService.write(args.output, entries)
+    print(f"Wrote {len(entries)} kanji to {args.output} ({args.output.stat().st_size // 1024} KiB)")
+
+
+if __name__ == "__main__":
+    main()